@@ -13,9 +13,10 @@ astronomical data analysis. This package is based on the 'sparse2d' C++ library
 that allows sparse decomposition, denoising and deconvolution.
 """
 
-# import matplotlib
-# matplotlib.use("Agg")
+# System import
+import os
 
+# Package import
 from .info import __version__
 import pysap.extensions
 from pysap.base import io
@@ -27,5 +28,6 @@ from pysap.utils import load_transform
 from pysap.utils import AVAILABLE_TRANSFORMS
 
 
-# Display a welcome message
-print(info())
+# Display a welcome message: opt-in since it imports all the dependencies
+if os.environ.get("PYSAP_BANNER", "0").lower() not in ("", "0", "false"):
+    print(info())
@@ -40,3 +40,20 @@ class Sparse2dConfigurationError(Sparse2dError):
     def __init__(self, command_name):
         message = "Sparse2d command '{0}' not found.".format(command_name)
         super(Sparse2dConfigurationError, self).__init__(message)
+
+
+class Sparse2dTimeoutError(Sparse2dRuntimeError):
+    """ Error thrown when a Sparse2d command exceeds its timeout.
+    """
+    def __init__(self, algorithm_name, parameters, timeout):
+        super(Sparse2dTimeoutError, self).__init__(
+            algorithm_name, parameters,
+            "timeout expired after {0} seconds".format(timeout))
+
+
+class Sparse2dKilledError(Sparse2dRuntimeError):
+    """ Error thrown when a running Sparse2d command is killed on request.
+    """
+    def __init__(self, algorithm_name, parameters):
+        super(Sparse2dKilledError, self).__init__(
+            algorithm_name, parameters, "killed on request")
@@ -13,7 +13,6 @@ import numpy
 # Package import
 from .observable import Observable
 from pysap.base.exceptions import Exception
-from pysap.plotting import plot_data
 
 
 class Image(Observable):
@@ -88,6 +87,7 @@ class Image(Observable):
     def show(self):
         """ Display the image data.
         """
+        from pysap.plotting import plot_data
         plot_data(self.data, scroll_axis=self._scroll_axis)
 
     def modified(self):
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Module that defines how the decomposition bands are stored in a single
+contiguous buffer.
+"""
+
+# Third party import
+import numpy
+
+
+class BandsLayout(object):
+    """ Offsets/shapes table describing a set of decomposition bands stored
+    one after the other in a flat buffer.
+
+    The buffer may have leading batch dimensions, the bands being always
+    stored along the last axis.
+    """
+    def __init__(self, shapes, nb_band_per_scale):
+        """ Initialize the BandsLayout class.
+
+        Parameters
+        ----------
+        shapes: list of uplet
+            the shape of each band.
+        nb_band_per_scale: list or ndarray of int
+            the number of band per scale.
+        """
+        self.shapes = [tuple(int(dim) for dim in shape) for shape in shapes]
+        self.nb_band_per_scale = [
+            int(nb_bands) for nb_bands in numpy.ravel(nb_band_per_scale)]
+        if len(self.shapes) != sum(self.nb_band_per_scale):
+            raise ValueError("The bands shapes do not correspond to the "
+                             "number of band per scale.")
+        self.sizes = numpy.array(
+            [int(numpy.prod(shape)) for shape in self.shapes], dtype=int)
+        self.offsets = numpy.zeros((len(self.shapes) + 1, ), dtype=int)
+        self.offsets[1:] = self.sizes.cumsum()
+        self.scales_offsets = numpy.zeros(
+            (len(self.nb_band_per_scale) + 1, ), dtype=int)
+        self.scales_offsets[1:] = numpy.cumsum(self.nb_band_per_scale)
+        self.size = int(self.offsets[-1])
+
+    @classmethod
+    def from_bands(cls, bands, nb_band_per_scale, batch_ndim=0):
+        """ Create the layout describing a list of bands.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands.
+        nb_band_per_scale: list or ndarray of int
+            the number of band per scale.
+        batch_ndim: int, default 0
+            the number of leading batch dimensions of each band.
+
+        Returns
+        -------
+        layout: BandsLayout
+            the bands layout.
+        """
+        return cls([band.shape[batch_ndim:] for band in bands],
+                   nb_band_per_scale)
+
+    def __eq__(self, other):
+        """ Two layouts are equal if they describe the same bands.
+        """
+        if not isinstance(other, BandsLayout):
+            return NotImplemented
+        return (self.shapes == other.shapes and
+                self.nb_band_per_scale == other.nb_band_per_scale)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __len__(self):
+        """ The number of bands.
+        """
+        return len(self.shapes)
+
+    def index(self, scale, band):
+        """ Get the linear index of a band.
+
+        Parameters
+        ----------
+        scale: int
+            index of the scale.
+        band: int
+            index of the band.
+
+        Returns
+        -------
+        index: int
+            the linear index of the band.
+        """
+        return int(self.scales_offsets[scale]) + band
+
+    def matches(self, bands, batch_ndim=0):
+        """ Check if a list of bands is described by this layout.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands.
+        batch_ndim: int, default 0
+            the number of leading batch dimensions of each band.
+
+        Returns
+        -------
+        matches: bool
+            True if the bands are described by this layout.
+        """
+        if len(bands) != len(self.shapes):
+            return False
+        for band, shape in zip(bands, self.shapes):
+            if tuple(band.shape[batch_ndim:]) != shape:
+                return False
+        return True
+
+    def allocate(self, dtype, batch_shape=()):
+        """ Allocate a flat buffer following this layout.
+
+        Parameters
+        ----------
+        dtype: numpy.dtype
+            the buffer data type.
+        batch_shape: uplet, default ()
+            the leading batch dimensions.
+
+        Returns
+        -------
+        buffer: ndarray (..., size)
+            the allocated, not initialized, buffer.
+        """
+        return numpy.empty(tuple(batch_shape) + (self.size, ), dtype=dtype)
+
+    def views(self, buffer):
+        """ Get the bands as views of a flat buffer.
+
+        Parameters
+        ----------
+        buffer: ndarray (..., size)
+            a flat buffer following this layout.
+
+        Returns
+        -------
+        bands: list of ndarray
+            the bands, as views of the input buffer.
+        """
+        if buffer.shape[-1] != self.size:
+            raise ValueError("The buffer does not correspond to the bands "
+                             "layout.")
+        batch_shape = buffer.shape[:-1]
+        return [
+            buffer[..., start: stop].reshape(batch_shape + shape)
+            for start, stop, shape in zip(
+                self.offsets[:-1], self.offsets[1:], self.shapes)]
+
+    def pack(self, bands, out=None, dtype=None, batch_ndim=0):
+        """ Copy a list of bands in a flat buffer.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands.
+        out: ndarray (..., size), default None
+            the destination buffer, if not set a new buffer is allocated.
+        dtype: numpy.dtype, default None
+            the type of the allocated buffer, if not set the bands common
+            type is used.
+        batch_ndim: int, default 0
+            the number of leading batch dimensions of each band.
+
+        Returns
+        -------
+        buffer: ndarray (..., size)
+            the flat buffer filled with the bands.
+        """
+        if not self.matches(bands, batch_ndim=batch_ndim):
+            raise ValueError("The bands do not correspond to the bands "
+                             "layout.")
+        if out is None:
+            if dtype is None:
+                dtype = numpy.result_type(*bands)
+            batch_shape = bands[0].shape[:batch_ndim] if len(bands) else ()
+            out = self.allocate(dtype, batch_shape=batch_shape)
+        for view, band in zip(self.views(out), bands):
+            view[...] = band
+        return out
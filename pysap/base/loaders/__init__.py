@@ -10,6 +10,8 @@
 """
 This module defines common loaders to deal with astronomical and
 neuroimaging datasets.
+
+The file format libraries are only imported when loading or saving a file.
 """
 
 from .nifti import NIFTI
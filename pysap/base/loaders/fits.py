@@ -8,7 +8,6 @@
 ##########################################################################
 
 # System import
-import astropy.io.fits as pyfits
 import numpy
 
 # Package import
@@ -35,6 +34,7 @@ class FITS(LoaderBase):
         image: Image
             the loaded image.
         """
+        import astropy.io.fits as pyfits
         hdulist = pyfits.open(path)
         if len(hdulist) != 1:
             raise Exception("Only one HDU object supported yet. Can't "
@@ -60,6 +60,7 @@ class FITS(LoaderBase):
             If True, and if filename already exists, it will overwrite the
             file.
         """
+        import astropy.io.fits as pyfits
         header = None
         if len(image.metadata) != 0:
             header = pyfits.Header(image.metadata.items())
@@ -12,7 +12,6 @@ from .loader_base import LoaderBase
 from pysap.base.image import Image
 
 # Third party import
-from scipy.io import loadmat, savemat
 import numpy
 
 
@@ -38,6 +37,7 @@ class MAT(LoaderBase):
         image: Image
             the loaded image.
         """
+        from scipy.io import loadmat
         data = loadmat(path)
         _array = data[image_field]
         _meta = {"path": path}
@@ -61,6 +61,7 @@ class MAT(LoaderBase):
         image_field: str, default 'metadata'
             the name of the data field that contains the image metadata.
         """
+        from scipy.io import savemat
         data = {
             image_field: image.data,
             meta_field: image.metadata}
@@ -8,7 +8,6 @@
 ##########################################################################
 
 # System import
-import nibabel
 import numpy
 
 # Package import
@@ -34,6 +33,7 @@ class NIFTI(LoaderBase):
         image: Image
             the loaded image.
         """
+        import nibabel
         _image = nibabel.load(path)
         return Image(spacing=_image.header.get_zooms(),
                      data_type="scalar",
@@ -50,6 +50,7 @@ class NIFTI(LoaderBase):
         outpath: str
             the path where the the image will be saved.
         """
+        import nibabel
         diag = (1. / image.spacing).tolist() + [1]
         _image = nibabel.Nifti1Image(image.data, numpy.diag(diag))
         nibabel.save(_image, outpath)
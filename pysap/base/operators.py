@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Linear operator view of the transformations working on flat coefficients
+vectors.
+"""
+
+# System import
+import copy
+
+# Package import
+from .workspace import TransformWorkspace
+
+# Third party import
+import numpy
+
+
+class WaveletOperator(object):
+    """ Linear operator wrapping a transformation: 'op' maps an image to
+    the flat vector of its decomposition coefficients, and 'adj_op' maps
+    such a vector back to an image.
+
+    The operator works on a private copy of the transformation, whose
+    bands layout is computed once at creation, so that the state of the
+    wrapped transformation is left untouched. By default the returned
+    arrays are preallocated and overwritten by the next calls: copy them
+    to keep them.
+    """
+    def __init__(self, transform, shape, reuse_outputs=True):
+        """ Initialize the WaveletOperator class.
+
+        Parameters
+        ----------
+        transform: WaveletTransformBase
+            the wrapped transformation.
+        shape: uplet
+            the shape of the images.
+        reuse_outputs: bool, default True
+            if set, return preallocated arrays, otherwise return new arrays.
+        """
+        self.transform = _copy_transform(transform)
+        self.shape = tuple(shape)
+        self.reuse_outputs = reuse_outputs
+        self._workspace = TransformWorkspace()
+
+        # Compute the bands layout
+        self.transform.data = numpy.zeros(self.shape)
+        self.transform.analysis()
+        self.layout = self.transform._analysis_layout
+        self.size = self.layout.size
+        self._coeffs_dtype = self.transform.analysis_data[0].dtype
+
+    def _get_output(self, name, shape, dtype, out):
+        """ Get an output array.
+        """
+        if out is not None:
+            return out
+        if self.reuse_outputs:
+            return self._workspace.get(name, shape, dtype)
+        return numpy.empty(shape, dtype=dtype)
+
+    def op(self, data, out=None):
+        """ Decompose an image.
+
+        Parameters
+        ----------
+        data: nd-array
+            the image.
+        out: nd-array (size, ), default None
+            if set, the coefficients are written in this array.
+
+        Returns
+        -------
+        coeffs: nd-array (size, )
+            the flat decomposition coefficients.
+        """
+        data = numpy.asarray(data)
+        out = self._get_output(
+            "coeffs", (self.size, ),
+            numpy.result_type(self._coeffs_dtype, data.dtype), out)
+        self.transform.data = data
+        self.transform.analysis(coeffs_out=out)
+        return out
+
+    def adj_op(self, coeffs, out=None):
+        """ Reconstruct an image.
+
+        Parameters
+        ----------
+        coeffs: nd-array (size, )
+            the flat decomposition coefficients.
+        out: nd-array, default None
+            if set, the image is written in this array.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed image.
+        """
+        coeffs = numpy.asarray(coeffs)
+        out = self._get_output(
+            "data", self.shape,
+            numpy.result_type(self._coeffs_dtype, coeffs.dtype), out)
+        buffer = self._workspace.get(
+            "adj_coeffs", (self.size, ),
+            numpy.result_type(self._coeffs_dtype, coeffs.dtype))
+        buffer[...] = coeffs
+        self.transform.analysis_buffer = buffer
+        return self.transform.synthesis(out=out).data
+
+
+def _copy_transform(transform):
+    """ Copy a transformation without its data and coefficients arrays.
+
+    Parameters
+    ----------
+    transform: WaveletTransformBase
+        the transformation.
+
+    Returns
+    -------
+    transform_copy: WaveletTransformBase
+        the transformation copy, with its own backend.
+    """
+    state = transform.__getstate__()
+    for name in ("_data", "_analysis_data", "_analysis_buffer",
+                 "_synthesis_reference"):
+        state[name] = None
+    state["_dirty_bands"] = {}
+    state = copy.deepcopy(state)
+    transform_copy = transform.__class__.__new__(transform.__class__)
+    transform_copy.__setstate__(state)
+    return transform_copy
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Process-wide cache of the prepared transformation plans: backend objects,
+bands tables and bands layouts.
+"""
+
+# System import
+import collections
+import threading
+
+
+class TransformPlan(object):
+    """ Data structure holding everything that can be shared by the
+    transformations with the same configuration.
+    """
+    def __init__(self, backend=None, parameters=None, nbytes=0):
+        """ Initialize the TransformPlan class.
+
+        Parameters
+        ----------
+        backend: object, default None
+            the prepared backend transformation object.
+        parameters: tuple, default None
+            the transformation bands tables.
+        nbytes: int, default 0
+            the estimated memory used by the plan.
+        """
+        self.backend = backend
+        self.parameters = parameters
+        self.layout = None
+        self.nbytes = nbytes
+
+
+class PlanCache(object):
+    """ A thread-safe LRU cache of transformation plans with a memory cap.
+    """
+    def __init__(self, max_entries=64, max_bytes=512 * 1024 ** 2):
+        """ Initialize the PlanCache class.
+
+        Parameters
+        ----------
+        max_entries: int, default 64
+            the maximum number of cached plans, 0 disables the cache.
+        max_bytes: int, default 512 MB
+            the maximum estimated memory used by the cached plans.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._plans = collections.OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def __contains__(self, key):
+        return key in self._plans
+
+    def get(self, key, factory):
+        """ Get a plan from the cache, creating it if necessary.
+
+        Parameters
+        ----------
+        key: hashable
+            the plan configuration.
+        factory: callable
+            a function without parameter returning a new TransformPlan.
+
+        Returns
+        -------
+        plan: TransformPlan
+            the requested plan.
+        """
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return self._plans[key]
+            self.misses += 1
+
+        # Create the plan outside the lock: plan creation may be slow
+        plan = factory()
+        with self._lock:
+            if key in self._plans:
+                return self._plans[key]
+            if self.max_entries > 0 and plan.nbytes <= self.max_bytes:
+                self._plans[key] = plan
+                self.nbytes += plan.nbytes
+                self._evict()
+        return plan
+
+    def set_limits(self, max_entries=None, max_bytes=None):
+        """ Update the cache limits.
+
+        Parameters
+        ----------
+        max_entries: int, default None
+            the maximum number of cached plans, 0 disables the cache.
+        max_bytes: int, default None
+            the maximum estimated memory used by the cached plans.
+        """
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """ Remove all the cached plans.
+        """
+        with self._lock:
+            self._plans.clear()
+            self.nbytes = 0
+
+    def _evict(self):
+        """ Remove the least recently used plans until the cache limits are
+        satisfied.
+        """
+        while self._plans and (len(self._plans) > self.max_entries or
+                               self.nbytes > self.max_bytes):
+            _, plan = self._plans.popitem(last=False)
+            self.nbytes -= plan.nbytes
+
+
+# Global parameters
+# > the process-wide plan cache
+PLAN_CACHE = PlanCache()
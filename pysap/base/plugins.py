@@ -7,76 +7,120 @@
 # for details.
 ##########################################################################
 
+"""
+Import hook mounting the external plugins on the 'pysap.plugins' module.
+"""
+
 # System import
-import sys
-import re
 import os
-import imp
+import sys
+import threading
+import importlib.abc
+import importlib.util
+import importlib.machinery
+
 
+class PluginsFinder(importlib.abc.MetaPathFinder):
+    """ A finder that imports the plugins mounted on the pysap plugins
+    module: 'pysap.plugins.<modname>' is the module '<modname>' found on
+    'sys.path', its sub modules being found in its package directory.
 
-class PluginsMetaImportHook(object):
-    """ A class that import a module like normal except for the plugins that
-    monted on the pysap plugins module. The return value from the hack call
-    is put into sys.modules.
+    Only the 'pysap.plugins.*' names are handled, the other imports being
+    left to the next finders. The resolved plugins locations are cached
+    until 'importlib.invalidate_caches' is called.
     """
-    def __init__(self):
-        self.module = None
-
-    def find_module(self, name, path=None):
-        """ This method is called by Python if this class is on sys.path.
-        'name' is the fully-qualified name of the module to look for, and
-        'path' is either __path__ (for submodules and subpackages) or None (for
-        a top-level module/package).
-
-        Note that this method will be called every time an import statement
-        is detected (or __import__ is called), before Python's built-in
-        package/module-finding code kicks in.
+    prefix = "pysap.plugins."
+
+    def __init__(self, lazy=False):
+        """ Initialize the PluginsFinder class.
+
+        Parameters
+        ----------
+        lazy: bool, default False
+            if set, the plugins modules are only executed on first
+            attribute access.
         """
-        # Use this loader only on registered modules
-        match = re.match("pysap\.plugins\.(.*)", name)
-        if match is None:
-            return None
-        name = match.groups()[0]
-        if (len(name.split(".")) == 1):
-            path = None
-
-        # Get parent module and associated sub module names
-        self.sub_name = name.split(".")[-1]
-        self.mod_name = name.rpartition(".")[0]
-
-        # Find the sub module and build the module path
-        # TODO: use importlib.util.find_spec for Python >= 3.5 only
-        try:
-            self.file, self.filename, self.stuff = imp.find_module(
-                self.sub_name, path)
-            self.path = [self.filename]
-        except ImportError:
+        self.lazy = lazy
+        self._locations = {}
+        self._lock = threading.Lock()
+
+    def find_spec(self, fullname, path=None, target=None):
+        """ Find the spec of a plugin module.
+
+        Parameters
+        ----------
+        fullname: str
+            the fully-qualified name of the module to look for.
+        path: list of str, default None
+            the parent package '__path__' for a sub module.
+        target: module, default None
+            the module being reloaded.
+
+        Returns
+        -------
+        spec: ModuleSpec or None
+            the plugin module spec, None if the name is not a plugin or is
+            not found.
+        """
+        # Use this finder only on the plugins
+        if not fullname.startswith(self.prefix):
             return None
 
-        # Return The loader, here the object itself
-        return self
+        # Get the plugin location
+        with self._lock:
+            location = self._locations.get(fullname)
+        if location is None:
+            name = fullname[len(self.prefix):]
+            if "." not in name:
+                path = None
+            spec = importlib.machinery.PathFinder.find_spec(
+                name.rpartition(".")[2], path)
+            if spec is None or spec.origin is None or not spec.has_location:
+                return None
+            location = (spec.origin, spec.submodule_search_locations)
+            with self._lock:
+                self._locations[fullname] = location
+
+        # Build the spec of the plugin module under its pysap name
+        origin, search_locations = location
+        spec = importlib.util.spec_from_file_location(
+            fullname, origin, submodule_search_locations=(
+                None if search_locations is None else list(search_locations)))
+        if self.lazy and spec is not None:
+            spec.loader = importlib.util.LazyLoader(spec.loader)
+        return spec
 
-    def load_module(self, name):
-        """ This method is called by Python if the class
-        'find_module' does not return None. 'name' is the fully-qualified name
-        of the module/package that was requested.
+    def invalidate_caches(self):
+        """ Clear the resolved plugins locations.
         """
-        # Load the module
-        module = imp.load_module(name, self.file, self.filename, self.stuff)
-        if self.file:
-            self.file.close()
+        with self._lock:
+            self._locations.clear()
 
-        # Update the module required information
-        module.__path__ = self.path
-        module.__loader__ = self
-        module.__package__ = name
-        module.__name__ = name
-        if self.stuff[0] == ".py":
-            module.__file__ = self.path[0]
-        else:
-            module.__file__ = os.path.join(self.path[0], "__init__.py")
 
-        return module
+def install_plugins_finder(lazy=None):
+    """ Install the plugins finder in front of 'sys.meta_path', once.
+
+    Parameters
+    ----------
+    lazy: bool, default None
+        if set, the plugins modules are loaded lazily. By default, use the
+        'PYSAP_LAZY_PLUGINS' environment variable.
+
+    Returns
+    -------
+    finder: PluginsFinder
+        the installed finder.
+    """
+    if lazy is None:
+        lazy = os.environ.get("PYSAP_LAZY_PLUGINS", "0").lower() not in (
+            "", "0", "false")
+    for finder in sys.meta_path:
+        if isinstance(finder, PluginsFinder):
+            finder.lazy = lazy
+            return finder
+    finder = PluginsFinder(lazy=lazy)
+    sys.meta_path.insert(0, finder)
+    return finder
 
 
-sys.meta_path.insert(0, PluginsMetaImportHook())
+PLUGINS_FINDER = install_plugins_finder()
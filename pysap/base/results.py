@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Opt-in on-disk cache of the Sparse2d commands and bindings results.
+
+The results are addressed by a hash of the inputs content and of the
+command line or bindings parameters. The entries are written atomically
+and the least recently used ones are removed when the cache exceeds its
+size: the size is tracked by a running total, the cache directory being
+only scanned on the first store and when the total exceeds the maximum
+size. The cache is enabled with 'set_result_cache' or with the
+'PYSAP_RESULT_CACHE' (directory) and 'PYSAP_RESULT_CACHE_SIZE' (bytes)
+environment variables.
+"""
+
+# System import
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+
+# Third party import
+import numpy
+
+
+# Global parameters
+# > the default maximum cache size in bytes
+DEFAULT_MAX_BYTES = 1024 ** 3
+# > the process result cache, False if not yet configured
+_RESULT_CACHE = False
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def digest_file(path):
+    """ Compute the digest of a file content.
+
+    Parameters
+    ----------
+    path: str
+        the file path.
+
+    Returns
+    -------
+    digest: str
+        the file content digest.
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as open_file:
+        for chunk in iter(lambda: open_file.read(1024 ** 2), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def digest_array(array):
+    """ Compute the digest of an array content.
+
+    Parameters
+    ----------
+    array: nd-array
+        the array.
+
+    Returns
+    -------
+    digest: str
+        the array dtype, shape and values digest.
+    """
+    array = numpy.ascontiguousarray(array)
+    hasher = hashlib.sha256()
+    hasher.update("{0}{1}".format(array.dtype.str, array.shape).encode())
+    hasher.update(array.view(numpy.uint8).ravel())
+    return hasher.hexdigest()
+
+
+class ResultCache(object):
+    """ A content-addressed on-disk cache with a LRU eviction.
+
+    Each entry is a directory named by its key, holding the result files
+    named by their index. The entries are first written in a temporary
+    directory, then renamed, so that a partially written entry is never
+    visible.
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """ Initialize the ResultCache class.
+
+        Parameters
+        ----------
+        directory: str
+            the cache directory, created if needed.
+        max_bytes: int, default 1 GB
+            the maximum cache size.
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._nbytes = None
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """ Compute an entry key.
+
+        Parameters
+        ----------
+        parts: JSON serializable objects
+            the entry description.
+
+        Returns
+        -------
+        key: str
+            the entry key.
+        """
+        return hashlib.sha256(json.dumps(
+            parts, sort_keys=True, default=repr).encode()).hexdigest()
+
+    def fetch(self, key, paths):
+        """ Copy the files of an entry.
+
+        Parameters
+        ----------
+        key: str
+            the entry key.
+        paths: list of str
+            the destination of the entry files.
+
+        Returns
+        -------
+        found: bool
+            True if the entry has been found and copied.
+        """
+        entry = os.path.join(self.directory, key)
+        tmp_path = None
+        try:
+            for index, path in enumerate(paths):
+                tmp_path = "{0}.{1}.tmp".format(path, uuid.uuid4().hex)
+                shutil.copyfile(os.path.join(entry, str(index)), tmp_path)
+                os.replace(tmp_path, path)
+            os.utime(entry)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self._count(False)
+            return False
+        self._count(True)
+        return True
+
+    def store(self, key, paths):
+        """ Store files in an entry.
+
+        Parameters
+        ----------
+        key: str
+            the entry key.
+        paths: list of str
+            the files to be stored.
+        """
+        tmp_entry = os.path.join(self.directory, ".{0}".format(
+            uuid.uuid4().hex))
+        os.mkdir(tmp_entry)
+        nbytes = 0
+        try:
+            for index, path in enumerate(paths):
+                shutil.copyfile(path, os.path.join(tmp_entry, str(index)))
+                nbytes += os.path.getsize(path)
+            os.replace(tmp_entry, os.path.join(self.directory, key))
+        except OSError:
+            # The entry has been stored concurrently or could not be
+            # written: the cache is a best effort
+            nbytes = 0
+        finally:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        with self._lock:
+            if self._nbytes is not None:
+                self._nbytes += nbytes
+            is_full = (self._nbytes is None or
+                       self._nbytes > self.max_bytes)
+        if is_full:
+            self.evict()
+
+    def fetch_arrays(self, key, nb_arrays):
+        """ Load the arrays of an entry.
+
+        Parameters
+        ----------
+        key: str
+            the entry key.
+        nb_arrays: int
+            the number of arrays of the entry.
+
+        Returns
+        -------
+        arrays: list of nd-array or None
+            the entry arrays, None if the entry has not been found.
+        """
+        entry = os.path.join(self.directory, key)
+        try:
+            arrays = [numpy.load(os.path.join(entry, str(index)))
+                      for index in range(nb_arrays)]
+            os.utime(entry)
+        except (OSError, ValueError):
+            self._count(False)
+            return None
+        self._count(True)
+        return arrays
+
+    def store_arrays(self, key, arrays):
+        """ Store arrays in an entry.
+
+        Parameters
+        ----------
+        key: str
+            the entry key.
+        arrays: list of nd-array
+            the arrays to be stored.
+        """
+        tmp_dir = os.path.join(self.directory, ".{0}".format(
+            uuid.uuid4().hex))
+        os.mkdir(tmp_dir)
+        try:
+            paths = []
+            for index, array in enumerate(arrays):
+                path = os.path.join(tmp_dir, "{0}.npy".format(index))
+                numpy.save(path, array)
+                paths.append(path)
+            self.store(key, paths)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache size is
+        below its maximum.
+
+        The cache directory is scanned, so that the running size total
+        also accounts for the entries stored by the other processes.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                size = sum(item.stat().st_size
+                           for item in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+            except OSError:
+                continue
+            total += size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        with self._lock:
+            self._nbytes = total
+
+    def clear(self):
+        """ Remove all the entries.
+        """
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+        with self._lock:
+            self._nbytes = 0
+
+    def _count(self, hit):
+        """ Update the cache statistics.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+def set_result_cache(directory, max_bytes=DEFAULT_MAX_BYTES):
+    """ Enable or disable the result cache.
+
+    Parameters
+    ----------
+    directory: str or None
+        the cache directory, None to disable the cache.
+    max_bytes: int, default 1 GB
+        the maximum cache size.
+
+    Returns
+    -------
+    cache: ResultCache or None
+        the result cache.
+    """
+    global _RESULT_CACHE
+    with _RESULT_CACHE_LOCK:
+        if directory is None:
+            _RESULT_CACHE = None
+        else:
+            _RESULT_CACHE = ResultCache(directory, max_bytes=max_bytes)
+        return _RESULT_CACHE
+
+
+def get_result_cache():
+    """ Get the result cache.
+
+    Returns
+    -------
+    cache: ResultCache or None
+        the result cache, None if not enabled. On first use, the cache is
+        configured from the 'PYSAP_RESULT_CACHE' and
+        'PYSAP_RESULT_CACHE_SIZE' environment variables.
+    """
+    if _RESULT_CACHE is False:
+        set_result_cache(
+            os.environ.get("PYSAP_RESULT_CACHE") or None,
+            max_bytes=int(os.environ.get(
+                "PYSAP_RESULT_CACHE_SIZE", DEFAULT_MAX_BYTES)))
+    return _RESULT_CACHE
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Scratch space for the files exchanged with the ISAP command lines.
+
+The files are written in a RAM-backed location when available, and each
+process reuses a single ISAP compliant directory.
+
+The decompositions computed with the ISAP command lines are kept so that
+they can be reused by the synthesis. Each kept '.mr' file is the size of
+the decomposition, e.g. 64 MB for a 4 scales undecimated decomposition of a
+2048x2048 image, so that the 16 files kept by default can hold about 1 GB
+of RAM in '/dev/shm'. This limit is set with the 'PYSAP_SCRATCH_MAX_FILES'
+environment variable, or with the 'max_files' attribute of the process
+scratch space (see 'get_scratch_space').
+"""
+
+# System import
+import os
+import uuid
+import atexit
+import shutil
+import tempfile
+import threading
+import contextlib
+import collections
+
+
+# Global parameters
+# > the candidate RAM-backed locations
+RAM_LOCATIONS = ["/dev/shm"]
+# > the default maximum number of kept files
+MAX_FILES = 16
+# > the process scratch space
+_SCRATCH_SPACE = None
+_SCRATCH_LOCK = threading.Lock()
+
+
+def is_isap_compliant(path):
+    """ Check that a path can be used with ISAP.
+
+    If 'jpg' or 'pgm' (with any case for each letter) are in the pathname,
+    it will corrupt the format detection in ISAP.
+
+    Parameters
+    ----------
+    path: str
+        the path to be checked.
+
+    Returns
+    -------
+    compliant: bool
+        True if the path can be used with ISAP.
+    """
+    path = path.lower()
+    return "pgm" not in path and "jpg" not in path
+
+
+def get_scratch_root():
+    """ Get the location of the scratch directories.
+
+    Returns
+    -------
+    root: str
+        the 'PYSAP_SCRATCH_DIR' environment variable if set, otherwise the
+        first writable ISAP compliant RAM-backed location, otherwise the
+        default temporary directory.
+    """
+    root = os.environ.get("PYSAP_SCRATCH_DIR")
+    if root:
+        return root
+    for location in RAM_LOCATIONS:
+        if (os.path.isdir(location) and os.access(location, os.W_OK) and
+                is_isap_compliant(location)):
+            return location
+    return tempfile.gettempdir()
+
+
+def mkdtemp_isap(root=None):
+    """ Create an ISAP compliant temporary directory.
+
+    The directory name is built from hexadecimal digits, which can not
+    form 'jpg' or 'pgm', so that only the parent directory is checked.
+
+    Parameters
+    ----------
+    root: str, default None
+        the parent directory, by default the scratch root. If not ISAP
+        compliant, the default temporary directory is used instead.
+
+    Returns
+    -------
+    tmpdir: str
+        the created directory.
+    """
+    root = root or get_scratch_root()
+    if not is_isap_compliant(root):
+        root = tempfile.gettempdir()
+        if not is_isap_compliant(root):
+            raise ValueError(
+                "No ISAP compliant location available: '{0}' contains "
+                "'jpg' or 'pgm', set the 'PYSAP_SCRATCH_DIR' environment "
+                "variable.".format(root))
+    tmpdir = os.path.join(os.path.abspath(root), "pysap_" + uuid.uuid4().hex)
+    os.mkdir(tmpdir, 0o700)
+    return tmpdir
+
+
+class ScratchSpace(object):
+    """ A reusable ISAP compliant directory.
+
+    The temporary files are removed after use, whereas the kept files, as
+    the decompositions that can be reused by a synthesis, are removed
+    when more than 'max_files' are kept.
+    """
+    def __init__(self, root=None, max_files=None):
+        """ Initialize the ScratchSpace class.
+
+        Parameters
+        ----------
+        root: str, default None
+            the parent directory, by default the scratch root.
+        max_files: int, default None
+            the maximum number of kept files, by default the
+            'PYSAP_SCRATCH_MAX_FILES' environment variable if set,
+            otherwise 'MAX_FILES'. Set 0 to remove the decompositions
+            as soon as they are loaded.
+        """
+        if max_files is None:
+            max_files = int(os.environ.get(
+                "PYSAP_SCRATCH_MAX_FILES", MAX_FILES))
+        if max_files < 0:
+            raise ValueError("The maximum number of kept files must be "
+                             "positive.")
+        self.path = mkdtemp_isap(root)
+        self.max_files = max_files
+        self.pid = os.getpid()
+        self._kept = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_path(self, extension):
+        """ Get a new file path in the scratch directory.
+
+        Parameters
+        ----------
+        extension: str
+            the file extension.
+
+        Returns
+        -------
+        path: str
+            the file path.
+        """
+        return os.path.join(self.path, uuid.uuid4().hex + extension)
+
+    @contextlib.contextmanager
+    def temporary(self, extension):
+        """ Context manager giving a temporary file path, the file being
+        removed on exit.
+
+        Parameters
+        ----------
+        extension: str
+            the file extension.
+        """
+        path = self.new_path(extension)
+        try:
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def keep(self, path):
+        """ Keep a file, the oldest kept files being removed.
+
+        Parameters
+        ----------
+        path: str
+            the file path.
+        """
+        with self._lock:
+            self._kept.pop(path, None)
+            self._kept[path] = None
+            removed = []
+            while len(self._kept) > self.max_files:
+                removed.append(self._kept.popitem(last=False)[0])
+        for path in removed:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cleanup(self):
+        """ Remove the scratch directory.
+        """
+        if os.getpid() == self.pid:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def get_scratch_space():
+    """ Get the scratch space of the current process.
+
+    Returns
+    -------
+    scratch: ScratchSpace
+        the process scratch space, created on first use and removed at
+        exit.
+    """
+    global _SCRATCH_SPACE
+    with _SCRATCH_LOCK:
+        if (_SCRATCH_SPACE is None or _SCRATCH_SPACE.pid != os.getpid() or
+                not os.path.isdir(_SCRATCH_SPACE.path)):
+            _SCRATCH_SPACE = ScratchSpace()
+            atexit.register(_SCRATCH_SPACE.cleanup)
+        return _SCRATCH_SPACE
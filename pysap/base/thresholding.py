@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Vectorized thresholding operators working in place on real or complex
+decomposition coefficients.
+"""
+
+# System import
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Third party import
+import numpy
+
+
+def soft_threshold(data, threshold):
+    """ Soft thresholding, in place.
+
+    Parameters
+    ----------
+    data: ndarray
+        the real or complex coefficients.
+    threshold: float or ndarray
+        the threshold, possibly one per coefficient.
+
+    Returns
+    -------
+    data: ndarray
+        the thresholded coefficients.
+    """
+    factor = numpy.abs(data)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        numpy.divide(threshold, factor, out=factor)
+    numpy.subtract(1, factor, out=factor)
+    numpy.fmax(factor, 0, out=factor)
+    numpy.multiply(data, factor, out=data)
+    return data
+
+
+def hard_threshold(data, threshold):
+    """ Hard thresholding, in place.
+
+    Parameters
+    ----------
+    data: ndarray
+        the real or complex coefficients.
+    threshold: float or ndarray
+        the threshold, possibly one per coefficient.
+
+    Returns
+    -------
+    data: ndarray
+        the thresholded coefficients.
+    """
+    numpy.multiply(data, numpy.abs(data) > threshold, out=data)
+    return data
+
+
+def firm_threshold(data, threshold, upper_threshold=None):
+    """ Firm thresholding, in place.
+
+    The coefficients below 'threshold' are set to zero, the coefficients
+    above 'upper_threshold' are kept, and the coefficients in between are
+    linearly shrunk.
+
+    Parameters
+    ----------
+    data: ndarray
+        the real or complex coefficients.
+    threshold: float or ndarray
+        the lower threshold, possibly one per coefficient.
+    upper_threshold: float or ndarray, default None
+        the upper threshold, by default twice the lower threshold.
+
+    Returns
+    -------
+    data: ndarray
+        the thresholded coefficients.
+    """
+    threshold = numpy.asarray(threshold)
+    if upper_threshold is None:
+        upper_threshold = 2 * threshold
+    upper_threshold = numpy.asarray(upper_threshold)
+    if numpy.any(upper_threshold <= threshold):
+        raise ValueError("The upper threshold must be greater than the "
+                         "threshold.")
+    magnitude = numpy.abs(data)
+    factor = magnitude - threshold
+    numpy.multiply(
+        factor, upper_threshold / (upper_threshold - threshold), out=factor)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        numpy.divide(factor, magnitude, out=factor)
+    numpy.fmax(factor, 0, out=factor)
+    numpy.fmin(factor, 1, out=factor)
+    numpy.multiply(data, factor, out=data)
+    return data
+
+
+def group_threshold(bands, threshold):
+    """ Group soft thresholding, in place: the coefficients at the same
+    position in the different bands form a group, shrunk according to its
+    l2 norm.
+
+    Parameters
+    ----------
+    bands: list of ndarray
+        the real or complex bands with the same shape.
+    threshold: float or ndarray
+        the threshold, possibly one per group.
+
+    Returns
+    -------
+    bands: list of ndarray
+        the thresholded bands.
+    """
+    if len(set(band.shape for band in bands)) > 1:
+        raise ValueError("The grouped bands must have the same shape.")
+    factor = numpy.zeros(bands[0].shape, dtype=numpy.abs(bands[0]).dtype)
+    for band in bands:
+        factor += numpy.abs(band) ** 2
+    numpy.sqrt(factor, out=factor)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        numpy.divide(threshold, factor, out=factor)
+    numpy.subtract(1, factor, out=factor)
+    numpy.fmax(factor, 0, out=factor)
+    for band in bands:
+        numpy.multiply(band, factor, out=band)
+    return bands
+
+
+# Global parameters
+# > the elementwise thresholding functions
+THRESHOLDS = {
+    "soft": soft_threshold,
+    "hard": hard_threshold,
+    "firm": firm_threshold
+}
+# > the minimum number of coefficients thresholded with several threads,
+#   the smaller decompositions being faster to process serially
+MIN_THREADED_SIZE = 2 ** 16
+# > the executor shared by the threaded thresholdings, recreated after a
+#   fork
+_THRESHOLD_EXECUTOR = None
+_THRESHOLD_PID = None
+_THRESHOLD_LOCK = threading.Lock()
+
+
+def get_threshold_executor():
+    """ Get the executor used to threshold concurrently the bands.
+
+    Returns
+    -------
+    executor: ThreadPoolExecutor
+        the long-lived process executor, with one thread per CPU.
+    """
+    global _THRESHOLD_EXECUTOR, _THRESHOLD_PID
+    with _THRESHOLD_LOCK:
+        if _THRESHOLD_EXECUTOR is None or _THRESHOLD_PID != os.getpid():
+            _THRESHOLD_EXECUTOR = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                thread_name_prefix="pysap-threshold")
+            _THRESHOLD_PID = os.getpid()
+        return _THRESHOLD_EXECUTOR
+
+
+def _run_tasks(tasks):
+    """ Run serially some thresholding tasks.
+
+    Parameters
+    ----------
+    tasks: list of 2-uplet
+        the thresholding functions and their arguments.
+    """
+    for func, args in tasks:
+        func(*args)
+
+
+def threshold_bands(bands, thresholds, mode="soft", groups=None,
+                    upper_thresholds=None, nb_threads=1):
+    """ Threshold a list of bands in place.
+
+    Parameters
+    ----------
+    bands: list of ndarray
+        the real or complex bands.
+    thresholds: list of float or ndarray
+        the threshold of each band, None to leave a band untouched.
+    mode: str, default 'soft'
+        the thresholding: 'soft', 'hard', 'firm' or 'group'.
+    groups: list of list of int, default None
+        in 'group' mode, the indices of the bands of each group, the group
+        threshold being the one of its first band.
+    upper_thresholds: list of float or ndarray, default None
+        in 'firm' mode, the upper threshold of each band.
+    nb_threads: int, default 1
+        the number of threads of the shared executor used to process the
+        bands, the decompositions with less than 'MIN_THREADED_SIZE'
+        coefficients being processed serially.
+
+    Returns
+    -------
+    bands: list of ndarray
+        the thresholded bands.
+    """
+    if mode == "group":
+        if groups is None:
+            raise ValueError("Please specify the bands groups.")
+        tasks = [
+            (group_threshold, ([bands[index] for index in group],
+                               thresholds[group[0]]))
+            for group in groups if thresholds[group[0]] is not None]
+    elif mode in THRESHOLDS:
+        tasks = []
+        for index, (band, threshold) in enumerate(zip(bands, thresholds)):
+            if threshold is None:
+                continue
+            args = (band, threshold)
+            if mode == "firm" and upper_thresholds is not None:
+                args += (upper_thresholds[index], )
+            tasks.append((THRESHOLDS[mode], args))
+    else:
+        raise ValueError("Unknown thresholding '{0}', should be one of "
+                         "{1}.".format(mode, sorted(THRESHOLDS) + ["group"]))
+    size = sum(numpy.size(band) for band in bands)
+    if nb_threads > 1 and len(tasks) > 1 and size >= MIN_THREADED_SIZE:
+        executor = get_threshold_executor()
+        futures = [executor.submit(_run_tasks, tasks[idx::nb_threads])
+                   for idx in range(min(nb_threads, len(tasks)))]
+        for future in futures:
+            future.result()
+    else:
+        _run_tasks(tasks)
+    return bands
@@ -15,19 +15,55 @@ Wavelet transform base module.
 from pprint import pprint
 import uuid
 import os
+import hashlib
 import warnings
 
 # Package import
 import pysap
 from .utils import with_metaclass
-from pysap.plotting import plot_transform
+from .layout import BandsLayout
+from .workspace import TransformWorkspace
+from .operators import WaveletOperator
+from .thresholding import threshold_bands
 
 # Third party import
 import numpy
 
 
+class LazyRegistryEntry(object):
+    """ Registry placeholder for a class that is only created on first
+    use.
+    """
+    def __init__(self, family, factory):
+        """ Initialize the LazyRegistryEntry class.
+
+        Parameters
+        ----------
+        family: str
+            the family of the registered class.
+        factory: callable
+            the function creating and returning the registered class.
+        """
+        self.__family__ = family
+        self.factory = factory
+
+    def resolve(self):
+        """ Create the registered class.
+
+        Returns
+        -------
+        cls: type
+            the registered class, that replaces this placeholder in the
+            registry.
+        """
+        return self.factory()
+
+
 class MetaRegister(type):
     """ Simple Python metaclass registry pattern.
+
+    The registry may hold 'LazyRegistryEntry' placeholders, replaced by the
+    classes when they are created.
     """
     REGISTRY = {}
 
@@ -44,7 +80,8 @@ class MetaRegister(type):
             the attributes defined for the class.
         """
         new_cls = type.__new__(cls, name, bases, attrs)
-        if name in cls.REGISTRY:
+        if (name in cls.REGISTRY and
+                not isinstance(cls.REGISTRY[name], LazyRegistryEntry)):
             raise ValueError(
                 "'{0}' name already used in registry.".format(name))
         if name not in ("WaveletTransformBase", "ISAPWaveletTransformBase",
@@ -59,7 +96,7 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
     Available transforms are define in 'pysap.transform'.
     """
     def __init__(self, nb_scale, verbose=0, dim=2, use_wrapping=False,
-                 **kwargs):
+                 contiguous=False, workspace=False, **kwargs):
         """ Initialize the WaveletTransformBase class.
 
         Parameters
@@ -76,6 +113,15 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         use_wrapping: bool, default False
             if set, in the case of ISAP, use the command lines rather than the
             bindings.
+        contiguous: bool, default False
+            if set, store all the decomposition coefficients in a single
+            contiguous buffer, the bands being views of this buffer.
+        workspace: bool or TransformWorkspace, default False
+            if set, reuse the same arrays between the analysis/synthesis
+            calls: the returned coefficients and images are overwritten by
+            the next calls. The NumPy engines write their reconstruction,
+            and the 'a trous' engine its bands, directly in these arrays;
+            the other backends outputs are allocated, then copied.
         """
         # Wavelet transform parameters
         self.nb_scale = nb_scale
@@ -85,6 +131,10 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         self.is_decimated = None
         self.data_dim = dim
         self.use_wrapping = use_wrapping
+        self.contiguous = contiguous
+        if workspace is True:
+            workspace = TransformWorkspace()
+        self.workspace = workspace or None
 
         # Data that can be decalred afterward
         self._data = None
@@ -95,6 +145,12 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         self._analysis_shape = None
         self._analysis_header = None
         self._analysis_buffer_shape = None
+        self._analysis_layout = None
+        self._analysis_buffer = None
+        self._plan = None
+        self._synthesis_reference = None
+        self._synthesis_digests = None
+        self._dirty_bands = {}
         self.verbose = verbose
 
         self.kwargs = kwargs
@@ -102,16 +158,42 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         # Transformation
         self._init_transform(**self.kwargs)
 
-    def __reduce__(self):
+    def __getstate__(self):
         """ The interface to pickle dump call.
 
-        Return
-        ------
-        reduced_instance: tuple,
-            two or five items long tuple to define the init of a pickled
-            instance.
+        The backend objects are rebuilt when loading. The data and
+        coefficients arrays are kept as is, so that they are serialized as
+        out-of-band buffers with the pickle protocol 5.
+
+        Returns
+        -------
+        state: dict
+            the instance state.
+        """
+        state = self.__dict__.copy()
+        state.pop("trf", None)
+        state["_plan"] = None
+        if self.workspace is not None:
+            state["workspace"] = True
+        if self._analysis_buffer is not None:
+            state["_analysis_data"] = None
+        return state
+
+    def __setstate__(self, state):
+        """ The interface to pickle load call.
+
+        Parameters
+        ----------
+        state: dict
+            the instance state.
         """
-        return (self.__class__, (self.nb_scale, self.verbose))
+        self.__dict__.update(state)
+        if self.workspace is True:
+            self.workspace = TransformWorkspace()
+        if self._analysis_buffer is not None:
+            self._analysis_data = self._analysis_layout.views(
+                self._analysis_buffer)
+        self._init_transform(**self.kwargs)
 
     def __getitem__(self, given):
         """ Access the analysis designated scale/band coefficients.
@@ -164,6 +246,9 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
     def __setitem__(self, given, array):
         """ Set the analysis designated scale/band coefficients.
 
+        The band is copied in the decomposition coefficients and marked as
+        modified for the incremental synthesis.
+
         Parameters
         ----------
         given: tuple
@@ -184,27 +269,14 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
             raise ValueError("Please specify first the decomposition "
                              "coefficients array.")
 
-        # Handle multidim slice object
-        if isinstance(given[0], slice):
-            start = given[0].start or 0
-            stop = given[0].stop or self.nb_scale
-            step = given[0].step or 1
-            coeffs = [self.__getitem__((index, given[1]))
-                      for index in range(start, stop, step)]
-        elif isinstance(given[1], slice):
-            start = given[1].start or 0
-            stop = given[1].stop or self.nb_band_per_scale[given[0]]
-            step = given[1].step or 1
-            coeffs = [self.band_at(given[0], index)
-                      for index in range(start, stop, step)]
-        else:
-            coeffs = [self.band_at(given[0], given[1])]
-
-        # Format output
-        if len(coeffs) == 1:
-            coeffs = coeffs[0]
-
-        return coeffs
+        # Write the band
+        band_data = self.band_at(given[0], given[1])
+        array = numpy.asarray(array)
+        if array.shape != band_data.shape:
+            raise ValueError("Expect a '{0}' band, got '{1}'.".format(
+                band_data.shape, array.shape))
+        self._mark_band_dirty(self._band_index(given[0], given[1]))
+        band_data[...] = array
 
     ##########################################################################
     # Properties
@@ -220,24 +292,45 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         """
         if self.verbose > 0 and self._data is not None:
             print("[info] Replacing existing input data array.")
+        self._check_data_shape(data.shape)
+        if isinstance(data, pysap.Image):
+            self._data = data.data
+            self._image_metadata = data.metadata
+        else:
+            self._data = data
+        if self._data_shape != self._data.shape:
+            self._set_data_shape(self._data.shape)
+
+    def _check_data_shape(self, shape):
+        """ Check that a data shape is compatible with the transform.
+
+        Parameters
+        ----------
+        shape: uplet
+            the shape of one input data/signal.
+        """
         # Ensure that the shape is square except when the family is pywt
         if self.__family__ != 'pywt' and \
-                not all([e == data.shape[0] for e in data.shape]):
+                not all([e == shape[0] for e in shape]):
             raise ValueError("Expect a square shape data.")
-        if data.ndim != self.data_dim:
+        if len(shape) != self.data_dim:
             raise ValueError("This wavelet can only be applied on {0}D "
                              "square images".format(self.data_dim))
-        if self.is_decimated and not (data.shape[0] // 2**(self.nb_scale) > 0):
+        if self.is_decimated and not (shape[0] // 2**(self.nb_scale) > 0):
             raise ValueError("Can't decimate the data with the specified "
                              "number of scales.")
-        if isinstance(data, pysap.Image):
-            self._data = data.data
-            self._image_metadata = data.metadata
-        else:
-            self._data = data
-        self._data_shape = self._data.shape
-        self._iso_shape = self._data_shape[0]
 
+    def _set_data_shape(self, shape):
+        """ Store the data shape and update the transformation parameters
+        that depend on it.
+
+        Parameters
+        ----------
+        shape: uplet
+            the shape of one input data/signal.
+        """
+        self._data_shape = tuple(shape)
+        self._iso_shape = self._data_shape[0]
         if self.use_wrapping:
             self._set_transformation_parameters()
             self._compute_transformation_parameters()
@@ -263,10 +356,11 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         if self.verbose > 0 and self._analysis_data is not None:
             print("[info] Replacing existing decomposition coefficients "
                   "array.")
-        if len(analysis_data) != sum(self.nb_band_per_scale):
+        if len(analysis_data) != numpy.sum(self.nb_band_per_scale):
             raise ValueError("The wavelet coefficients do not correspond to "
                              "the wavelet transform parameters.")
-        self._analysis_data = analysis_data
+        self._reset_synthesis_reference()
+        self._store_analysis_data(analysis_data)
 
     def _get_analysis_data(self):
         """ Get the decomposition coefficients array.
@@ -278,6 +372,50 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         """
         return self._analysis_data
 
+    def _get_analysis_buffer(self):
+        """ Get the decomposition coefficients as a flat array.
+
+        In contiguous mode the returned array is the coefficients storage
+        itself, otherwise a flattened copy of the coefficients.
+
+        Returns
+        -------
+        analysis_buffer: nd-array (N, )
+            the flat decomposition coefficients array.
+        """
+        if self._analysis_data is None:
+            raise ValueError("Please specify first the decomposition "
+                             "coefficients array.")
+        if self._analysis_buffer is not None:
+            return self._analysis_buffer
+        return self._analysis_layout.pack(self._analysis_data)
+
+    def _set_analysis_buffer(self, analysis_buffer):
+        """ Set the decomposition coefficients from a flat array.
+
+        Parameters
+        ----------
+        analysis_buffer: nd-array (N, )
+            the flat decomposition coefficients array.
+        """
+        if self._analysis_layout is None:
+            raise ValueError("Please specify first the decomposition "
+                             "coefficients array.")
+        analysis_buffer = numpy.asarray(analysis_buffer)
+        self._reset_synthesis_reference()
+        if self.contiguous:
+            if (self._analysis_buffer is None or
+                    self._analysis_buffer.dtype != analysis_buffer.dtype):
+                self._analysis_buffer = self._analysis_layout.allocate(
+                    analysis_buffer.dtype)
+                self._analysis_data = self._analysis_layout.views(
+                    self._analysis_buffer)
+            self._analysis_buffer[...] = analysis_buffer
+        else:
+            self._analysis_buffer = analysis_buffer
+            self._analysis_data = self._analysis_layout.views(
+                analysis_buffer)
+
     def _set_analysis_header(self, analysis_header):
         """ Set the decomposition coefficients header.
 
@@ -311,6 +449,7 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
     data = property(_get_data, _set_data)
     analysis_data = property(_get_analysis_data, _set_analysis_data)
     analysis_header = property(_get_analysis_header, _set_analysis_header)
+    analysis_buffer = property(_get_analysis_buffer, _set_analysis_buffer)
     info = property(_get_info)
 
     ##########################################################################
@@ -349,18 +488,175 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
             bands_shapes.append(scale_shapes)
         return bands_shapes
 
+    def operator(self, shape, reuse_outputs=True):
+        """ Get the linear operator view of the transformation working on
+        flat coefficients vectors.
+
+        Parameters
+        ----------
+        shape: uplet
+            the shape of the images.
+        reuse_outputs: bool, default True
+            if set, the operator returns preallocated arrays that are
+            overwritten by the next calls.
+
+        Returns
+        -------
+        operator: WaveletOperator
+            the operator with 'op' and 'adj_op' methods.
+        """
+        return WaveletOperator(self, shape, reuse_outputs=reuse_outputs)
+
+    def mark_dirty(self, scale=None, band=None):
+        """ Declare modified decomposition coefficients for the incremental
+        synthesis.
+
+        Parameters
+        ----------
+        scale: int, default None
+            index of the scale, if not set all the bands are modified and
+            the next incremental synthesis is a full synthesis.
+        band: int, default None
+            index of the band, if not set all the bands of the scale are
+            modified.
+        """
+        if scale is None:
+            self._reset_synthesis_reference()
+            return
+        if band is None:
+            bands = range(self.nb_band_per_scale[scale])
+        else:
+            bands = [band]
+        for band in bands:
+            self._mark_band_dirty(self._band_index(scale, band))
+
+    def threshold(self, threshold, mode="soft", weights=None,
+                  keep_approximation=True, upper_threshold=None,
+                  nb_threads=1):
+        """ Threshold the decomposition coefficients in place.
+
+        Parameters
+        ----------
+        threshold: float
+            the threshold.
+        mode: str, default 'soft'
+            the thresholding: 'soft', 'hard', 'firm' or 'group'. In 'group'
+            mode the coefficients at the same position in the bands of a
+            scale are grouped, using the threshold of the first band.
+        weights: list, default None
+            the threshold weight of each scale: each item is either a
+            scalar or an array applied to all the bands of the scale, or a
+            list with one scalar or array per band.
+        keep_approximation: bool, default True
+            if set, leave the approximation bands untouched.
+        upper_threshold: float, default None
+            in 'firm' mode, the upper threshold, weighted as the threshold,
+            by default twice the threshold.
+        nb_threads: int, default 1
+            the number of threads used to process the bands.
+
+        Returns
+        -------
+        analysis_data: list of nd-array
+            the thresholded decomposition coefficients.
+        """
+        # Checks
+        if self._analysis_data is None:
+            raise ValueError("Please specify first the decomposition "
+                             "coefficients array.")
+
+        # Get the threshold of each band
+        thresholds = self._band_thresholds(threshold, weights)
+        upper_thresholds = None
+        if upper_threshold is not None:
+            upper_thresholds = self._band_thresholds(upper_threshold, weights)
+        if keep_approximation:
+            for index in self._approximation_bands():
+                thresholds[index] = None
+
+        # Group the bands of each scale
+        groups = None
+        if mode == "group":
+            groups = []
+            offsets = self._analysis_layout.scales_offsets
+            for start, stop in zip(offsets[:-1], offsets[1:]):
+                group = [index for index in range(start, stop)
+                         if thresholds[index] is not None]
+                if len(group) > 0:
+                    groups.append(group)
+
+        # Threshold
+        for index, band_threshold in enumerate(thresholds):
+            if band_threshold is not None:
+                self._mark_band_dirty(index)
+        return threshold_bands(
+            self._analysis_data, thresholds, mode=mode, groups=groups,
+            upper_thresholds=upper_thresholds, nb_threads=nb_threads)
+
+    def _band_thresholds(self, threshold, weights):
+        """ Get the weighted threshold of each band.
+
+        Parameters
+        ----------
+        threshold: float
+            the threshold.
+        weights: list
+            the threshold weight of each scale or band.
+
+        Returns
+        -------
+        thresholds: list of float or nd-array
+            the threshold of each band.
+        """
+        nb_band_per_scale = self._analysis_layout.nb_band_per_scale
+        if weights is None:
+            return [threshold] * len(self._analysis_layout)
+        if len(weights) != len(nb_band_per_scale):
+            raise ValueError("Expect one threshold weight per scale.")
+        thresholds = []
+        for scale_weights, nb_bands in zip(weights, nb_band_per_scale):
+            if isinstance(scale_weights, (list, tuple)):
+                if len(scale_weights) != nb_bands:
+                    raise ValueError("Expect one threshold weight per band.")
+                thresholds.extend(
+                    threshold * numpy.asarray(band_weights)
+                    for band_weights in scale_weights)
+            else:
+                thresholds.extend(
+                    [threshold * numpy.asarray(scale_weights)] * nb_bands)
+        return thresholds
+
+    def _approximation_bands(self):
+        """ Get the linear indices of the approximation bands, by default
+        the bands of the last scale.
+
+        Returns
+        -------
+        indices: list of int
+            the approximation bands indices.
+        """
+        offsets = self._analysis_layout.scales_offsets
+        return list(range(offsets[-2], offsets[-1]))
+
     def show(self):
         """ Display the different bands at the different decomposition scales.
         """
+        from pysap.plotting import plot_transform
         plot_transform(self)
 
-    def analysis(self, **kwargs):
+    def analysis(self, coeffs_out=None, **kwargs):
         """ Decompose a real or complex signal using ISAP.
 
         Fill the instance 'analysis_data' and 'analysis_header' parameters.
 
         Parameters
         ----------
+        coeffs_out: nd-array (N, ) or list of nd-array, default None
+            if set, the decomposition coefficients are written in this flat
+            buffer or in these bands, that become the instance
+            'analysis_data'. Only the NumPy 'a trous' engine writes its
+            bands directly in it, the other backends decomposition being
+            copied.
         kwargs: dict (optional)
             the parameters that will be passed to
             'pysap.extensions.mr_tansform'.
@@ -368,28 +664,56 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         # Checks
         if self._data is None:
             raise ValueError("Please specify first the input data.")
+        self._reset_synthesis_reference()
 
         # Analysis
         if numpy.iscomplexobj(self._data):
-            analysis_data_real, self.analysis_header = self._analysis(
-                self._data.real, **kwargs)
-            analysis_data_imag, _ = self._analysis(
-                self._data.imag, **kwargs)
-            if isinstance(analysis_data_real, numpy.ndarray):
-                self._analysis_data = (
-                    analysis_data_real + 1.j * analysis_data_imag)
-            else:
-                self._analysis_data = [
-                    re + 1.j * ima
-                    for re, ima in zip(analysis_data_real, analysis_data_imag)]
+            if isinstance(coeffs_out, (list, tuple)):
+                coeffs_out = [band[numpy.newaxis] for band in coeffs_out]
+            elif coeffs_out is not None:
+                coeffs_out = coeffs_out[numpy.newaxis]
+            analysis_buffer, analysis_data, layout, self._analysis_header = (
+                self._complex_analysis(
+                    self._data[numpy.newaxis], coeffs_out=coeffs_out,
+                    **kwargs))
+            self._analysis_layout = layout
+            self._analysis_data = [band[0] for band in analysis_data]
+            if analysis_buffer is not None:
+                analysis_buffer = analysis_buffer[0]
+            self._analysis_buffer = analysis_buffer
         else:
-            self._analysis_data, self._analysis_header = self._analysis(
-                self._data, **kwargs)
-
-    def synthesis(self):
+            if (coeffs_out is None and self.workspace is None and
+                    not self.contiguous):
+                analysis_data, self._analysis_header = self._analysis(
+                    self._data, **kwargs)
+                self._store_analysis_data(analysis_data)
+                return
+            (self._analysis_buffer, self._analysis_data,
+             self._analysis_layout, self._analysis_header) = (
+                self._analysis_into(self._data, coeffs_out, **kwargs))
+
+    def synthesis(self, out=None, incremental=False, verify=False):
         """ Reconstruct a real or complex signal from the wavelet coefficients
         using ISAP.
 
+        Parameters
+        ----------
+        out: nd-array, default None
+            if set, the reconstructed data/signal is written in this array.
+            The NumPy engines write their reconstruction directly in it, the
+            other backends reconstruction being copied.
+        incremental: bool, default False
+            if set, keep the reconstruction, and update it on the next
+            incremental calls by reconstructing only the changes of the
+            modified bands, the transformation being linear. The
+            modifications made through the item assignment or through
+            'threshold' are tracked, the other ones must be declared with
+            'mark_dirty' before modifying the bands.
+        verify: bool, default False
+            with 'incremental', detect the bands modified without being
+            declared from their digest, which leads to a full synthesis.
+            All the coefficients are then hashed at each call.
+
         Returns
         -------
         data: pysap.Image
@@ -408,37 +732,98 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
             print("[info] Synthesis header:")
             pprint(self._analysis_header)
 
-        # Reorganize the coefficents with ISAP convention
-        # TODO: do not backup the list of bands
-        if self.use_wrapping:
-            analysis_buffer = numpy.zeros(
-                self._analysis_buffer_shape, dtype=self.analysis_data[0].dtype)
-            for scale, nb_bands in enumerate(self.nb_band_per_scale):
-                for band in range(nb_bands):
-                    self._set_linear_band(scale, band, analysis_buffer,
-                                          self.band_at(scale, band))
-            _saved_analysis_data = self._analysis_data
-            self._analysis_data = analysis_buffer
-            self._analysis_data = [self.unflatten_fct(self)]
+        # Incremental synthesis
+        if incremental and not self.use_wrapping:
+            return self._incremental_synthesis(out, verify=verify)
 
-        # Synthesis
+        # Synthesis: with the wrapping, the bands are written directly in
+        # the ISAP decomposition file
         if numpy.iscomplexobj(self._analysis_data[0]):
-            data_real = self._synthesis(
-                [arr.real for arr in self._analysis_data],
-                self._analysis_header)
-            data_imag = self._synthesis(
-                [arr.imag for arr in self._analysis_data],
-                self._analysis_header)
-            data = data_real + 1.j * data_imag
+            data = self._complex_synthesis(
+                [arr[numpy.newaxis] for arr in self._analysis_data],
+                out=None if out is None else out[numpy.newaxis])[0]
+            if out is not None:
+                data = out
         else:
-            data = self._synthesis(
-                self._analysis_data, self._analysis_header)
+            data = self._synthesis_into(
+                self._analysis_data, self._analysis_header, out)
 
-        # TODO: remove this code asap
-        if self.use_wrapping:
-            self._analysis_data = _saved_analysis_data
+        return self._get_image(data)
+
+    def analysis_batch(self, stack, **kwargs):
+        """ Decompose a stack of real or complex signals sharing the same
+        shape.
+
+        All the signals share the same transformation parameters and are
+        decomposed with a single backend call when the backend allows it.
+        The 'analysis_header' parameter is filled, but the instance
+        'data' and 'analysis_data' parameters are left untouched.
+
+        Parameters
+        ----------
+        stack: ndarray (N, ...)
+            the signals to be decomposed stacked along the first axis.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_data: list of ndarray
+            the decomposition coefficients, each band having a leading
+            batch axis of size N.
+        """
+        # Checks
+        stack = numpy.asarray(stack)
+        if stack.ndim != self.data_dim + 1:
+            raise ValueError("Expect a stack of {0}D signals.".format(
+                self.data_dim))
+        self._check_data_shape(stack.shape[1:])
+        if self._data_shape != stack.shape[1:]:
+            self._set_data_shape(stack.shape[1:])
+
+        # Analysis
+        if numpy.iscomplexobj(stack):
+            _, analysis_data, _, self.analysis_header = (
+                self._complex_analysis(
+                    stack, name="batch_coefficients", **kwargs))
+        else:
+            analysis_data, self.analysis_header = self._analysis_batch(
+                stack, **kwargs)
+
+        return analysis_data
 
-        return pysap.Image(data=data, metadata=self._image_metadata)
+    def synthesis_batch(self, analysis_data):
+        """ Reconstruct a stack of real or complex signals from the wavelet
+        coefficients.
+
+        Parameters
+        ----------
+        analysis_data: list of ndarray
+            the decomposition coefficients, each band having a leading
+            batch axis of size N, as returned by 'analysis_batch'.
+
+        Returns
+        -------
+        data: pysap.Image
+            the reconstructed signals stacked along the first axis.
+        """
+        # Checks
+        if len(analysis_data) == 0:
+            raise ValueError("Please specify the decomposition coefficients "
+                             "array.")
+        if self.use_wrapping and self._analysis_header is None:
+            raise ValueError("Please specify first the decomposition "
+                             "coefficients header.")
+
+        # Synthesis
+        if numpy.iscomplexobj(analysis_data[0]):
+            data = self._complex_synthesis(analysis_data)
+        else:
+            data = self._synthesis_batch(
+                analysis_data, self._analysis_header)
+
+        return self._get_image(data)
 
     def band_at(self, scale, band):
         """ Get the band at a specific scale.
@@ -461,11 +846,163 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
                 scale, band))
 
         # Get the band array
-        index = numpy.sum(self.nb_band_per_scale[:scale]).astype(int) + band
-        band_data = self.analysis_data[index]
+        band_data = self.analysis_data[self._band_index(scale, band)]
 
         return band_data
 
+    def _band_index(self, scale, band):
+        """ Get the linear index of a band.
+
+        Parameters
+        ----------
+        scale: int
+            index of the scale.
+        band: int
+            index of the band.
+
+        Returns
+        -------
+        index: int
+            the linear index of the band.
+        """
+        if self._analysis_layout is not None:
+            return self._analysis_layout.index(scale, band)
+        return int(numpy.sum(self.nb_band_per_scale[:scale])) + band
+
+    def _mark_band_dirty(self, index):
+        """ Record that a band is about to be modified: keep its current
+        values to compute its change at the next incremental synthesis.
+
+        Parameters
+        ----------
+        index: int
+            the linear index of the band.
+        """
+        if (self._synthesis_reference is not None and
+                index not in self._dirty_bands):
+            band_data = self._analysis_data[index]
+            saved = self._get_array("dirty_band_{0}".format(index),
+                                    band_data.shape, band_data.dtype)
+            saved[...] = band_data
+            self._dirty_bands[index] = saved
+
+    def _reset_synthesis_reference(self):
+        """ Forget the reconstruction kept for the incremental synthesis.
+        """
+        self._synthesis_reference = None
+        self._synthesis_digests = None
+        self._dirty_bands = {}
+
+    def _incremental_synthesis(self, out=None, verify=False):
+        """ Reconstruct the signal by updating the kept reconstruction with
+        the reconstruction of the changes of the modified bands.
+
+        Parameters
+        ----------
+        out: nd-array, default None
+            if set, the reconstructed data/signal is written in this array.
+        verify: bool, default False
+            if set, fall back to a full synthesis when bands have been
+            modified without being declared.
+
+        Returns
+        -------
+        data: pysap.Image
+            the reconstructed data/signal.
+        """
+        reference = self._synthesis_reference
+        if (reference is not None and verify and
+                self._has_undeclared_changes()):
+            reference = None
+        elif reference is not None and len(self._dirty_bands) > 0:
+            deltas = [None] * len(self._analysis_data)
+            for index, band_data in self._dirty_bands.items():
+                deltas[index] = numpy.subtract(
+                    self._analysis_data[index], band_data, out=band_data)
+            delta = self._synthesis_delta(deltas)
+            if numpy.can_cast(delta.dtype, reference.dtype, "same_kind"):
+                reference += delta
+            else:
+                reference = None
+        if reference is None:
+            self._reset_synthesis_reference()
+            reference = self.synthesis().data.copy()
+        self._synthesis_reference = reference
+        self._synthesis_digests = self._band_digests() if verify else None
+        self._dirty_bands = {}
+        if out is None:
+            out = self._get_array(
+                "synthesis", reference.shape, reference.dtype)
+        out[...] = reference
+        return self._get_image(out)
+
+    def _band_digests(self):
+        """ Compute the digest of each band, used to detect the bands
+        modified without being declared.
+
+        Returns
+        -------
+        digests: list of bytes
+            the bands digests.
+        """
+        return [hashlib.blake2b(numpy.ascontiguousarray(band_data)).digest()
+                for band_data in self._analysis_data]
+
+    def _has_undeclared_changes(self):
+        """ Check if bands have been modified since the last incremental
+        synthesis without being declared.
+
+        Returns
+        -------
+        changed: bool
+            True if the content of a band not declared as modified has
+            changed.
+        """
+        if (self._synthesis_digests is None or
+                len(self._synthesis_digests) != len(self._analysis_data)):
+            return True
+        for index, band_data in enumerate(self._analysis_data):
+            if index in self._dirty_bands:
+                continue
+            digest = hashlib.blake2b(
+                numpy.ascontiguousarray(band_data)).digest()
+            if digest != self._synthesis_digests[index]:
+                return True
+        return False
+
+    def _synthesis_delta(self, deltas):
+        """ Reconstruct the changes of some bands.
+
+        By default the unchanged bands are set to zero and a full synthesis
+        is run: the backends reconstruct only the modified bands when the
+        transformation allows it.
+
+        Parameters
+        ----------
+        deltas: list of nd-array
+            the change of each band, None for the unchanged bands, that can
+            be overwritten.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed change.
+        """
+        dtype = numpy.result_type(*[
+            delta for delta in deltas if delta is not None])
+        bands = []
+        for index, (delta, band_data) in enumerate(
+                zip(deltas, self._analysis_data)):
+            if delta is None:
+                delta = self._get_array(
+                    "zero_band_{0}".format(index), band_data.shape, dtype)
+                delta.fill(0)
+            bands.append(delta)
+        if numpy.iscomplexobj(bands[0]):
+            return self._complex_synthesis(
+                [band[numpy.newaxis] for band in bands])[0]
+        return self._synthesis(bands, self._analysis_header)
+
     ##########################################################################
     # Private members
     ##########################################################################
@@ -481,6 +1018,287 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         raise NotImplementedError("Abstract method should not be declared "
                                   "in derivate classes.")
 
+    def _analysis_into(self, data, coeffs_out=None, **kwargs):
+        """ Decompose a real signal in a destination buffer: the user
+        buffer or bands, the workspace buffer or the contiguous buffer.
+
+        The backend decomposition is copied in the destination: the
+        backends able to write their coefficients directly in the
+        destination override this method.
+
+        Parameters
+        ----------
+        data: nd-array
+            a real array to be decomposed.
+        coeffs_out: nd-array (N, ) or list of nd-array, default None
+            a user defined destination flat buffer or bands.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_buffer: nd-array (N, ) or None
+            the flat coefficients buffer, None if the destination is a list
+            of bands.
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        layout: BandsLayout
+            the bands layout.
+        analysis_header: dict
+            the decomposition associated information.
+        """
+        bands, analysis_header = self._analysis(data, **kwargs)
+        layout = self._get_layout(bands)
+        analysis_buffer, analysis_data = self._get_coefficients(
+            layout, numpy.result_type(*bands), coeffs_out)
+        for view, band in zip(analysis_data, bands):
+            view[...] = band
+        return analysis_buffer, analysis_data, layout, analysis_header
+
+    def _synthesis_into(self, analysis_data, analysis_header, out=None):
+        """ Reconstruct a real signal in an output array.
+
+        The backend reconstruction is copied in the output array: the
+        backends able to write their reconstruction directly in the output
+        array override this method.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        analysis_header: dict
+            the decomposition associated information.
+        out: nd-array, default None
+            if set, the reconstructed data/signal is written in this array,
+            otherwise the backend output is returned without copy.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed data/signal.
+        """
+        data = self._synthesis(analysis_data, analysis_header)
+        if out is not None:
+            out[...] = data
+            data = out
+        return data
+
+    def _store_analysis_data(self, analysis_data):
+        """ Store the decomposition coefficients and update the associated
+        bands layout.
+
+        In contiguous mode the coefficients are copied in a single buffer
+        and the stored bands are views of this buffer.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        """
+        self._analysis_layout = self._get_layout(analysis_data)
+        if self.contiguous:
+            self._analysis_buffer = self._analysis_layout.pack(analysis_data)
+            self._analysis_data = self._analysis_layout.views(
+                self._analysis_buffer)
+        else:
+            self._analysis_buffer = None
+            self._analysis_data = analysis_data
+
+    def _get_layout(self, analysis_data, batch_ndim=0):
+        """ Get the layout describing some decomposition coefficients,
+        reusing the current or the cached layout when possible.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        batch_ndim: int, default 0
+            the number of leading batch dimensions of each band.
+
+        Returns
+        -------
+        layout: BandsLayout
+            the bands layout.
+        """
+        for layout in (self._analysis_layout,
+                       getattr(self._plan, "layout", None)):
+            if layout is not None and layout.matches(
+                    analysis_data, batch_ndim=batch_ndim):
+                return layout
+        layout = BandsLayout.from_bands(
+            analysis_data, self.nb_band_per_scale, batch_ndim=batch_ndim)
+        if self._plan is not None:
+            self._plan.layout = layout
+        return layout
+
+    def _get_array(self, name, shape, dtype):
+        """ Get a work array, reused from the workspace if any.
+
+        Parameters
+        ----------
+        name: str
+            the array name in the workspace.
+        shape: uplet
+            the array shape.
+        dtype: numpy.dtype
+            the array type.
+
+        Returns
+        -------
+        arr: nd-array
+            the requested array, not initialized.
+        """
+        if self.workspace is None:
+            return numpy.empty(shape, dtype=dtype)
+        return self.workspace.get(name, shape, dtype)
+
+    def _get_image(self, data):
+        """ Wrap reconstructed data in an image, reused from the workspace
+        if any.
+
+        Parameters
+        ----------
+        data: nd-array
+            the reconstructed data.
+
+        Returns
+        -------
+        image: pysap.Image
+            the reconstructed image.
+        """
+        if self.workspace is None:
+            return pysap.Image(data=data, metadata=self._image_metadata)
+        return self.workspace.image(data, self._image_metadata)
+
+    def _get_coefficients(self, layout, dtype, coeffs_out=None,
+                          batch_shape=(), name="coefficients"):
+        """ Get the destination of some decomposition coefficients.
+
+        Parameters
+        ----------
+        layout: BandsLayout
+            the bands layout.
+        dtype: numpy.dtype
+            the coefficients type.
+        coeffs_out: nd-array (..., size) or list of nd-array, default None
+            a user defined destination flat buffer or bands.
+        batch_shape: uplet, default ()
+            the leading batch dimensions.
+        name: str, default 'coefficients'
+            the buffer name in the workspace.
+
+        Returns
+        -------
+        analysis_buffer: nd-array (..., size) or None
+            the flat coefficients buffer, None if the destination is a list
+            of bands.
+        analysis_data: list of nd-array
+            the destination bands.
+        """
+        batch_shape = tuple(batch_shape)
+        if isinstance(coeffs_out, (list, tuple)):
+            if not layout.matches(coeffs_out, batch_ndim=len(batch_shape)):
+                raise ValueError("The output bands do not correspond to the "
+                                 "decomposition coefficients.")
+            return None, list(coeffs_out)
+        if coeffs_out is not None:
+            if coeffs_out.shape != batch_shape + (layout.size, ):
+                raise ValueError("The output buffer does not correspond to "
+                                 "the decomposition coefficients.")
+            if not numpy.can_cast(dtype, coeffs_out.dtype, "same_kind"):
+                raise ValueError("Can't write '{0}' coefficients in a '{1}' "
+                                 "buffer.".format(dtype, coeffs_out.dtype))
+            return coeffs_out, layout.views(coeffs_out)
+        if self.workspace is not None:
+            return self.workspace.coefficients(
+                name, layout, dtype, batch_shape=batch_shape)
+        analysis_buffer = layout.allocate(dtype, batch_shape=batch_shape)
+        return analysis_buffer, layout.views(analysis_buffer)
+
+    def _complex_analysis(self, stack, coeffs_out=None, name="coefficients",
+                          **kwargs):
+        """ Decompose a stack of complex signals.
+
+        The real and imaginary parts are decomposed together as a single
+        stack of real signals, and the coefficients are written directly
+        in a complex buffer.
+
+        Parameters
+        ----------
+        stack: nd-array (N, ...)
+            the complex signals to be decomposed stacked along the first
+            axis.
+        coeffs_out: nd-array (N, size) or list of nd-array, default None
+            a user defined destination flat buffer or bands.
+        name: str, default 'coefficients'
+            the buffer name in the workspace.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_buffer: nd-array (N, size) or None
+            the decomposition coefficients of each signal stored in a
+            single complex buffer, None if the destination is a list of
+            bands.
+        analysis_data: list of nd-array
+            the decomposition coefficients with a leading batch axis.
+        layout: BandsLayout
+            the layout of the decomposition coefficients.
+        analysis_header: dict
+            the decomposition associated information.
+        """
+        nb_signals = len(stack)
+        analysis_data, analysis_header = self._analysis_batch(
+            numpy.concatenate((stack.real, stack.imag)), **kwargs)
+        layout = self._get_layout(analysis_data, batch_ndim=1)
+        analysis_buffer, bands = self._get_coefficients(
+            layout, numpy.result_type(numpy.complex64, *analysis_data),
+            coeffs_out, batch_shape=(nb_signals, ), name=name)
+        for view, band in zip(bands, analysis_data):
+            view.real = band[:nb_signals]
+            view.imag = band[nb_signals:]
+        return analysis_buffer, bands, layout, analysis_header
+
+    def _complex_synthesis(self, analysis_data, out=None):
+        """ Reconstruct a stack of complex signals.
+
+        The real and imaginary parts are reconstructed together as a
+        single stack of real signals.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the complex decomposition coefficients with a leading batch
+            axis.
+        out: nd-array (N, ...), default None
+            if set, the reconstructed signals are written in this array.
+
+        Returns
+        -------
+        data: nd-array (N, ...)
+            the reconstructed complex signals stacked along the first axis.
+        """
+        nb_signals = len(analysis_data[0])
+        parts = []
+        for index, band in enumerate(analysis_data):
+            part = self._get_array(
+                "complex_band_{0}".format(index),
+                (2 * nb_signals, ) + band.shape[1:], band.real.dtype)
+            part[:nb_signals] = band.real
+            part[nb_signals:] = band.imag
+            parts.append(part)
+        parts = self._synthesis_batch(parts, self._analysis_header)
+        if out is None:
+            out = self._get_array(
+                "complex_data", (nb_signals, ) + parts.shape[1:],
+                numpy.result_type(numpy.complex64, parts))
+        out.real = parts[:nb_signals]
+        out.imag = parts[nb_signals:]
+        return out
+
     def _get_linear_band(self, scale, band, analysis_data):
         """ Access the desired band data from a 1D linear analysis buffer.
 
@@ -631,3 +1449,57 @@ class WaveletTransformBase(with_metaclass(MetaRegister)):
         """
         raise NotImplementedError("Abstract method should not be declared "
                                   "in derivate classes.")
+
+    def _analysis_batch(self, stack, **kwargs):
+        """ Decompose a stack of real signals.
+
+        The default implementation loops over the signals, backends that
+        can process a whole stack in one call should overload this method.
+
+        Parameters
+        ----------
+        stack: nd-array (N, ...)
+            the real signals to be decomposed stacked along the first axis.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_data: list of nd-array
+            the decomposition coefficients with a leading batch axis.
+        analysis_header: dict
+            the decomposition associated information.
+        """
+        analysis_header = None
+        bands = []
+        for data in stack:
+            analysis_data, analysis_header = self._analysis(data, **kwargs)
+            bands.append(analysis_data)
+        analysis_data = [numpy.asarray(arrs) for arrs in zip(*bands)]
+        return analysis_data, analysis_header
+
+    def _synthesis_batch(self, analysis_data, analysis_header):
+        """ Reconstruct a stack of real signals from the wavelet coefficients.
+
+        The default implementation loops over the signals, backends that
+        can process a whole stack in one call should overload this method.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the wavelet coefficients array with a leading batch axis.
+        analysis_header: dict
+            the wavelet decomposition parameters.
+
+        Returns
+        -------
+        data: nd-array (N, ...)
+            the reconstructed data arrays stacked along the first axis.
+        """
+        nb_signals = len(analysis_data[0])
+        data = [
+            self._synthesis([band[index] for band in analysis_data],
+                            analysis_header)
+            for index in range(nb_signals)]
+        return numpy.asarray(data)
@@ -95,13 +95,17 @@ def monkeypatch(klass, methodname=None):
     return decorator
 
 
-def flatten(x):
+def flatten(x, copy=True):
     """ Flatten list an array.
 
     Parameters
     ----------
     x: list of ndarray or ndarray
         the input dataset.
+    copy: bool, default True
+        if not set and if the input arrays are consecutive views of a single
+        contiguous buffer, this buffer is returned without any copy:
+        modifying the flatten array then modifies the input arrays.
 
     Returns
     -------
@@ -117,15 +121,46 @@ def flatten(x):
         return None, None
 
     # Flatten the dataset
-    y = x[0].flatten()
-    shape = [x[0].shape]
-    for data in x[1:]:
-        y = numpy.concatenate((y, data.flatten()))
-        shape.append(data.shape)
+    shape = [data.shape for data in x]
+    y = None if copy else _contiguous_base(x)
+    if y is None:
+        y = numpy.concatenate([numpy.ravel(data) for data in x])
 
     return y, shape
 
 
+def _contiguous_base(x):
+    """ Get the 1D buffer shared by a list of arrays if these arrays are
+    consecutive views covering this whole buffer.
+
+    Parameters
+    ----------
+    x: list of ndarray
+        the input dataset.
+
+    Returns
+    -------
+    base: ndarray 1D or None
+        the shared buffer, None if the arrays do not share such a buffer.
+    """
+    base = getattr(x[0], "base", None)
+    if (not isinstance(base, numpy.ndarray) or base.ndim != 1 or
+            not base.flags.c_contiguous):
+        return None
+    start = base.__array_interface__["data"][0]
+    position = start
+    for data in x:
+        if (getattr(data, "base", None) is not base or
+                not data.flags.c_contiguous):
+            return None
+        if data.__array_interface__["data"][0] != position:
+            return None
+        position += data.nbytes
+    if position != start + base.nbytes:
+        return None
+    return base
+
+
 def unflatten(y, shape):
     """ Unflatten a flattened array.
 
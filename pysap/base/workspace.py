@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Reusable arrays attached to a transformation so that repeated
+analysis/synthesis calls on identically shaped data do not allocate.
+"""
+
+# Package import
+import pysap
+
+# Third party import
+import numpy
+
+
+class TransformWorkspace(object):
+    """ Named arrays cache: an array is only allocated when the requested
+    shape or type changes.
+    """
+    def __init__(self):
+        """ Initialize the TransformWorkspace class.
+        """
+        self._arrays = {}
+        self._views = {}
+        self._image = None
+
+    @property
+    def nbytes(self):
+        """ The memory used by the cached arrays.
+        """
+        return sum(arr.nbytes for arr in self._arrays.values())
+
+    def get(self, name, shape, dtype):
+        """ Get a named array.
+
+        Parameters
+        ----------
+        name: str
+            the array name.
+        shape: uplet
+            the array shape.
+        dtype: numpy.dtype
+            the array type.
+
+        Returns
+        -------
+        arr: ndarray
+            the requested array, not initialized.
+        """
+        shape = tuple(shape)
+        dtype = numpy.dtype(dtype)
+        arr = self._arrays.get(name)
+        if arr is None or arr.shape != shape or arr.dtype != dtype:
+            arr = numpy.empty(shape, dtype=dtype)
+            self._arrays[name] = arr
+            self._views.pop(name, None)
+        return arr
+
+    def cast(self, name, data, dtype):
+        """ Get a data array with a specific type, copying it in a named
+        array only if necessary.
+
+        Parameters
+        ----------
+        name: str
+            the array name.
+        data: ndarray
+            the input data.
+        dtype: numpy.dtype
+            the requested type.
+
+        Returns
+        -------
+        arr: ndarray
+            the C-contiguous data with the requested type.
+        """
+        if data.dtype == dtype and data.flags.c_contiguous:
+            return data
+        arr = self.get(name, data.shape, dtype)
+        numpy.copyto(arr, data, casting="unsafe")
+        return arr
+
+    def coefficients(self, name, layout, dtype, batch_shape=()):
+        """ Get a named flat coefficients buffer and its bands views.
+
+        Parameters
+        ----------
+        name: str
+            the buffer name.
+        layout: BandsLayout
+            the bands layout.
+        dtype: numpy.dtype
+            the buffer type.
+        batch_shape: uplet, default ()
+            the leading batch dimensions.
+
+        Returns
+        -------
+        buffer: ndarray (..., size)
+            the requested buffer, not initialized.
+        bands: list of ndarray
+            the bands, as views of the buffer.
+        """
+        buffer = self.get(
+            name, tuple(batch_shape) + (layout.size, ), dtype)
+        cached = self._views.get(name)
+        if cached is None or cached[0] is not layout:
+            cached = (layout, layout.views(buffer))
+            self._views[name] = cached
+        return buffer, cached[1]
+
+    def image(self, data, metadata):
+        """ Get the reused image wrapping some data.
+
+        Parameters
+        ----------
+        data: ndarray
+            the image data.
+        metadata: dict
+            the image metadata.
+
+        Returns
+        -------
+        image: pysap.Image
+            the image.
+        """
+        if self._image is None or self._image.shape != data.shape:
+            self._image = pysap.Image(data=data, metadata=metadata)
+        else:
+            self._image.data = data
+            self._image.metadata = metadata
+        return self._image
+
+    def clear(self):
+        """ Release all the cached arrays.
+        """
+        self._arrays.clear()
+        self._views.clear()
+        self._image = None
@@ -13,7 +13,6 @@ This module checks that all the dependencies are installed properly.
 
 # System import
 import importlib
-import distutils
 
 # Package import
 from .info import __version__
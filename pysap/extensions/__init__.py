@@ -20,5 +20,8 @@ from .tools import mr3d_recons
 from .tools import mr3d_transform
 from .tools import mr3d_filter
 from .tools import mr2d1d_trans
+from .wrapper import Sparse2dExecutor
 from .formating import FLATTENING_FCTS as ISAP_FLATTEN
 from .formating import INFLATING_FCTS as ISAP_UNFLATTEN
+from .formating import VIEWING_FCTS as ISAP_VIEWS
+from .mrfile import MRFile
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Asynchronous variants of the Sparse2d commands wrapping.
+
+The commands are run as asyncio sub processes, the number of jobs running
+at the same time in an event loop being bounded by 'MAX_CONCURRENCY'
+(see 'set_max_concurrency'). The inputs are arrays, 'pysap.Image' or
+paths, and the outputs are loaded: the images are returned as arrays and
+the decompositions ('.mr' files) as 'pysap.Image' so that their header is
+kept for the reconstruction. As the synchronous commands, the outputs are
+taken from the result cache when it is enabled (see
+'pysap.base.results.set_result_cache').
+"""
+
+# System import
+import os
+import shutil
+import asyncio
+import inspect
+import weakref
+
+# Package import
+import pysap
+from . import tools
+from .wrapper import find_executable
+from pysap.base.scratch import mkdtemp_isap
+from pysap.base.results import get_result_cache
+from pysap.base.exceptions import Sparse2dRuntimeError
+from pysap.base.exceptions import Sparse2dTimeoutError
+
+
+# Global parameters
+# > the maximum number of jobs running at the same time in an event loop
+MAX_CONCURRENCY = os.cpu_count() or 1
+# > the concurrency limiter of each event loop
+_SEMAPHORES = weakref.WeakKeyDictionary()
+
+
+def set_max_concurrency(max_concurrency):
+    """ Set the maximum number of jobs running at the same time in an
+    event loop.
+
+    Parameters
+    ----------
+    max_concurrency: int
+        the maximum number of jobs, applied to the event loops that did not
+        run any job yet.
+    """
+    global MAX_CONCURRENCY
+    if max_concurrency < 1:
+        raise ValueError("Expect at least one concurrent job.")
+    MAX_CONCURRENCY = max_concurrency
+    _SEMAPHORES.clear()
+
+
+def get_limiter():
+    """ Get the concurrency limiter of the running event loop.
+
+    Returns
+    -------
+    limiter: asyncio.Semaphore
+        the event loop concurrency limiter.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = _SEMAPHORES.get(loop)
+    if limiter is None:
+        limiter = asyncio.Semaphore(MAX_CONCURRENCY)
+        _SEMAPHORES[loop] = limiter
+    return limiter
+
+
+async def run_command(cmd, env=None, verbose=False, timeout=None):
+    """ Run a Sparse2d command as an asyncio sub process.
+
+    The command is killed if the calling task is cancelled.
+
+    Parameters
+    ----------
+    cmd: list of str
+        the command to execute.
+    env: dict, default None
+        the environment in which the command will be executed, by default
+        the current environment.
+    verbose: bool, default False
+        control the verbosity level.
+    timeout: float, default None
+        if set, the command is killed after this number of seconds.
+
+    Returns
+    -------
+    stdout: str
+        the command standard output.
+    """
+    # Check Sparse2d has been configured so the command can be found
+    executable = find_executable(cmd[0], env=env)
+
+    # Command must contain only strings
+    _cmd = [str(elem) for elem in cmd]
+    if verbose:
+        print("[info] Executing ISAP command: {0}...".format(" ".join(_cmd)))
+
+    # Execute the command
+    process = await asyncio.create_subprocess_exec(
+        executable, *_cmd[1:], env=env, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        raise Sparse2dTimeoutError(_cmd[0], " ".join(_cmd[1:]), timeout)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    stdout = stdout.decode("utf-8")
+    stderr = stderr.decode("utf-8")
+    if process.returncode != 0 or stderr or "Error" in stdout:
+        raise Sparse2dRuntimeError(
+            _cmd[0], " ".join(_cmd[1:]), stderr + stdout)
+    return stdout
+
+
+async def run_tool(tool, inputs, inputs_extensions, output_extension,
+                   timeout=None, **kwargs):
+    """ Run a Sparse2d command wrapping function on in-memory data.
+
+    The inputs are written and the output loaded in a temporary folder,
+    the files I/O being run in the event loop default executor. When the
+    result cache is enabled, the outputs of a command already run on the
+    same inputs with the same parameters are copied from the cache.
+
+    Parameters
+    ----------
+    tool: callable
+        the Sparse2d command wrapping function, decorated with
+        'sparse2d_command'.
+    inputs: list of nd-array, pysap.Image or str
+        the command inputs, paths being used as is.
+    inputs_extensions: list of str
+        the command inputs files extensions.
+    output_extension: str
+        the command output file extension.
+    timeout: float, default None
+        if set, the command is killed after this number of seconds.
+    kwargs: dict (optional)
+        the command wrapping function parameters.
+
+    Returns
+    -------
+    output: nd-array or pysap.Image
+        the loaded command output, a 'pysap.Image' for the decompositions.
+    """
+    loop = asyncio.get_running_loop()
+    async with get_limiter():
+        tmpdir = await loop.run_in_executor(None, mkdtemp_isap)
+        try:
+            paths = []
+            for idx, (data, ext) in enumerate(zip(inputs, inputs_extensions)):
+                if isinstance(data, str):
+                    paths.append(data)
+                    continue
+                path = os.path.join(tmpdir, "in{0}{1}".format(idx, ext))
+                await loop.run_in_executor(None, pysap.io.save, data, path)
+                paths.append(path)
+            out_path = os.path.join(tmpdir, "out" + output_extension)
+            cmd = tool.command(*(paths + [out_path]), **kwargs)
+            cache = get_result_cache()
+            found = False
+            if cache is not None:
+                arguments = inspect.signature(tool.command).bind(
+                    *(paths + [out_path]), **kwargs)
+                arguments.apply_defaults()
+                outputs = [arguments.arguments[name] for name in tool.outputs
+                           if arguments.arguments[name] is not None]
+                key = await loop.run_in_executor(
+                    None, tools._command_key, tool.command, arguments,
+                    outputs)
+                found = await loop.run_in_executor(
+                    None, cache.fetch, key, outputs)
+            if not found:
+                await run_command(cmd, verbose=kwargs.get("verbose", False),
+                                  timeout=timeout)
+                if cache is not None:
+                    await loop.run_in_executor(
+                        None, cache.store, key, outputs)
+            image = await loop.run_in_executor(None, pysap.io.load, out_path)
+        finally:
+            await loop.run_in_executor(None, shutil.rmtree, tmpdir)
+    if output_extension == ".mr":
+        return image
+    return image.data
+
+
+def _async_variant(tool, inputs_extensions, output_extension):
+    """ Create the asynchronous variant of a Sparse2d command wrapping
+    function.
+    """
+    async def variant(*inputs, timeout=None, **kwargs):
+        if len(inputs) != len(inputs_extensions):
+            raise ValueError("'{0}' expects {1} input(s).".format(
+                tool.__name__, len(inputs_extensions)))
+        return await run_tool(tool, inputs, inputs_extensions,
+                              output_extension, timeout=timeout, **kwargs)
+
+    variant.__name__ = variant.__qualname__ = tool.__name__
+    variant.__doc__ = (
+        """ Asynchronous variant of '{0}', returning the loaded output.
+        """.format(tool.__name__))
+    return variant
+
+
+mr_transform = _async_variant(tools.mr_transform, (".fits", ), ".mr")
+mr_filter = _async_variant(tools.mr_filter, (".fits", ), ".fits")
+mr_deconv = _async_variant(tools.mr_deconv, (".fits", ".fits"), ".fits")
+mr_recons = _async_variant(tools.mr_recons, (".mr", ), ".fits")
+mr3d_recons = _async_variant(tools.mr3d_recons, (".mr", ), ".fits")
+mr3d_transform = _async_variant(tools.mr3d_transform, (".fits", ), ".mr")
+mr3d_filter = _async_variant(tools.mr3d_filter, (".fits", ), ".fits")
+
+
+async def mr2d1d_trans(in_image, timeout=None, **kwargs):
+    """ Asynchronous variant of 'mr2d1d_trans', returning the loaded output.
+    """
+    if kwargs.get("reverse", False):
+        extensions = ((".mr", ), ".fits")
+    else:
+        extensions = ((".fits", ), ".mr")
+    return await run_tool(tools.mr2d1d_trans, [in_image], *extensions,
+                          timeout=timeout, **kwargs)
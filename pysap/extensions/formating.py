@@ -410,6 +410,127 @@ def inflated_decimated_feauveau(trf):
     set_htl(tmp, trf[trf.nb_scale-1, 0])  # set approx
     return cube
 
+###
+# VIEWS
+
+
+def views_undecimated_n_bands(cube, trf):
+    """ Get the decomposition bands as views of a 'cube'.
+    'views_undecimated_n_bands' concern the 'cube' where each layer
+    correspond to a undecimated band.
+
+    Parameters
+    ----------
+    cube: np.ndarray, the cube that containes the decomposition
+    coefficients.
+
+    Returns
+    -------
+    bands: list of np.ndarray, the 'cube' bands views in pysap order.
+    """
+    nb_bands = int(np.sum(trf.nb_band_per_scale))
+    return [cube[idx] for idx in range(nb_bands)]
+
+
+def views_decimated_1_bands(cube, trf):
+    """ Get the decomposition bands as views of a 'cube'.
+    'views_decimated_1_bands' concern the 'cube' where it's actually a
+    2d-array like the classic wavelet 2d-transform of 1 bands.
+
+    Parameters
+    ----------
+    cube: np.ndarray, the cube that containes the decomposition
+    coefficients.
+
+    Returns
+    -------
+    bands: list of np.ndarray, the 'cube' bands views in pysap order.
+    """
+    bands = []
+    for i in range(trf.nb_scale-1):
+        bands.append(get_htl(cube))
+        cube = get_hbr(cube)
+    bands.append(cube)  # get approx
+    return bands
+
+
+def views_decimated_3_bands(cube, trf):
+    """ Get the decomposition bands as views of a 'cube'.
+    'views_decimated_3_bands' concern the 'cube' where it's actually
+    a 2d-array like the classic wavelet 2d-transform of 3 bands.
+
+    Parameters
+    ----------
+    cube: np.ndarray, the cube that containes the decomposition
+    coefficients.
+
+    Returns
+    -------
+    bands: list of np.ndarray, the 'cube' bands views in pysap order.
+    """
+    bands = []
+    for i in range(trf.nb_scale-1):
+        bands.append(get_htr(cube))
+        bands.append(get_hbr(cube))
+        bands.append(get_hbl(cube))
+        cube = get_htl(cube)
+    bands.append(cube)  # get approx
+    return bands
+
+
+def views_vector(cube, trf):
+    """ Get the decomposition bands as views of a 'cube'.
+    'views_vector' concern the 'curvelet-cube' where it's a vector. The
+    bands description is written in the 'cube' when it is writable.
+
+    Parameters
+    ----------
+    cube: np.ndarray, the cube that containes the decomposition
+    coefficients.
+
+    Returns
+    -------
+    bands: list of np.ndarray, the 'cube' bands views in pysap order.
+    """
+    if cube.flags.writeable:
+        cube[0] = trf.nb_scale
+        cube[1:1+trf.nb_scale] = trf.nb_band_per_scale
+    bands = []
+    cube_padd = 1 + trf.nb_scale
+    for ks in range(trf.nb_scale):
+        for kb in range(trf.nb_band_per_scale[ks]):
+            Nx = trf.bands_shapes[ks][kb][0]
+            Ny = trf.bands_shapes[ks][kb][1]
+            if cube.flags.writeable:
+                cube[cube_padd:cube_padd+2] = (Nx, Ny)
+            cube_padd += 2
+            bands.append(cube[cube_padd:cube_padd+Nx*Ny].reshape(Nx, Ny))
+            cube_padd += (Nx * Ny)
+    return bands
+
+
+def views_decimated_feauveau(cube, trf):
+    """ Get the decomposition bands as views of a 'cube'.
+    'views_decimated_feauveau' concern the 'cube' where it's the Feauveau
+    decimated...
+
+    Parameters
+    ----------
+    cube: np.ndarray, the cube that containes the decomposition
+    coefficients.
+
+    Returns
+    -------
+    bands: list of np.ndarray, the 'cube' bands views in pysap order.
+    """
+    bands = []
+    for i in range(trf.nb_scale-1):
+        bands.append(get_hbl(cube))
+        bands.append(get_hr(cube))
+        cube = get_htl(cube)
+    bands.append(cube)  # get approx
+    return bands
+
 ###
 # FORMATING FCTS INDEXES
 
@@ -425,3 +546,9 @@ INFLATING_FCTS = [inflated_undecimated_n_bands,
                   inflated_decimated_3_bands,
                   inflated_vector,
                   inflated_decimated_feauveau]
+
+VIEWING_FCTS = [views_undecimated_n_bands,
+                views_decimated_1_bands,
+                views_decimated_3_bands,
+                views_vector,
+                views_decimated_feauveau]
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Pure NumPy/SciPy engine for the wavelet transforms defined in Fourier
+space.
+
+This engine exposes the same 'transform'/'reconstruct' interface as the
+sparse2d bindings transformation objects, and is used by the Fourier space
+transforms created with 'engine="numpy"'. The filters spectra are
+computed once for each data shape, so that a transform only costs the real
+FFTs and pointwise products.
+
+The bands layout is the ISAP one: the pyramidal transforms give bands
+halved at each scale, the last approximation having the size of the
+previous scale, e.g. (32, 16, 8, 8) for a 32x32 image and 4 scales.
+Known differences with the ISAP coefficients:
+
+- the coefficients are computed in double precision (single precision in
+  ISAP).
+- the filters are sampled on the radial frequencies of the FFT grid, and
+  the pyramidal approximations are decimated by cropping their spectrum:
+  the coefficients follow the ISAP filters definitions, but are not
+  checked against stored ISAP decompositions and may differ from them.
+"""
+
+# System import
+import threading
+
+# Third party import
+import numpy
+
+
+# Global parameters
+# > the available filters: undecimated or pyramidal transforms
+FILTERS = ("undecimated", "algo1", "algo2", "meyer", "isotropic")
+
+
+def get_fftpack():
+    """ Get the FFT module, imported on first use.
+
+    Returns
+    -------
+    fftpack: module
+        'scipy.fft' when available, 'numpy.fft' otherwise.
+    multithreaded: bool
+        True if the module supports the 'workers' parameter.
+    """
+    try:
+        import scipy.fft as fftpack
+        return fftpack, True
+    except ImportError:
+        return numpy.fft, False
+
+
+def b3_spline(x):
+    """ The cubic B-spline function.
+
+    Parameters
+    ----------
+    x: ndarray
+        the input values.
+
+    Returns
+    -------
+    y: ndarray
+        the B-spline values, null outside [-2, 2].
+    """
+    x = numpy.abs(x)
+    return (numpy.abs(x - 2) ** 3 - 4 * numpy.abs(x - 1) ** 3 + 6 * x ** 3 -
+            4 * (x + 1) ** 3 + (x + 2) ** 3) / 12.
+
+
+def b3_scaling(freq):
+    """ The B-spline scaling function spectrum, null above 1/2.
+
+    Parameters
+    ----------
+    freq: ndarray
+        the radial frequencies in cycles per sample.
+
+    Returns
+    -------
+    spectrum: ndarray
+        the scaling function spectrum, equal to 1 at the origin.
+    """
+    return 1.5 * b3_spline(4 * freq)
+
+
+def meyer_scaling(freq):
+    """ The Meyer scaling function spectrum, equal to 1 below 1/8 and null
+    above 1/4.
+
+    Parameters
+    ----------
+    freq: ndarray
+        the radial frequencies in cycles per sample.
+
+    Returns
+    -------
+    spectrum: ndarray
+        the scaling function spectrum.
+    """
+    x = numpy.clip(8 * freq - 1, 0, 1)
+    nu = x ** 4 * (35 - 84 * x + 70 * x ** 2 - 20 * x ** 3)
+    return numpy.cos(numpy.pi / 2 * nu)
+
+
+def radial_frequencies(shape):
+    """ The radial frequencies of the real FFT of an array.
+
+    Parameters
+    ----------
+    shape: uplet
+        the array shape.
+
+    Returns
+    -------
+    freq: ndarray
+        the radial frequencies in cycles per sample on the real FFT grid.
+    """
+    axes_freqs = [numpy.fft.fftfreq(size) for size in shape[:-1]]
+    axes_freqs.append(numpy.fft.rfftfreq(shape[-1]))
+    grids = numpy.meshgrid(*axes_freqs, indexing="ij")
+    return numpy.sqrt(sum(grid ** 2 for grid in grids))
+
+
+class FourierTransform(object):
+    """ Wavelet transforms computed in Fourier space.
+
+    The 'undecimated' filter gives an isotropic undecimated transform whose
+    bands sum to the signal. The other filters give pyramidal transforms:
+    at each scale the signal spectrum is split by a low pass filter 'H' with
+    a cut-off at 1/4 and the approximation is decimated by cropping its
+    spectrum; the last approximation is not decimated. The detail bands are
+    obtained with:
+
+    - 'algo1': 1 - H (difference between two resolutions).
+    - 'algo2': 1 - H^2 (difference between the square of two resolutions).
+    - 'meyer' and 'isotropic': sqrt(1 - H^2), a tight frame using
+      respectively the Meyer and the B-spline low pass filter.
+    """
+    def __init__(self, nb_scale, filter_name="undecimated", dim=2,
+                 workers=1):
+        """ Initialize the FourierTransform class.
+
+        Parameters
+        ----------
+        nb_scale: int
+            the number of scale of the decomposition that includes the
+            approximation scale.
+        filter_name: str, default 'undecimated'
+            the transform filters.
+        dim: int, default 2
+            the data dimension.
+        workers: int, default 1
+            the number of FFT threads. The transforms are already run
+            concurrently by the batches and the process pools, so a single
+            thread avoids oversubscribing the CPUs.
+        """
+        if filter_name not in FILTERS:
+            raise ValueError("'{0}' is not a valid filter, should be one of "
+                             "{1}".format(filter_name, FILTERS))
+        if nb_scale < 2:
+            raise ValueError("Expect at least two scales.")
+        self.nb_scale = nb_scale
+        self.filter_name = filter_name
+        self.dim = dim
+        self.workers = workers
+        self.fftpack, multithreaded = get_fftpack()
+        self.fft_kwargs = {}
+        if multithreaded:
+            self.fft_kwargs["workers"] = workers
+        self._spectra = {}
+        self._lock = threading.Lock()
+
+    def transform(self, data, save=False):
+        """ Decompose a signal.
+
+        Parameters
+        ----------
+        data: ndarray
+            the signal to be decomposed.
+        save: bool, default False
+            not used, for compatibility with the bindings.
+
+        Returns
+        -------
+        bands: list of ndarray
+            the decomposition bands, from the finest scale to the
+            approximation.
+        nb_band_per_scale: list of int
+            the number of band per scale.
+        """
+        bands = self.transform_batch(numpy.asarray(data)[numpy.newaxis])
+        return [band[0] for band in bands], [1] * self.nb_scale
+
+    def reconstruct(self, bands):
+        """ Reconstruct a signal.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands.
+
+        Returns
+        -------
+        data: ndarray
+            the reconstructed signal.
+        """
+        return self.reconstruct_batch(
+            [numpy.asarray(band)[numpy.newaxis] for band in bands])[0]
+
+    def transform_batch(self, stack):
+        """ Decompose a stack of signals, the FFTs being computed on the
+        whole stack at once.
+
+        Parameters
+        ----------
+        stack: ndarray (N, ...)
+            the signals to be decomposed stacked along the first axis.
+
+        Returns
+        -------
+        bands: list of ndarray
+            the decomposition bands with a leading batch axis.
+        """
+        stack = numpy.asarray(stack, dtype=float)
+        if stack.ndim != self.dim + 1:
+            raise ValueError("Expect a stack of {0}D signals.".format(
+                self.dim))
+        shape = stack.shape[1:]
+        spectrum = self._rfftn(stack)
+        if self.filter_name == "undecimated":
+            return [self._irfftn(spectrum * band_filter, shape)
+                    for band_filter in self._get_spectra(shape)]
+        bands = []
+        for scale, (shape, low, detail, _, _) in enumerate(
+                self._get_spectra(shape)):
+            bands.append(self._irfftn(spectrum * detail, shape))
+            spectrum = spectrum * low
+            if scale < self.nb_scale - 2:
+                spectrum = self._resize(spectrum, shape, self._next(shape))
+            else:
+                bands.append(self._irfftn(spectrum, shape))
+        return bands
+
+    def reconstruct_batch(self, bands, out=None):
+        """ Reconstruct a stack of signals.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands with a leading batch axis.
+        out: ndarray (N, ...), default None
+            if set, the reconstructed signals are written in this array:
+            the undecimated bands are summed in place, the pyramidal
+            reconstruction being copied from the inverse FFT output.
+
+        Returns
+        -------
+        data: ndarray (N, ...)
+            the reconstructed signals.
+        """
+        if self.filter_name == "undecimated":
+            if out is None:
+                data = numpy.array(bands[0], dtype=float)
+            else:
+                data = out
+                numpy.copyto(data, bands[0])
+            for band in bands[1:]:
+                data += band
+            return data
+        shape = bands[0].shape[1:]
+        spectra = self._get_spectra(shape)
+        spectrum = None
+        for scale in range(self.nb_scale - 2, -1, -1):
+            shape, _, _, low, detail = spectra[scale]
+            if spectrum is None:
+                spectrum = self._rfftn(bands[-1])
+            else:
+                spectrum = self._resize(spectrum, self._next(shape), shape)
+            spectrum *= low
+            spectrum += self._rfftn(bands[scale]) * detail
+        data = self._irfftn(spectrum, shape)
+        if out is not None:
+            numpy.copyto(out, data)
+            data = out
+        return data
+
+    def _rfftn(self, stack):
+        """ Real FFT over the signals axes.
+        """
+        axes = tuple(range(1, stack.ndim))
+        return self.fftpack.rfftn(stack, axes=axes, **self.fft_kwargs)
+
+    def _irfftn(self, spectrum, shape):
+        """ Inverse real FFT over the signals axes.
+        """
+        axes = tuple(range(1, spectrum.ndim))
+        return self.fftpack.irfftn(
+            spectrum, s=shape, axes=axes, **self.fft_kwargs)
+
+    def _next(self, shape):
+        """ The signal shape at the next scale.
+        """
+        return tuple(size // 2 for size in shape)
+
+    def _resize(self, spectrum, shape, new_shape):
+        """ Crop or zero-pad a real FFT spectrum to change the signal size,
+        the signal being band-limited.
+        """
+        small_shape = tuple(min(a, b) for a, b in zip(shape, new_shape))
+        indices = []
+        for size, small_size in zip(shape[:-1], small_shape[:-1]):
+            indices.append(numpy.r_[0: (small_size + 1) // 2,
+                                    size - small_size // 2: size])
+        indices.append(numpy.arange(small_shape[-1] // 2 + 1))
+        factor = float(numpy.prod(new_shape)) / numpy.prod(shape)
+        if numpy.prod(new_shape) < numpy.prod(shape):
+            return spectrum[(Ellipsis, ) + numpy.ix_(*indices)] * factor
+        new_indices = []
+        for size, small_size in zip(new_shape[:-1], small_shape[:-1]):
+            new_indices.append(numpy.r_[0: (small_size + 1) // 2,
+                                        size - small_size // 2: size])
+        new_indices.append(indices[-1])
+        resized = numpy.zeros(
+            spectrum.shape[:1] + new_shape[:-1] + (new_shape[-1] // 2 + 1, ),
+            dtype=spectrum.dtype)
+        resized[(Ellipsis, ) + numpy.ix_(*new_indices)] = spectrum * factor
+        return resized
+
+    def _get_spectra(self, shape):
+        """ Get the cached filters spectra for a signal shape.
+
+        Parameters
+        ----------
+        shape: uplet
+            the signal shape.
+
+        Returns
+        -------
+        spectra: list
+            for the undecimated transform, the filter of each band. For the
+            pyramidal transforms, for each scale, the signal shape, the
+            analysis low pass and detail filters, and the synthesis low pass
+            and detail filters.
+        """
+        shape = tuple(shape)
+        with self._lock:
+            if shape not in self._spectra:
+                self._spectra[shape] = self._compute_spectra(shape)
+            return self._spectra[shape]
+
+    def _compute_spectra(self, shape):
+        """ Compute the filters spectra for a signal shape.
+        """
+        if self.filter_name == "undecimated":
+            freq = radial_frequencies(shape)
+            previous = numpy.ones_like(freq)
+            spectra = []
+            for scale in range(self.nb_scale - 1):
+                low = b3_scaling(2 ** scale * freq)
+                spectra.append(previous - low)
+                previous = low
+            spectra.append(previous)
+            return spectra
+        spectra = []
+        for scale in range(self.nb_scale - 1):
+            freq = radial_frequencies(shape)
+            if self.filter_name == "meyer":
+                low = meyer_scaling(freq)
+            else:
+                low = b3_scaling(2 * freq)
+            if self.filter_name == "algo1":
+                filters = (low, 1 - low, 1, 1)
+            elif self.filter_name == "algo2":
+                filters = (low, 1 - low ** 2, low, 1)
+            else:
+                detail = numpy.sqrt(numpy.clip(1 - low ** 2, 0, None))
+                filters = (low, detail, low, detail)
+            spectra.append((shape, ) + filters)
+            shape = self._next(shape)
+        return spectra
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Memory-mapped codec of the ISAP decompositions ('.mr' files).
+
+A '.mr' file is a single HDU FITS file: the header is parsed, and the
+coefficients cube is memory-mapped so that the decomposition bands are
+exposed as views of the file, in pysap order, without any intermediate
+buffer.
+"""
+
+# Third party import
+import numpy
+
+
+# Global parameters
+# > the FITS block size in bytes
+BLOCK_SIZE = 2880
+# > the FITS card size in bytes
+CARD_SIZE = 80
+# > the data types associated to the FITS 'BITPIX' values
+BITPIX_DTYPES = {
+    8: numpy.dtype("u1"),
+    16: numpy.dtype(">i2"),
+    32: numpy.dtype(">i4"),
+    64: numpy.dtype(">i8"),
+    -32: numpy.dtype(">f4"),
+    -64: numpy.dtype(">f8")}
+
+
+class MRFile(object):
+    """ A memory-mapped ISAP decomposition file.
+
+    The coefficients are available through the 'data' memory-mapped cube,
+    and the decomposition bands through 'bands'.
+    """
+    def __init__(self, path, mode="r"):
+        """ Initialize the MRFile class.
+
+        Parameters
+        ----------
+        path: str
+            the '.mr' file path.
+        mode: str, default 'r'
+            the memory map mode: 'r' to read the file, 'r+' to also modify
+            the coefficients in place.
+        """
+        if mode not in ("r", "r+"):
+            raise ValueError("'{0}' is not a valid mode.".format(mode))
+        self.path = path
+        self.mode = mode
+        header, offset = self._read_header(path)
+        self.metadata = dict(header.items())
+        self.metadata["path"] = path
+        dtype, shape = self._get_layout(self.metadata)
+        self.data = numpy.memmap(path, dtype=dtype, mode=mode, offset=offset,
+                                 shape=shape)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @classmethod
+    def create(cls, path, metadata, shape=None):
+        """ Create a zero filled single precision '.mr' file.
+
+        Parameters
+        ----------
+        path: str
+            the '.mr' file path, overwritten if it exists.
+        metadata: dict
+            the decomposition parameters, as returned by the analysis.
+        shape: tuple of int, default None
+            the coefficients cube shape, by default described by the
+            'NAXIS' metadata.
+
+        Returns
+        -------
+        mrfile: MRFile
+            the created file, opened in 'r+' mode.
+        """
+        import astropy.io.fits as pyfits
+        if shape is None:
+            shape = tuple(
+                metadata["NAXIS{0}".format(axis)]
+                for axis in range(metadata["NAXIS"], 0, -1))
+        header = pyfits.Header()
+        header["SIMPLE"] = True
+        header["BITPIX"] = -32
+        header["NAXIS"] = len(shape)
+        for axis, size in enumerate(reversed(shape)):
+            header["NAXIS{0}".format(axis + 1)] = size
+        for key, value in metadata.items():
+            if not cls._is_structural(key):
+                header[key] = value
+        header = header.tostring().encode("ascii")
+        nb_bytes = int(numpy.prod(shape)) * 4
+        nb_bytes += -nb_bytes % BLOCK_SIZE
+        with open(path, "wb") as open_file:
+            open_file.write(header)
+            open_file.truncate(len(header) + nb_bytes)
+        return cls(path, mode="r+")
+
+    def bands(self, trf, copy=False):
+        """ Get the decomposition bands.
+
+        Parameters
+        ----------
+        trf: ISAPWaveletTransformBase
+            the transformation that generated the decomposition.
+        copy: bool, default False
+            if set, the coefficients are first copied in a single native
+            single precision array, otherwise the bands are views of the
+            file.
+
+        Returns
+        -------
+        bands: list of nd-array
+            the decomposition bands in pysap order.
+        """
+        cube = self.data
+        if copy:
+            cube = numpy.array(cube, dtype=numpy.single)
+        return trf.views_fct(cube, trf)
+
+    def flush(self):
+        """ Write the modified coefficients to the file.
+        """
+        if self.data is not None and self.mode != "r":
+            self.data.flush()
+
+    def close(self):
+        """ Release the memory map, the modified coefficients being written
+        to the file.
+        """
+        self.flush()
+        self.data = None
+
+    @staticmethod
+    def _read_header(path):
+        """ Read the primary header of a FITS file.
+
+        Parameters
+        ----------
+        path: str
+            the FITS file path.
+
+        Returns
+        -------
+        header: astropy.io.fits.Header
+            the primary header.
+        offset: int
+            the data position in the file.
+        """
+        import astropy.io.fits as pyfits
+        blocks = []
+        with open(path, "rb") as open_file:
+            while True:
+                block = open_file.read(BLOCK_SIZE)
+                if len(block) != BLOCK_SIZE:
+                    raise ValueError(
+                        "'{0}' is not a valid FITS file.".format(path))
+                blocks.append(block)
+                cards = [block[idx: idx + CARD_SIZE]
+                         for idx in range(0, BLOCK_SIZE, CARD_SIZE)]
+                if any(card.rstrip() == b"END" for card in cards):
+                    break
+        header = pyfits.Header.fromstring(b"".join(blocks).decode("ascii"))
+        return header, BLOCK_SIZE * len(blocks)
+
+    @staticmethod
+    def _get_layout(metadata):
+        """ Get the data type and shape of the coefficients cube.
+
+        Parameters
+        ----------
+        metadata: dict
+            the FITS header.
+
+        Returns
+        -------
+        dtype: numpy.dtype
+            the coefficients data type, in the file byte order.
+        shape: tuple of int
+            the coefficients cube shape.
+        """
+        if metadata.get("BSCALE", 1) != 1 or metadata.get("BZERO", 0) != 0:
+            raise ValueError("Scaled FITS data are not supported.")
+        dtype = BITPIX_DTYPES.get(metadata.get("BITPIX"))
+        if dtype is None:
+            raise ValueError("'{0}' is not a valid FITS BITPIX.".format(
+                metadata.get("BITPIX")))
+        shape = tuple(
+            metadata["NAXIS{0}".format(axis)]
+            for axis in range(metadata["NAXIS"], 0, -1))
+        return dtype, shape
+
+    @staticmethod
+    def _is_structural(key):
+        """ Check if a FITS keyword describes the data layout or the file
+        location, and must not be copied from a decomposition metadata.
+        """
+        key = key.upper()
+        return (key in ("SIMPLE", "BITPIX", "NAXIS", "EXTEND", "BSCALE",
+                        "BZERO", "PATH") or
+                (key.startswith("NAXIS") and key[5:].isdigit()))
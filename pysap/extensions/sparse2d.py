@@ -8,7 +8,7 @@
 ##########################################################################
 
 # System import
-
+import os
 import warnings
 
 # Package import
@@ -17,6 +17,10 @@ import pysap.base.utils as utils
 
 from pysap.base.transform import MetaRegister  # for the metaclass
 from pysap.base import image
+from pysap.base.results import ResultCache
+from pysap.base.results import digest_file
+from pysap.base.results import digest_array
+from pysap.base.results import get_result_cache
 
 
 try:
@@ -27,7 +31,63 @@ except ImportError:  # pragma: no cover
 
 # Third party import
 import numpy as np
-import matplotlib.pyplot as plt
+
+
+# Global parameters
+# > the bindings parameters holding input files, keyed by their content
+INPUT_FILES = ("rms_map", "mask_file_name", "flat_image", "first_guess",
+               "icf_filename")
+# > the bindings parameters holding output files: the computations writing
+#   such files are not cached
+OUTPUT_FILES = ("support_file_name", "prob_mr_file")
+
+
+def cached_call(name, kwargs, function, *arrays):
+    """ Run a bindings computation, its result being taken from the result
+    cache when enabled.
+
+    The key depends on the input files content but not on the verbosity.
+    The computations writing output files are not cached, as only the
+    returned array is stored.
+
+    Parameters
+    ----------
+    name: str
+        the computation name.
+    kwargs: dict
+        the bindings parameters.
+    function: callable
+        the bindings computation returning an array.
+    arrays: nd-array
+        the computation inputs.
+
+    Returns
+    -------
+    result: nd-array
+        the computation result.
+    """
+    cache = get_result_cache()
+    if cache is None or any(kwargs.get(key) for key in OUTPUT_FILES):
+        return function(*arrays)
+    params = {}
+    for key, value in kwargs.items():
+        if key == "verbose":
+            continue
+        if key in INPUT_FILES and value:
+            if not os.path.isfile(value):
+                return function(*arrays)
+            value = ["input", digest_file(value)]
+        params[key] = value
+    stat = os.stat(pysparse.__file__)
+    key = ResultCache.key(
+        "bindings", name, stat.st_size, stat.st_mtime, params,
+        [digest_array(arr) for arr in arrays])
+    result = cache.fetch_arrays(key, 1)
+    if result is not None:
+        return result[0]
+    result = function(*arrays)
+    cache.store_arrays(key, [result])
+    return result
 
 
 class Filter():
@@ -55,6 +115,7 @@ class Filter():
 
         """
         self.data = None
+        self.kwargs = kwargs
         self.flt = pysparse.MRFilters(**kwargs)
 
     def filter(self, data):
@@ -65,7 +126,8 @@ class Filter():
         data: ndarray
             the input data.
         """
-        self.data = pysap.Image(data=self.flt.filter(data))
+        self.data = pysap.Image(data=cached_call(
+            "filter", self.kwargs, self.flt.filter, data))
 
     def show(self):  # pragma: no cover
         """ Show the filtered data.
@@ -113,6 +175,7 @@ class Deconvolve():
         mean_gauss: float
         """
         self.data = None
+        self.kwargs = kwargs
         self.deconv = pysparse.MRDeconvolve(**kwargs)
 
     def deconvolve(self, img, psf):
@@ -125,7 +188,8 @@ class Deconvolve():
         psf: ndarray
             the input psf
         """
-        self.data = pysap.Image(data=self.deconv.deconvolve(img, psf))
+        self.data = pysap.Image(data=cached_call(
+            "deconvolve", self.kwargs, self.deconv.deconvolve, img, psf))
 
     def show(self):  # pragma: no cover
         """ Show the deconvolved data.
@@ -139,6 +203,13 @@ class MR2D1D():
     """ Define the structure that will be used to
         store the MR2D1D transform and reconstruction
         results.
+
+        The decomposition is stored in the flat 'coeffs' array, described by
+        the 'band_table' array with one row per band: the 2D and 1D band
+        indices, the band nx, ny and nz, and the band offset. The 'bands'
+        attribute gives the (nz, ny, nx) views of the bands indexed by
+        [s2d][s1d]. The 'cube' attribute gives the legacy format, where each
+        band is preceded by its size.
     """
     def __init__(self, **kwargs):
         """ Define the transform.
@@ -153,10 +224,43 @@ class MR2D1D():
         number_of_scales: int
 
         """
-        self.cube = None
+        self.coeffs = None
+        self.band_table = None
+        self.bands = None
         self.recons = None
         self.trf = pysparse.MR2D1D(**kwargs)
 
+    @property
+    def cube(self):
+        """ The decomposition in the legacy format: the number of 2D and 1D
+        bands, followed by the size and the coefficients of each band.
+        """
+        if self.coeffs is None:
+            return None
+        nb_band_2d, nb_band_1d = self.band_table[-1, :2] + 1
+        parts = [np.array([nb_band_2d, nb_band_1d], dtype=self.coeffs.dtype)]
+        for row, band in zip(self.band_table, self._iter_bands()):
+            parts.append(row[2: 5].astype(self.coeffs.dtype))
+            parts.append(band.ravel())
+        return np.concatenate(parts)
+
+    def _iter_bands(self):
+        """ Iterate over the bands views in the bands table order.
+        """
+        for row in self.band_table:
+            yield self.bands[row[0]][row[1]]
+
+    def _set_coeffs(self, coeffs, band_table):
+        """ Store the flat coefficients and create the bands views.
+        """
+        self.coeffs = coeffs
+        self.band_table = band_table
+        nb_band_2d, nb_band_1d = band_table[-1, :2] + 1
+        self.bands = [[None] * nb_band_1d for _ in range(nb_band_2d)]
+        for s2d, s1d, nx, ny, nz, offset in band_table:
+            self.bands[s2d][s1d] = coeffs[
+                offset: offset + nx * ny * nz].reshape(nz, ny, nx)
+
     def transform(self, data):
         """ Execute the transform operation.
 
@@ -165,14 +269,37 @@ class MR2D1D():
         data: ndarray
             the input data.
         """
-        self.cube = self.trf.transform(data)
+        self._set_coeffs(*self.trf.transform(data))
 
-    def reconstruct(self, data):
+    def reconstruct(self, data=None):
         """ Execute the reconstructiom operation.
 
         Parameters
         ----------
-        data: ndarray
-            the input data.
+        data: ndarray or list of list of ndarray, default None
+            the flat coefficients, the bands indexed by [s2d][s1d], or the
+            legacy format cube. By default, use the current coefficients.
         """
+        band_table = self.trf.band_table()
+        if len(band_table) == 0:
+            raise ValueError("No bands table available: run transform "
+                             "first.")
+        nb_coeffs = band_table[-1, 5] + np.prod(band_table[-1, 2: 5])
+        if data is None:
+            if self.coeffs is None:
+                raise ValueError("No coefficients available: run transform "
+                                 "first or specify the coefficients.")
+            data = self.coeffs
+        elif isinstance(data, (list, tuple)):
+            data = np.concatenate([
+                np.ravel(data[s2d][s1d])
+                for s2d, s1d in band_table[:, :2]])
+        else:
+            data = np.ravel(data)
+            if data.size == nb_coeffs + 2 + 3 * len(band_table):
+                bands = []
+                for index, row in enumerate(band_table):
+                    start = 2 + 3 * (index + 1) + row[5]
+                    bands.append(data[start: start + np.prod(row[2: 5])])
+                data = np.concatenate(bands)
         self.recons = self.trf.reconstruct(data)
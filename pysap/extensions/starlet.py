@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+Pure NumPy 'a trous' (starlet) wavelet transform engine.
+
+This engine exposes the same 'transform'/'reconstruct' interface as the
+sparse2d bindings transformation objects, and is used by the 'a trous'
+transforms created with 'engine="numpy"'.
+
+The bands layout is the ISAP one. Known differences with the ISAP
+coefficients:
+
+- the coefficients are computed in double precision (single precision in
+  ISAP), so that both differ by about 1e-6 relatively.
+- the ISAP borders are mapped to the numpy padding modes listed in
+  'PADDING_MODES': the ISAP mirror border is the numpy 'reflect' mode
+  (the edge sample is not repeated).
+- the coefficients are checked against the 'a trous' definition, not
+  against stored ISAP decompositions.
+"""
+
+# Third party import
+import numpy
+
+
+# Global parameters
+# > the separable smoothing kernels
+KERNELS = {
+    "b3": numpy.array([1., 4., 6., 4., 1.]) / 16.,
+    "linear": numpy.array([1., 2., 1.]) / 4.
+}
+# > the ISAP borders as numpy padding modes
+PADDING_MODES = {
+    "zero": "constant",
+    "constant": "edge",
+    "symmetric": "reflect",
+    "periodic": "wrap"
+}
+
+
+class StarletTransform(object):
+    """ Undecimated isotropic wavelet transform computed with the 'a trous'
+    algorithm.
+
+    At each scale j the signal is smoothed with the separable kernel
+    dilated by 2**j, the wavelet coefficients being the difference between
+    two successive approximations. The reconstruction is the sum of all
+    the bands.
+    """
+    def __init__(self, nb_scale, kernel="b3", padding_mode="zero", dim=2):
+        """ Initialize the StarletTransform class.
+
+        Parameters
+        ----------
+        nb_scale: int
+            the number of scale of the decomposition that includes the
+            approximation scale.
+        kernel: str, default 'b3'
+            the smoothing kernel: 'b3' (cubic B-spline) or 'linear'.
+        padding_mode: str, default 'zero'
+            the borders: 'zero', 'constant', 'symmetric' or 'periodic'.
+        dim: int, default 2
+            the data dimension.
+        """
+        if kernel not in KERNELS:
+            raise ValueError("'{0}' is not a valid kernel, should be one of "
+                             "{1}".format(kernel, sorted(KERNELS)))
+        if padding_mode not in PADDING_MODES:
+            raise ValueError("'{0}' is not a valid padding mode, should be "
+                             "one of {1}".format(
+                                 padding_mode, sorted(PADDING_MODES)))
+        self.nb_scale = nb_scale
+        self.kernel = KERNELS[kernel]
+        self.padding_mode = padding_mode
+        self.dim = dim
+
+    def transform(self, data, save=False):
+        """ Decompose a signal.
+
+        Parameters
+        ----------
+        data: ndarray
+            the signal to be decomposed.
+        save: bool, default False
+            not used, for compatibility with the bindings.
+
+        Returns
+        -------
+        bands: list of ndarray
+            the decomposition bands, from the finest scale to the
+            approximation.
+        nb_band_per_scale: list of int
+            the number of band per scale.
+        """
+        bands = self.transform_batch(numpy.asarray(data)[numpy.newaxis])
+        return [band[0] for band in bands], [1] * self.nb_scale
+
+    def reconstruct(self, bands):
+        """ Reconstruct a signal.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands.
+
+        Returns
+        -------
+        data: ndarray
+            the reconstructed signal.
+        """
+        return self.reconstruct_batch(bands)
+
+    def transform_batch(self, stack, out=None):
+        """ Decompose a stack of signals.
+
+        Parameters
+        ----------
+        stack: ndarray (N, ...)
+            the signals to be decomposed stacked along the first axis.
+        out: list of ndarray, default None
+            if set, the decomposition bands are written in these arrays,
+            the smoothed signals being still allocated at each scale.
+
+        Returns
+        -------
+        bands: list of ndarray
+            the decomposition bands with a leading batch axis.
+        """
+        stack = numpy.asarray(stack)
+        if stack.ndim != self.dim + 1:
+            raise ValueError("Expect a stack of {0}D signals.".format(
+                self.dim))
+        dtype = numpy.result_type(stack.dtype, numpy.float32)
+        if out is None:
+            approximation = numpy.array(stack, dtype=dtype)
+        else:
+            approximation = numpy.asarray(stack, dtype=dtype)
+        bands = []
+        for scale in range(self.nb_scale - 1):
+            smooth = self._smooth(approximation, 2 ** scale)
+            band = approximation if out is None else out[scale]
+            numpy.subtract(approximation, smooth, out=band)
+            bands.append(band)
+            approximation = smooth
+        if out is not None:
+            numpy.copyto(out[-1], approximation)
+            approximation = out[-1]
+        bands.append(approximation)
+        return bands
+
+    def reconstruct_batch(self, bands, out=None):
+        """ Reconstruct a stack of signals.
+
+        Parameters
+        ----------
+        bands: list of ndarray
+            the decomposition bands, possibly with leading batch axes.
+        out: ndarray, default None
+            if set, the reconstructed signals are written in this array.
+
+        Returns
+        -------
+        data: ndarray
+            the reconstructed signals.
+        """
+        if out is None:
+            data = numpy.array(bands[0], copy=True)
+        else:
+            data = out
+            numpy.copyto(data, bands[0])
+        for band in bands[1:]:
+            data += band
+        return data
+
+    def _smooth(self, stack, step):
+        """ Smooth a stack of signals with the separable kernel dilated by
+        a step.
+
+        Parameters
+        ----------
+        stack: ndarray (N, ...)
+            the signals stacked along the first axis.
+        step: int
+            the distance between two kernel taps.
+
+        Returns
+        -------
+        smooth: ndarray (N, ...)
+            the smoothed signals.
+        """
+        half = (len(self.kernel) // 2) * step
+        for axis in range(1, stack.ndim):
+            size = stack.shape[axis]
+            pad_width = [(0, 0)] * stack.ndim
+            pad_width[axis] = (half, half)
+            padded = numpy.pad(
+                stack, pad_width, mode=PADDING_MODES[self.padding_mode])
+            smooth = numpy.zeros_like(stack)
+            tmp = numpy.empty_like(stack)
+            index = [slice(None)] * stack.ndim
+            for tap, weight in enumerate(self.kernel):
+                index[axis] = slice(tap * step, tap * step + size)
+                numpy.multiply(padded[tuple(index)], weight, out=tmp)
+                smooth += tmp
+            stack = smooth
+        return stack
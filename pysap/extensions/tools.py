@@ -7,10 +7,107 @@
 # for details.
 ##########################################################################
 
+# System import
+import os
+import inspect
+import functools
+
 # Package import
 from .wrapper import Sparse2dWrapper
-
-
+from .wrapper import find_executable
+from pysap.base.results import ResultCache
+from pysap.base.results import digest_file
+from pysap.base.results import get_result_cache
+
+
+def sparse2d_command(func=None, outputs=None):
+    """ Decorator executing the command generated by a Sparse2d wrapping
+    function.
+
+    The generated command is available without being executed through the
+    'command' attribute of the decorated function. When the result cache
+    is enabled, the outputs of a command already run on the same inputs
+    with the same parameters are copied from the cache.
+
+    Parameters
+    ----------
+    func: callable
+        the function generating the Sparse2d command, with a 'verbose'
+        parameter.
+    outputs: list of str, default None
+        the parameters holding the command output files, by default the
+        parameters starting with 'out_'.
+
+    Returns
+    -------
+    decorated: callable
+        the function executing the generated command.
+    """
+    if func is None:
+        return functools.partial(sparse2d_command, outputs=outputs)
+    signature = inspect.signature(func)
+    if outputs is None:
+        outputs = [name for name in signature.parameters
+                   if name.startswith("out_")]
+
+    @functools.wraps(func)
+    def decorated(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        cmd = func(*args, **kwargs)
+        process = Sparse2dWrapper(verbose=arguments.arguments["verbose"])
+        cache = get_result_cache()
+        if cache is None:
+            process(cmd)
+            return
+        paths = [arguments.arguments[name] for name in outputs
+                 if arguments.arguments[name] is not None]
+        key = _command_key(func, arguments, paths)
+        if not cache.fetch(key, paths):
+            process(cmd)
+            cache.store(key, paths)
+
+    decorated.command = func
+    decorated.outputs = outputs
+    return decorated
+
+
+def _command_key(func, arguments, outputs):
+    """ Compute the result cache key of a Sparse2d command.
+
+    The key depends on the command executable, on the input files content
+    and on the other parameters, but not on the output files location nor
+    on the verbosity.
+
+    Parameters
+    ----------
+    func: callable
+        the function generating the Sparse2d command.
+    arguments: inspect.BoundArguments
+        the function parameters, with the defaults applied.
+    outputs: list of str
+        the command output files.
+
+    Returns
+    -------
+    key: str
+        the result cache key.
+    """
+    cmd = func(**dict(arguments.arguments, verbose=False))
+    stat = os.stat(find_executable(cmd[0]))
+    parts = ["command", cmd[0], stat.st_size, stat.st_mtime]
+    for elem in cmd[1:]:
+        if elem in outputs:
+            parts.append(["output", outputs.index(elem),
+                          os.path.splitext(elem)[1]])
+        elif isinstance(elem, str) and os.path.isfile(elem):
+            parts.append(["input", digest_file(elem)])
+        else:
+            parts.append(str(elem))
+    return ResultCache.key(*parts)
+
+
+@sparse2d_command
 def mr_transform(
         in_image, out_mr_file, type_of_multiresolution_transform=2,
         type_of_lifting_transform=3, number_of_scales=4,
@@ -44,11 +141,10 @@ def mr_transform(
         cmd += ["-L"]
     cmd += [in_image, out_mr_file]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command
 def mr_filter(
         in_image, out_image, type_of_filtering=1, coef_detection_method=1,
         type_of_multiresolution_transform=2, type_of_filters=1,
@@ -84,11 +180,10 @@ def mr_filter(
         cmd += ["-K"]
     cmd += [in_image, out_image]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command(outputs=["out_image", "residual_file_name"])
 def mr_deconv(
         in_image, in_psf, out_image, type_of_deconvolution=3,
         type_of_multiresolution_transform=2, type_of_filters=1,
@@ -149,11 +244,10 @@ def mr_deconv(
 
     cmd += [in_image, in_psf, out_image]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command
 def mr_recons(
         in_mr_file, out_image, verbose=False):
     """ Wrap the Sparse2d 'mr_recons'.
@@ -164,11 +258,10 @@ def mr_recons(
         cmd.append("-v")
     cmd += [in_mr_file, out_image]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command
 def mr3d_recons(in_mr_file, out_image, verbose=False):
     """ Wrap the Sparse2d 'mr3d_recons'.
     """
@@ -178,11 +271,10 @@ def mr3d_recons(in_mr_file, out_image, verbose=False):
         cmd.append("-v")
     cmd += [in_mr_file, out_image]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command
 def mr3d_transform(
         in_image, out_mr_file, type_of_multiresolution_transform=2,
         type_of_lifting_transform=3, number_of_scales=4,
@@ -231,11 +323,10 @@ def mr3d_transform(
 
     cmd += [in_image, out_mr_file]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command
 def mr3d_filter(
         in_image, out_image,
         type_of_multiresolution_transform=2, type_of_filters=1,
@@ -263,11 +354,10 @@ def mr3d_filter(
             cmd += [key, value]
     cmd += [in_image, out_image]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    process(cmd)
+    return cmd
 
 
+@sparse2d_command
 def mr2d1d_trans(
         in_image, out_image,
         type_of_multiresolution_transform=14, number_of_scales_2D=5,
@@ -290,6 +380,4 @@ def mr2d1d_trans(
 
     cmd += [in_image, out_image]
 
-    # Execute the command
-    process = Sparse2dWrapper(verbose=verbose)
-    out = process(cmd)
+    return cmd
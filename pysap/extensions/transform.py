@@ -28,13 +28,27 @@ Available transform from pywt are:
 
 # System import
 import os
+import copy
+import hashlib
 import warnings
+import contextlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Package import
 import pysap
 from pysap.base.transform import WaveletTransformBase
+from pysap.base.transform import LazyRegistryEntry
+from pysap.base.plans import PLAN_CACHE
+from pysap.base.plans import TransformPlan
+from pysap.base.scratch import get_scratch_space
 from pysap.extensions import ISAP_FLATTEN
 from pysap.extensions import ISAP_UNFLATTEN
+from pysap.extensions import ISAP_VIEWS
+from pysap.extensions.mrfile import MRFile
+from pysap.extensions.starlet import StarletTransform
+from pysap.extensions.fourier import FourierTransform
 try:
     import pysparse
 except ImportError:
@@ -46,13 +60,40 @@ import numpy
 import pywt
 
 
+# Global parameters
+# > the executor shared by the batch decompositions: its threads are kept
+#   alive so that their bindings transformation objects stay warm
+_BATCH_EXECUTOR = None
+_BATCH_PID = None
+_BATCH_LOCK = threading.Lock()
+
+
+def get_batch_executor():
+    """ Get the executor used to decompose concurrently a stack of signals.
+
+    Returns
+    -------
+    executor: ThreadPoolExecutor
+        the process batch executor, with one worker per CPU, created on first
+        use.
+    """
+    global _BATCH_EXECUTOR, _BATCH_PID
+    with _BATCH_LOCK:
+        if _BATCH_EXECUTOR is None or _BATCH_PID != os.getpid():
+            _BATCH_EXECUTOR = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                thread_name_prefix="pysap-batch")
+            _BATCH_PID = os.getpid()
+        return _BATCH_EXECUTOR
+
+
 class PyWaveletTransformBase(WaveletTransformBase):
     """ Define the structure that will be used to store the pywt results.
     """
     __family__ = "pywt"
 
     def __init__(self, nb_scale, verbose=0, dim=2, is_decimated=True,
-                 axes=None, padding_mode="zero", **kwargs):
+                 axes=None, padding_mode="zero", lean=False, **kwargs):
         """ Initialize the WaveletTransformBase class.
 
         Parameters
@@ -74,13 +115,20 @@ class PyWaveletTransformBase(WaveletTransformBase):
             ways to extend the signal when computing the decomposition.
             See https://pywavelets.readthedocs.io/en/latest/ref/
             signal-extension-modes.html for more explanations.
+        lean: bool, default False
+            with an undecimated transform, compute the decomposition level
+            by level and store the coefficients in single precision.
         """
         # Inheritance
         super(PyWaveletTransformBase, self).__init__(
             nb_scale, verbose=verbose, dim=dim, **kwargs)
 
         # pywt Wavelet transform parameters
+        if lean and is_decimated:
+            raise ValueError("The lean mode is only available for the "
+                             "undecimated transforms.")
         self.is_decimated = is_decimated
+        self.lean = lean
         self.axes = axes
         if padding_mode not in pywt.Modes.modes:
             raise ValueError(
@@ -113,6 +161,8 @@ class PyWaveletTransformBase(WaveletTransformBase):
         if self.is_decimated:
             coeffs = pywt.wavedecn(data, self.trf, mode=self.padding_mode,
                                    level=self.nb_scale, axes=self.axes)
+        elif self.lean:
+            coeffs = list(self._swtn_levels(data, self.axes))[::-1]
         else:
             coeffs = pywt.swtn(data, self.trf, level=self.nb_scale,
                                axes=self.axes)
@@ -145,6 +195,232 @@ class PyWaveletTransformBase(WaveletTransformBase):
             data = pywt.iswtn(coeffs, self.trf, axes=self.axes)
         return data
 
+    def analysis_scales(self):
+        """ Decompose the real signal with the undecimated transform level
+        by level.
+
+        Only the current level is held, so that a caller processing the
+        decomposition scale by scale never stores all the levels. The
+        instance 'analysis_data' is not modified.
+
+        Returns
+        -------
+        levels: generator of dict
+            the bands of each level, from the finest to the coarsest, with
+            the pywt keys, the approximation of the level included.
+        """
+        if self._data is None:
+            raise ValueError("Please specify first the input data.")
+        if self.is_decimated or numpy.iscomplexobj(self._data):
+            raise ValueError("The level by level decomposition is only "
+                             "available for the undecimated transforms of "
+                             "real signals.")
+        return self._swtn_levels(self._data, self.axes)
+
+    def _swtn_levels(self, data, axes):
+        """ Compute the undecimated decomposition level by level, each
+        level being computed from the previous approximation.
+
+        Parameters
+        ----------
+        data: nd-array
+            a real array to be decomposed.
+        axes: list of int
+            axes over which to compute the transform.
+
+        Returns
+        -------
+        levels: generator of dict
+            the bands of each level, from the finest to the coarsest.
+        """
+        data = numpy.asarray(data)
+        if axes is None:
+            axes = range(-self.data_dim, 0)
+        for axis in axes:
+            if data.shape[axis] % 2 ** self.nb_scale != 0:
+                raise ValueError(
+                    "The data shape must be divisible by 2 ** nb_scale "
+                    "along the transformed axes.")
+        dtype = numpy.float32 if self.lean else numpy.float64
+        approx = numpy.asarray(data, dtype=dtype)
+        for level in range(self.nb_scale):
+            coeffs = pywt.swtn(approx, self.trf, level=1, start_level=level,
+                               axes=axes)[0]
+            approx = coeffs["a" * len(next(iter(coeffs)))]
+            yield coeffs
+
+    def _synthesis_delta(self, deltas):
+        """ Reconstruct the changes of some bands using pywt.
+
+        The scales coarser than the coarsest modified scale are skipped,
+        and with a decimated transform the unchanged bands are not
+        filtered.
+
+        Parameters
+        ----------
+        deltas: list of nd-array
+            the change of each band, None for the unchanged bands.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed change.
+        """
+        modified = [delta for delta in deltas if delta is not None]
+        if numpy.iscomplexobj(modified[0]):
+            return super(PyWaveletTransformBase, self)._synthesis_delta(
+                deltas)
+        dtype = numpy.result_type(*modified)
+        if not self.is_decimated:
+            return self._undecimated_synthesis_delta(deltas, dtype)
+        # The unchanged bands are omitted, so that they are not filtered,
+        # and the approximation is cropped as in 'pywt.waverecn'
+        approx = None
+        offset = 0
+        for scale_info in self._analysis_header:
+            scale_deltas = deltas[offset: offset + len(scale_info)]
+            offset += len(scale_info)
+            band_info = dict(
+                (key, delta) for (key, _), delta in zip(
+                    scale_info, scale_deltas) if delta is not None)
+            if offset == len(scale_info):
+                approx = band_info.get("a")
+                continue
+            if approx is None and len(band_info) == 0:
+                continue
+            if approx is not None:
+                key, shape = scale_info[0]
+                band_info["a" * len(key)] = approx[
+                    tuple(slice(size) for size in shape)]
+            approx = pywt.idwtn(band_info, self.trf, mode=self.padding_mode,
+                                axes=self.axes)
+        return approx
+
+    def _undecimated_synthesis_delta(self, deltas, dtype):
+        """ Reconstruct the changes of some bands of an undecimated
+        transform, starting from the coarsest modified level.
+
+        Only the approximation of the coarsest level is used by the
+        reconstruction, so that the changes of the other approximations
+        are ignored, as in the full synthesis.
+
+        Parameters
+        ----------
+        deltas: list of nd-array
+            the change of each band, None for the unchanged bands.
+        dtype: numpy.dtype
+            the changes data type.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed change.
+        """
+        coeffs = []
+        offset = 0
+        for level, scale_info in enumerate(self._analysis_header):
+            scale_deltas = deltas[offset: offset + len(scale_info)]
+            offset += len(scale_info)
+            used = [delta is not None and (level == 0 or set(key) != {"a"})
+                    for (key, _), delta in zip(scale_info, scale_deltas)]
+            if len(coeffs) == 0 and not any(used):
+                continue
+            band_info = {}
+            for (key, shape), delta in zip(scale_info, scale_deltas):
+                if delta is None or (level > 0 and set(key) == {"a"}):
+                    delta = numpy.zeros(shape, dtype=dtype)
+                band_info[key] = delta
+            coeffs.append(band_info)
+        if len(coeffs) == 0:
+            shape = self._analysis_header[0][0][1]
+            return numpy.zeros(shape, dtype=dtype)
+        return pywt.iswtn(coeffs, self.trf, axes=self.axes)
+
+    def _approximation_bands(self):
+        """ Get the linear indices of the approximation bands.
+
+        Returns
+        -------
+        indices: list of int
+            the approximation bands indices.
+        """
+        keys = [key for scale_info in self._analysis_header
+                for key, _ in scale_info]
+        return [index for index, key in enumerate(keys)
+                if set(key) == set("a")]
+
+    def _batch_axes(self):
+        """ Get the axes over which to compute the transform of a stack of
+        signals stacked along the first axis.
+
+        Returns
+        -------
+        axes: tuple of int
+            the transformed axes, the leading batch axis being excluded.
+        """
+        if self.axes is None:
+            return tuple(range(1, self.data_dim + 1))
+        axes = []
+        for axis in self.axes:
+            if axis >= 0:
+                axis += 1
+            axes.append(axis)
+        return tuple(axes)
+
+    def _analysis_batch(self, stack, **kwargs):
+        """ Decompose a stack of real signals using a single pywt call.
+
+        Parameters
+        ----------
+        stack: nd-array (N, ...)
+            the real signals to be decomposed stacked along the first axis.
+
+        Returns
+        -------
+        analysis_data: list of nd-array
+            the decomposition coefficients with a leading batch axis.
+        analysis_header: dict
+            the decomposition associated information.
+        """
+        axes = self._batch_axes()
+        if self.is_decimated:
+            coeffs = pywt.wavedecn(stack, self.trf, mode=self.padding_mode,
+                                   level=self.nb_scale, axes=axes)
+        elif self.lean:
+            coeffs = list(self._swtn_levels(stack, axes))[::-1]
+        else:
+            coeffs = pywt.swtn(stack, self.trf, level=self.nb_scale,
+                               axes=axes)
+        analysis_data, analysis_header = self._organize_pysap(coeffs)
+        self.nb_band_per_scale = [
+            len(scale_info) for scale_info in analysis_header]
+
+        return analysis_data, analysis_header
+
+    def _synthesis_batch(self, analysis_data, analysis_header):
+        """ Reconstruct a stack of real signals using a single pywt call.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the wavelet coefficients array with a leading batch axis.
+        analysis_header: dict
+            the wavelet decomposition parameters.
+
+        Returns
+        -------
+        data: nd-array (N, ...)
+            the reconstructed data arrays stacked along the first axis.
+        """
+        axes = self._batch_axes()
+        coeffs = self._organize_pywt(analysis_data, analysis_header)
+        if self.is_decimated:
+            data = pywt.waverecn(coeffs, self.trf, mode=self.padding_mode,
+                                 axes=axes)
+        else:
+            data = pywt.iswtn(coeffs, self.trf, axes=axes)
+        return data
+
     def _organize_pysap(self, coeffs):
         """ Organize the coefficients from pywt for pysap.
 
@@ -237,14 +513,51 @@ def pywt_class_factory(func, name, destination_module_globals):
         type(class_name, (PyWaveletTransformBase, ), class_parameters))
 
 
+def get_pywt_class(class_name):
+    """ Get a pywt transform, the class being created on first use.
+
+    Parameters
+    ----------
+    class_name: str
+        the transform class name.
+
+    Returns
+    -------
+    transform: PyWaveletTransformBase
+        the transform class.
+    """
+    with _PYWT_LOCK:
+        if class_name not in destination_module_globals:
+            func, name = PYWT_CLASSES[class_name]
+            pywt_class_factory(func, name, destination_module_globals)
+        return destination_module_globals[class_name]
+
+
+def __getattr__(name):
+    """ Create the pywt transforms accessed as module attributes.
+    """
+    if name in PYWT_CLASSES:
+        return get_pywt_class(name)
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(
+        __name__, name))
+
+
+# Register placeholders for the pywt transforms: the classes are only
+# created when loaded
 destination_module_globals = globals()
+PYWT_CLASSES = {}
+_PYWT_LOCK = threading.Lock()
 for family in pywt.families():
     if family in ("gaus", "mexh", "morl", "cgau", "shan", "fbsp", "cmor"):
         func = pywt.ContinuousWavelet
     else:
         func = pywt.Wavelet
     for name in pywt.wavelist(family):
-        pywt_class_factory(func, name, destination_module_globals)
+        class_name = name.replace(".", "")
+        PYWT_CLASSES[class_name] = (func, name)
+        WaveletTransformBase.REGISTRY[class_name] = LazyRegistryEntry(
+            PyWaveletTransformBase.__family__,
+            functools.partial(get_pywt_class, class_name))
 
 
 class ISAPWaveletTransformBase(WaveletTransformBase):
@@ -256,10 +569,13 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
     __is_decimated__ = None
     __isap_nb_bands__ = None
     __isap_scale_shift__ = 0
+    __starlet_kernel__ = None
+    __fourier_filter__ = None
     __mods__ = ["zero", "constant", "symmetric", "periodic"]
+    __engines__ = ["isap", "numpy"]
 
     def __init__(self, nb_scale, verbose=0, dim=2, padding_mode="zero",
-                 **kwargs):
+                 engine="isap", workers=1, **kwargs):
         """ Initialize the WaveletTransformBase class.
 
         Parameters
@@ -275,6 +591,17 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
             define the data dimension.
         padding_mode: str, default zero
             ways to extend the signal when computing the decomposition.
+        engine: str, default 'isap'
+            the transformation engine: 'isap' uses the Sparse2d bindings,
+            or the Sparse2d command lines when the bindings are not
+            available, 'numpy' uses the in-process NumPy engine available
+            for the 'a trous' and Fourier space transforms. The NumPy
+            engine gives the ISAP bands layout, but computes in double
+            precision, see the 'pysap.extensions.starlet' and
+            'pysap.extensions.fourier' modules for the known differences
+            with the ISAP coefficients.
+        workers: int, default 1
+            the number of FFT threads of the NumPy Fourier space engine.
         """
         # ISAP Wavelet transform parameters
         if hasattr(self, "__family__") and self.__family__ in ("isap-3d", ):
@@ -286,31 +613,54 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
         self.unflatten_fct = None
         self.scales_lengths = None
         self.scales_padds = None
+        self._scratch_record = None
         if padding_mode not in self.__mods__:
             raise ValueError(
                 "'{0}' is not a valid padding mode, should be one of "
                 "{1}".format(padding_mode, self.__mods__))
         self.padding_mode = self.__mods__.index(padding_mode)
-
-        # Inheritance
+        if engine not in self.__engines__:
+            raise ValueError(
+                "'{0}' is not a valid engine, should be one of "
+                "{1}".format(engine, self.__engines__))
+        if (engine == "numpy" and self.__starlet_kernel__ is None and
+                self.__fourier_filter__ is None):
+            raise ValueError("No NumPy engine available for the '{0}' "
+                             "transform.".format(self.__class__.__name__))
+        self.engine = engine
+        self.workers = workers
+
+        # Inheritance: without the bindings, use the command lines unless
+        # the NumPy engine is requested
+        use_wrapping = pysparse is None and engine == "isap"
         super(ISAPWaveletTransformBase, self).__init__(
-            nb_scale, verbose=verbose, dim=dim, use_wrapping=pysparse is None,
+            nb_scale, verbose=verbose, dim=dim, use_wrapping=use_wrapping,
             **kwargs)
 
+    def __getstate__(self):
+        """ The interface to pickle dump call.
+
+        The decomposition file kept for the synthesis is local to the
+        process and is not shared.
+
+        Returns
+        -------
+        state: dict
+            the instance state.
+        """
+        state = super(ISAPWaveletTransformBase, self).__getstate__()
+        state["_scratch_record"] = None
+        return state
+
     def _init_transform(self, **kwargs):
         """ Define the transform.
+
+        The bindings transformation objects are shared through the
+        process-wide plan cache.
         """
         if not self.use_wrapping:
-            kwargs["type_of_multiresolution_transform"] = (
-                self.__isap_transform_id__)
-            kwargs["number_of_scales"] = self.nb_scale
-            if self.data_dim == 2:
-                kwargs["bord"] = self.padding_mode
-                self.trf = pysparse.MRTransform(**kwargs)
-            elif self.data_dim == 3:
-                self.trf = pysparse.MRTransform3D(**kwargs)
-            else:
-                raise NameError("Please define a correct dimension for data.")
+            self._plan = self._get_backend_plan(self._data_shape, **kwargs)
+            self.trf = self._plan.backend
         else:
             if self.data_dim == 2:
                 self.trf = None
@@ -318,6 +668,96 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
                 raise NameError("For {0}D, only the bindings work for "
                                 "now.".format(self.data_dim))
 
+    def _create_backend(self, **kwargs):
+        """ Create the bindings transformation object.
+
+        Parameters
+        ----------
+        kwargs: dict (optional)
+            the extra parameters passed to the bindings.
+
+        Returns
+        -------
+        trf: pysparse.MRTransform, pysparse.MRTransform3D or NumPy engine
+            the bindings transformation object, or the NumPy engine when
+            requested.
+        """
+        if self.engine == "numpy" and self.__fourier_filter__ is not None:
+            return FourierTransform(
+                self.nb_scale, filter_name=self.__fourier_filter__,
+                dim=self.data_dim, workers=self.workers)
+        if self.engine == "numpy":
+            return StarletTransform(
+                self.nb_scale, kernel=self.__starlet_kernel__,
+                padding_mode=self.__mods__[self.padding_mode],
+                dim=self.data_dim)
+        kwargs["type_of_multiresolution_transform"] = (
+            self.__isap_transform_id__)
+        kwargs["number_of_scales"] = self.nb_scale
+        if self.data_dim == 2:
+            kwargs["bord"] = self.padding_mode
+            return pysparse.MRTransform(**kwargs)
+        elif self.data_dim == 3:
+            return pysparse.MRTransform3D(**kwargs)
+        else:
+            raise NameError("Please define a correct dimension for data.")
+
+    def _get_backend_plan(self, shape, **kwargs):
+        """ Get the plan holding the bindings transformation object
+        dedicated to a data shape.
+
+        The bindings allocate their internal decomposition on the first
+        call, so each data shape has its own transformation object. The
+        bindings serialize the calls on an object, so each thread also has
+        its own transformation object.
+
+        Parameters
+        ----------
+        shape: uplet or None
+            the data shape, None if not yet known.
+        kwargs: dict (optional)
+            the extra parameters passed to the bindings.
+
+        Returns
+        -------
+        plan: TransformPlan
+            the plan holding the bindings transformation object.
+        """
+        nbytes = 0
+        if shape is not None:
+            nbytes = (4 * int(numpy.prod(shape)) * self.nb_scale *
+                      self.__isap_nb_bands__)
+        try:
+            key = ("backend", self.__class__, self.engine, self.nb_scale,
+                   shape, self.padding_mode, self.workers,
+                   tuple(sorted(kwargs.items())))
+            if self.engine == "isap":
+                key += (threading.get_ident(), )
+            hash(key)
+        except TypeError:
+            return TransformPlan(backend=self._create_backend(**kwargs))
+        return PLAN_CACHE.get(key, lambda: TransformPlan(
+            backend=self._create_backend(**kwargs), nbytes=nbytes))
+
+    def _set_data_shape(self, shape):
+        """ Store the data shape and select the bindings transformation
+        object dedicated to this shape.
+
+        Parameters
+        ----------
+        shape: uplet
+            the shape of one input data/signal.
+        """
+        super(ISAPWaveletTransformBase, self)._set_data_shape(shape)
+        # The NumPy engine follows the ISAP bands layout: expose the same
+        # bands tables as the wrapping
+        if self.engine == "numpy" and self.data_dim == 2:
+            self._set_transformation_parameters()
+        if not self.use_wrapping:
+            self._plan = self._get_backend_plan(
+                self._data_shape, **self.kwargs)
+            self.trf = self._plan.backend
+
     def _analysis(self, data, **kwargs):
         """ Decompose a real signal using ISAP.
 
@@ -342,37 +782,164 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
 
         # Use subprocess to execute binaries
         if self.use_wrapping:
-            kwargs["verbose"] = self.verbose > 0
-            with pysap.TempDir(isap=True) as tmpdir:
-                in_image = os.path.join(tmpdir, "in.fits")
-                out_mr_file = os.path.join(tmpdir, "cube.mr")
-                pysap.io.save(data, in_image)
-                pysap.extensions.mr_transform(in_image, out_mr_file, **kwargs)
-                image = pysap.io.load(out_mr_file)
-                analysis_data = image.data
-                analysis_header = image.metadata
-
-            # Reorganize the generated coefficents
-            self._analysis_shape = analysis_data.shape
-            analysis_buffer = self.flatten_fct(analysis_data, self)
-            self._analysis_buffer_shape = analysis_buffer.shape
-            if not isinstance(self.nb_band_per_scale, list):
-                self.nb_band_per_scale = (
-                    self.nb_band_per_scale.squeeze().tolist())
-            analysis_data = []
-            for scale, nb_bands in enumerate(self.nb_band_per_scale):
-                for band in range(nb_bands):
-                    analysis_data.append(self._get_linear_band(
-                        scale, band, analysis_buffer))
-
-        # Use Python bindings
+            self._set_nb_band_per_scale_list()
+            (analysis_data, analysis_header, self._analysis_shape,
+             self._scratch_record) = self._run_mr_transform(data, **kwargs)
+
+        # Use Python bindings: they work on C-contiguous single precision
+        # arrays, passed without conversion
         else:
+            dtype = numpy.single if self.engine == "isap" else numpy.double
+            if self.workspace is not None:
+                data = self.workspace.cast("input", data, dtype)
+            else:
+                data = numpy.ascontiguousarray(data, dtype=dtype)
             analysis_data, self.nb_band_per_scale = self.trf.transform(
-                data.astype(numpy.double), save=False)
+                data, save=False)
             analysis_header = None
 
         return analysis_data, analysis_header
 
+    def _analysis_into(self, data, coeffs_out=None, **kwargs):
+        """ Decompose a real signal in a destination buffer.
+
+        The NumPy 'a trous' engine writes its bands directly in the
+        destination, once the bands layout is known from a previous
+        analysis of the same data shape. The other backends allocate their
+        decomposition, which is then copied.
+
+        Parameters
+        ----------
+        data: nd-array
+            a real array to be decomposed.
+        coeffs_out: nd-array (N, ) or list of nd-array, default None
+            a user defined destination flat buffer or bands.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_buffer: nd-array (N, ) or None
+            the flat coefficients buffer, None if the destination is a list
+            of bands.
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        layout: BandsLayout
+            the bands layout.
+        analysis_header: dict
+            the decomposition associated information.
+        """
+        layout = getattr(self._plan, "layout", None)
+        if not isinstance(self.trf, StarletTransform) or layout is None:
+            return super(ISAPWaveletTransformBase, self)._analysis_into(
+                data, coeffs_out, **kwargs)
+        if self.workspace is not None:
+            data = self.workspace.cast("input", data, numpy.double)
+        else:
+            data = numpy.asarray(data, dtype=numpy.double)
+        analysis_buffer, analysis_data = self._get_coefficients(
+            layout, numpy.double, coeffs_out)
+        self.trf.transform_batch(
+            data[numpy.newaxis],
+            out=[band[numpy.newaxis] for band in analysis_data])
+        self.nb_band_per_scale = [1] * self.nb_scale
+        return analysis_buffer, analysis_data, layout, None
+
+    def _synthesis_into(self, analysis_data, analysis_header, out=None):
+        """ Reconstruct a real signal in an output array.
+
+        The NumPy engines write their reconstruction directly in the output
+        array, or in the workspace array if any: the 'a trous' and
+        undecimated Fourier space transforms sum their bands in place, the
+        pyramidal Fourier space transforms copy their inverse FFT output.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        analysis_header: dict
+            the decomposition associated information.
+        out: nd-array, default None
+            if set, the reconstructed data/signal is written in this array.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed data/signal.
+        """
+        if not isinstance(self.trf, (StarletTransform, FourierTransform)):
+            return super(ISAPWaveletTransformBase, self)._synthesis_into(
+                analysis_data, analysis_header, out)
+        if out is None and self.workspace is not None:
+            out = self._get_array("data", self._data_shape, numpy.double)
+        if out is None:
+            return self.trf.reconstruct_batch(
+                [band[numpy.newaxis] for band in analysis_data])[0]
+        self.trf.reconstruct_batch(
+            [band[numpy.newaxis] for band in analysis_data],
+            out=out[numpy.newaxis])
+        return out
+
+    def _run_mr_transform(self, data, **kwargs):
+        """ Decompose a real signal with the ISAP command line.
+
+        The instance is not modified, so that several signals can be
+        decomposed concurrently.
+
+        Parameters
+        ----------
+        data: nd-array
+            a real array to be decomposed.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_data: list of nd-array
+            the decomposition coefficients.
+        analysis_header: dict
+            the decomposition associated information.
+        analysis_shape: tuple of int
+            the decomposition coefficients cube shape.
+        scratch_record: 3-uplet
+            the kept decomposition file, the decomposition header and the
+            coefficients digest, used to reuse the file in the synthesis.
+        """
+        kwargs["verbose"] = self.verbose > 0
+        scratch = get_scratch_space()
+        out_mr_file = scratch.new_path(".mr")
+        try:
+            with scratch.temporary(".fits") as in_image:
+                pysap.io.save(data, in_image)
+                pysap.extensions.mr_transform(
+                    in_image, out_mr_file, **kwargs)
+
+            # Get the generated coefficents as views of a single native
+            # copy of the memory-mapped decomposition, the file being then
+            # kept for the synthesis
+            with MRFile(out_mr_file) as mrfile:
+                analysis_header = mrfile.metadata
+                analysis_shape = mrfile.data.shape
+                analysis_data = mrfile.bands(self, copy=True)
+        except Exception:
+            if os.path.isfile(out_mr_file):
+                os.remove(out_mr_file)
+            raise
+        scratch.keep(out_mr_file)
+
+        return analysis_data, analysis_header, analysis_shape, (
+            out_mr_file, analysis_header, self._digest(analysis_data))
+
+    def _set_nb_band_per_scale_list(self):
+        """ Store the number of bands per scale as a list, as expected by
+        the bands views functions.
+        """
+        if not isinstance(self.nb_band_per_scale, list):
+            self.nb_band_per_scale = (
+                self.nb_band_per_scale.squeeze().tolist())
+
     def _synthesis(self, analysis_data, analysis_header):
         """ Reconstruct a real signal from the wavelet coefficients using ISAP.
 
@@ -388,26 +955,210 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
         data: nd-array
             the reconstructed data array.
         """
-        # Use subprocess to execute binaries
+        # Use subprocess to execute binaries: the decomposition file written
+        # by the analysis is reused if the coefficients are unchanged
         if self.use_wrapping:
-
-            cube = pysap.Image(data=analysis_data[0], metadata=analysis_header)
-            with pysap.TempDir(isap=True) as tmpdir:
-                in_mr_file = os.path.join(tmpdir, "cube.mr")
-                out_image = os.path.join(tmpdir, "out.fits")
-                pysap.io.save(cube, in_mr_file)
+            scratch = get_scratch_space()
+            with contextlib.ExitStack() as stack:
+                in_mr_file = self._get_scratch_file(
+                    analysis_data, analysis_header)
+                if in_mr_file is None:
+                    in_mr_file = stack.enter_context(
+                        scratch.temporary(".mr"))
+                    with MRFile.create(in_mr_file, analysis_header) as mrfile:
+                        for view, band in zip(mrfile.bands(self),
+                                              analysis_data):
+                            view[...] = band
+                out_image = stack.enter_context(scratch.temporary(".fits"))
                 pysap.extensions.mr_recons(
                     in_mr_file, out_image, verbose=(self.verbose > 0))
                 data = pysap.io.load(out_image).data
 
-        # Use Python bindings
+        # Use Python bindings: a transformation object that has not run an
+        # analysis, as after unpickling, is first allocated from the data
+        # shape
         else:
+            if self.engine == "isap" and self._data_shape is not None:
+                self.trf.allocate(self._data_shape)
             data = self.trf.reconstruct(analysis_data)
 
         return data
 
+    def _synthesis_delta(self, deltas):
+        """ Reconstruct the changes of some bands.
+
+        With the NumPy 'a trous' and undecimated Fourier engines the
+        reconstruction is the sum of the bands, so that the changes are
+        summed directly.
+
+        Parameters
+        ----------
+        deltas: list of nd-array
+            the change of each band, None for the unchanged bands.
+
+        Returns
+        -------
+        data: nd-array
+            the reconstructed change.
+        """
+        modified = [delta for delta in deltas if delta is not None]
+        if (numpy.iscomplexobj(modified[0]) or not (
+                isinstance(self.trf, StarletTransform) or (
+                    isinstance(self.trf, FourierTransform) and
+                    self.trf.filter_name == "undecimated"))):
+            return super(ISAPWaveletTransformBase, self)._synthesis_delta(
+                deltas)
+        data = modified[0]
+        for delta in modified[1:]:
+            data += delta
+        return data
+
+    @staticmethod
+    def _digest(bands):
+        """ Compute the digest of ISAP decomposition bands.
+
+        Parameters
+        ----------
+        bands: list of nd-array
+            the decomposition bands.
+
+        Returns
+        -------
+        digest: bytes
+            the bands shapes and single precision values digest.
+        """
+        hasher = hashlib.blake2b()
+        for band in bands:
+            hasher.update(str(band.shape).encode())
+            hasher.update(numpy.ascontiguousarray(band, dtype=numpy.single))
+        return hasher.digest()
+
+    def _get_scratch_file(self, bands, analysis_header):
+        """ Get the decomposition file written by the last analysis.
+
+        Parameters
+        ----------
+        bands: list of nd-array
+            the decomposition bands to be reconstructed.
+        analysis_header: dict
+            the decomposition parameters.
+
+        Returns
+        -------
+        path: str or None
+            the decomposition file, None if the bands or the parameters
+            differ from the last analysis, or if the file has been removed.
+        """
+        record = self._scratch_record
+        if record is None:
+            return None
+        path, header, digest = record
+        if (header is not analysis_header or not os.path.exists(path) or
+                self._digest(bands) != digest):
+            return None
+        return path
+
+    @property
+    def views_fct(self):
+        """ The function returning the decomposition bands as views of an
+        ISAP coefficients cube, see 'pysap/extensions/formating.py' module
+        for more details.
+        """
+        return ISAP_VIEWS[ISAP_FLATTEN.index(self.flatten_fct)]
+
+    def _analysis_batch(self, stack, **kwargs):
+        """ Decompose a stack of real signals using ISAP.
+
+        When using the wrapping or the bindings, the signals are decomposed
+        concurrently in the shared batch executor, each thread using its own
+        bindings transformation object, kept warm between the calls.
+
+        Parameters
+        ----------
+        stack: nd-array (N, ...)
+            the real signals to be decomposed stacked along the first axis.
+        kwargs: dict (optional)
+            the parameters that will be passed to
+            'pysap.extensions.mr_tansform'.
+
+        Returns
+        -------
+        analysis_data: list of nd-array
+            the decomposition coefficients with a leading batch axis.
+        analysis_header: dict
+            the decomposition associated information.
+        """
+        if isinstance(self.trf, (StarletTransform, FourierTransform)):
+            analysis_data = self.trf.transform_batch(stack)
+            self.nb_band_per_scale = [1] * self.nb_scale
+            return analysis_data, None
+        if len(stack) < 2:
+            return super(ISAPWaveletTransformBase, self)._analysis_batch(
+                stack, **kwargs)
+        if self.use_wrapping:
+            kwargs["type_of_multiresolution_transform"] = (
+                self.isap_transform_id)
+            kwargs["number_of_scales"] = self.nb_scale
+            self._set_nb_band_per_scale_list()
+
+            def analysis(data):
+                return self._run_mr_transform(data, **dict(kwargs))
+        else:
+            def analysis(data):
+                trf = self._get_backend_plan(
+                    self._data_shape, **self.kwargs).backend
+                return trf.transform(
+                    numpy.ascontiguousarray(data, dtype=numpy.single),
+                    save=False)
+        results = list(get_batch_executor().map(analysis, stack))
+        analysis_data = [
+            numpy.asarray(arrs) for arrs in zip(*[res[0] for res in results])]
+        if not self.use_wrapping:
+            self.nb_band_per_scale = results[0][1]
+            return analysis_data, None
+        self._analysis_shape = results[0][2]
+        self._scratch_record = None
+        return analysis_data, results[0][1]
+
+    def _synthesis_batch(self, analysis_data, analysis_header):
+        """ Reconstruct a stack of real signals using ISAP.
+
+        Parameters
+        ----------
+        analysis_data: list of nd-array
+            the wavelet coefficients array with a leading batch axis.
+        analysis_header: dict
+            the wavelet decomposition parameters.
+
+        Returns
+        -------
+        data: nd-array (N, ...)
+            the reconstructed data arrays stacked along the first axis.
+        """
+        if isinstance(self.trf, (StarletTransform, FourierTransform)):
+            return self.trf.reconstruct_batch(analysis_data)
+        return super(ISAPWaveletTransformBase, self)._synthesis_batch(
+            analysis_data, analysis_header)
+
     def _set_transformation_parameters(self):
         """ Declare transformation parameters.
+
+        The bands tables are shared through the process-wide plan cache.
+        """
+        key = ("parameters", self.__class__, self.nb_scale, self._iso_shape)
+        plan = PLAN_CACHE.get(key, self._create_parameters_plan)
+        (self.name, self.isap_transform_id, self.bands_names,
+         self.flatten_fct, self.unflatten_fct, self.is_decimated,
+         self.nb_band_per_scale, self.bands_lengths,
+         self.bands_shapes) = copy.deepcopy(plan.parameters)
+
+    def _create_parameters_plan(self):
+        """ Compute the transformation parameters.
+
+        Returns
+        -------
+        plan: TransformPlan
+            the plan holding the transformation bands tables.
         """
         # Check transformation has been defined
         if (self.__isap_transform_id__ is None or self.__isap_name__ is None
@@ -433,6 +1184,12 @@ class ISAPWaveletTransformBase(WaveletTransformBase):
         # Update the default parameters
         self._update_default_transformation_parameters()
 
+        parameters = copy.deepcopy((
+            self.name, self.isap_transform_id, self.bands_names,
+            self.flatten_fct, self.unflatten_fct, self.is_decimated,
+            self.nb_band_per_scale, self.bands_lengths, self.bands_shapes))
+        return TransformPlan(parameters=parameters)
+
     def _update_default_transformation_parameters(self):
         """ Add a method to tune the default transformation parameters.
         """
@@ -570,6 +1327,7 @@ class LinearWaveletTransformATrousAlgorithm(ISAPWaveletTransformBase):
     __isap_name__ = "linear wavelet transform: a trous algorithm"
     __is_decimated__ = False
     __isap_nb_bands__ = 1
+    __starlet_kernel__ = "linear"
 
 
 class BsplineWaveletTransformATrousAlgorithm(ISAPWaveletTransformBase):
@@ -579,6 +1337,7 @@ class BsplineWaveletTransformATrousAlgorithm(ISAPWaveletTransformBase):
     __isap_name__ = "linear wavelet transform: a trous algorithm"
     __is_decimated__ = False
     __isap_nb_bands__ = 1
+    __starlet_kernel__ = "b3"
 
 
 class WaveletTransformInFourierSpace(ISAPWaveletTransformBase):
@@ -588,6 +1347,7 @@ class WaveletTransformInFourierSpace(ISAPWaveletTransformBase):
     __isap_name__ = "wavelet transform in Fourier space"
     __is_decimated__ = False
     __isap_nb_bands__ = 1
+    __fourier_filter__ = "undecimated"
 
 
 class MorphologicalMedianTransform(ISAPWaveletTransformBase):
@@ -635,6 +1395,7 @@ class PyramidalWaveletTransformInFourierSpaceAlgo1(ISAPWaveletTransformBase):
                      "(diff. between two resolutions)")
     __is_decimated__ = True
     __isap_nb_bands__ = 1
+    __fourier_filter__ = "algo1"
 
 
 class MeyerWaveletsCompactInFourierSpace(ISAPWaveletTransformBase):
@@ -644,6 +1405,7 @@ class MeyerWaveletsCompactInFourierSpace(ISAPWaveletTransformBase):
     __isap_name__ = "Meyers wavelets (compact support in Fourier space)"
     __is_decimated__ = True
     __isap_nb_bands__ = 1
+    __fourier_filter__ = "meyer"
 
 
 class PyramidalMedianTransform(ISAPWaveletTransformBase):
@@ -851,6 +1613,7 @@ class IsotropicAndCompactSupportWaveletInFourierSpace(
                      "space")
     __is_decimated__ = True
     __isap_nb_bands__ = 1
+    __fourier_filter__ = "isotropic"
 
 
 class PyramidalWaveletTransformInFourierSpaceAlgo2(ISAPWaveletTransformBase):
@@ -862,6 +1625,7 @@ class PyramidalWaveletTransformInFourierSpaceAlgo2(ISAPWaveletTransformBase):
                      "(diff. between the square of two resolutions)")
     __is_decimated__ = True
     __isap_nb_bands__ = 1
+    __fourier_filter__ = "algo2"
 
 
 class FastCurveletTransform(ISAPWaveletTransformBase):
@@ -965,3 +1729,4 @@ class ATrou3D(ISAPWaveletTransformBase):
     __isap_name__ = "3D Wavelet A Trou"
     __is_decimated__ = False
     __isap_nb_bands__ = 1
+    __starlet_kernel__ = "b3"
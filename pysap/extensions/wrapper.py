@@ -10,15 +10,66 @@
 # System import
 import os
 import json
+import shutil
 import warnings
+import threading
 import subprocess
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 
 
 # Package import
+from pysap.base.exceptions import Sparse2dKilledError
 from pysap.base.exceptions import Sparse2dRuntimeError
+from pysap.base.exceptions import Sparse2dTimeoutError
 from pysap.base.exceptions import Sparse2dConfigurationError
 
 
+# Global parameters
+# > the resolved executables paths for each search path
+_EXECUTABLES = {}
+_EXECUTABLES_LOCK = threading.Lock()
+# > the job run by the current executor thread
+_LOCAL = threading.local()
+
+
+def find_executable(name, env=None):
+    """ Find a Sparse2d command, the resolved paths being cached.
+
+    Parameters
+    ----------
+    name: str
+        the command name.
+    env: dict, default None
+        the environment in which the command will be executed, by default
+        the current environment.
+
+    Returns
+    -------
+    path: str
+        the command absolute path.
+    """
+    search_path = (os.environ if env is None else env).get("PATH")
+    key = (name, search_path)
+    with _EXECUTABLES_LOCK:
+        path = _EXECUTABLES.get(key)
+    if path is None:
+        path = shutil.which(name, path=search_path)
+        if path is None:
+            raise Sparse2dConfigurationError(name)
+        path = os.path.abspath(path)
+        with _EXECUTABLES_LOCK:
+            _EXECUTABLES[key] = path
+    return path
+
+
+def clear_executables_cache():
+    """ Forget the resolved Sparse2d commands paths.
+    """
+    with _EXECUTABLES_LOCK:
+        _EXECUTABLES.clear()
+
+
 class Sparse2dWrapper(object):
     """ Parent class for the wrapping of Sparse2d commands.
     """
@@ -39,25 +90,26 @@ class Sparse2dWrapper(object):
         if env is None:
             self.environment = os.environ
 
-    def __call__(self, cmd):
+    def __call__(self, cmd, timeout=None):
         """ Run the Sparse2d command.
 
+        When run by a 'Sparse2dExecutor', the command can be killed and
+        gets the job timeout.
+
         Parameters
         ----------
         cmd: list of str (mandatory)
             The command to execute.
+        timeout: float, default None
+            if set, the command is killed after this number of seconds.
+
+        Returns
+        -------
+        stdout: str
+            the command standard output.
         """
         # Check Sparse2d has been configured so the command can be found
-        process = subprocess.Popen(["which", cmd[0]],
-                                   env=self.environment,
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
-        self.stdout, self.stderr = process.communicate()
-        self.stdout = self.stdout.decode("utf-8")
-        self.stderr = self.stderr.decode("utf-8")
-        self.exitcode = process.returncode
-        if self.exitcode != 0:
-            raise Sparse2dConfigurationError(cmd[0])
+        executable = find_executable(cmd[0], env=self.environment)
 
         # Command must contain only strings
         _cmd = [str(elem) for elem in cmd]
@@ -66,14 +118,206 @@ class Sparse2dWrapper(object):
                 " ".join(_cmd)))
 
         # Execute the command
-        process = subprocess.Popen(_cmd,
-                                   env=self.environment,
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
-        self.stdout, self.stderr = process.communicate()
+        job = getattr(_LOCAL, "job", None) or Sparse2dJob()
+        if timeout is None:
+            timeout = job.timeout
+        with job.lock:
+            if job.killed:
+                raise Sparse2dKilledError(_cmd[0], " ".join(_cmd[1:]))
+            process = subprocess.Popen([executable] + _cmd[1:],
+                                       env=self.environment,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+            job.process = process
+        try:
+            self.stdout, self.stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise Sparse2dTimeoutError(_cmd[0], " ".join(_cmd[1:]), timeout)
+        finally:
+            with job.lock:
+                job.process = None
+        if job.killed:
+            raise Sparse2dKilledError(_cmd[0], " ".join(_cmd[1:]))
         self.stdout = self.stdout.decode("utf-8")
         self.stderr = self.stderr.decode("utf-8")
         self.exitcode = process.returncode
         if self.exitcode != 0 or self.stderr or "Error" in self.stdout:
             raise Sparse2dRuntimeError(
                 _cmd[0], " ".join(_cmd[1:]), self.stderr + self.stdout)
+        return self.stdout
+
+
+class Sparse2dJob(object):
+    """ The state of a job run by a 'Sparse2dExecutor'.
+    """
+    def __init__(self, timeout=None):
+        """ Initialize the Sparse2dJob class.
+
+        Parameters
+        ----------
+        timeout: float, default None
+            if set, each command of the job is killed after this number of
+            seconds.
+        """
+        self.timeout = timeout
+        self.process = None
+        self.killed = False
+        self.lock = threading.Lock()
+
+    def kill(self):
+        """ Stop the job, killing its running command.
+        """
+        with self.lock:
+            self.killed = True
+            if self.process is not None:
+                self.process.kill()
+
+
+class Sparse2dFuture(Future):
+    """ The future of a job run by a 'Sparse2dExecutor'.
+
+    As the standard futures, only a pending job can be cancelled. A running
+    job can also be killed: its command is stopped and the result raises a
+    'Sparse2dKilledError'.
+    """
+    def __init__(self, job):
+        """ Initialize the Sparse2dFuture class.
+
+        Parameters
+        ----------
+        job: Sparse2dJob
+            the job state.
+        """
+        super(Sparse2dFuture, self).__init__()
+        self.job = job
+
+    def kill(self):
+        """ Cancel the job if it is pending, otherwise kill its running
+        command.
+
+        Returns
+        -------
+        stopped: bool
+            False if the job is already completed, True otherwise.
+        """
+        if self.cancel():
+            return True
+        if self.done():
+            return False
+        self.job.kill()
+        return True
+
+
+class Sparse2dExecutor(object):
+    """ Run the Sparse2d commands concurrently in a bounded pool of local
+    workers.
+
+    The wrapped commands, as 'pysap.extensions.mr_transform', are
+    submitted with their parameters and return futures. The Sparse2d
+    commands run in sub processes, so the workers are threads.
+    """
+    def __init__(self, max_workers=None):
+        """ Initialize the Sparse2dExecutor class.
+
+        Parameters
+        ----------
+        max_workers: int, default None
+            the number of commands run concurrently, by default the number
+            of CPUs.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True, cancel=exc_type is not None)
+        return False
+
+    def submit(self, fn, *args, **kwargs):
+        """ Submit a job.
+
+        Parameters
+        ----------
+        fn: callable
+            the job, a wrapped Sparse2d command or any function running
+            Sparse2d commands.
+        args, kwargs: (optional)
+            the job parameters. The 'timeout' keyword, in seconds, is
+            reserved to kill each command of the job after this duration.
+
+        Returns
+        -------
+        future: Sparse2dFuture
+            the job future.
+        """
+        future = Sparse2dFuture(Sparse2dJob(timeout=kwargs.pop(
+            "timeout", None)))
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        self._pool.submit(self._run, future, fn, args, kwargs)
+        return future
+
+    def map(self, fn, *iterables, **kwargs):
+        """ Submit a job for each set of parameters.
+
+        Parameters
+        ----------
+        fn: callable
+            the job.
+        iterables: iterables
+            the job positional parameters.
+        kwargs: dict (optional)
+            the job keyword parameters, shared by all the jobs.
+
+        Returns
+        -------
+        futures: list of Sparse2dFuture
+            the jobs futures.
+        """
+        return [self.submit(fn, *args, **kwargs) for args in zip(*iterables)]
+
+    def shutdown(self, wait=True, cancel=False):
+        """ Stop the executor.
+
+        Parameters
+        ----------
+        wait: bool, default True
+            if set, wait for the submitted jobs.
+        cancel: bool, default False
+            if set, cancel the pending jobs and kill the running ones.
+        """
+        if cancel:
+            with self._lock:
+                futures = list(self._futures)
+            for future in futures:
+                future.kill()
+        self._pool.shutdown(wait=wait)
+
+    def _discard(self, future):
+        """ Forget a completed job.
+        """
+        with self._lock:
+            self._futures.discard(future)
+
+    @staticmethod
+    def _run(future, fn, args, kwargs):
+        """ Run a job in a worker thread.
+        """
+        if not future.set_running_or_notify_cancel():
+            return
+        _LOCAL.job = future.job
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        finally:
+            _LOCAL.job = None
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+"""
+A module to spread transformations over local processes.
+
+The sparse2d bindings release the GIL during the computations, but the
+pure Python transforms, the thresholding and the command lines wrapping do
+not, so processes are used rather than threads. The images and the results
+are exchanged through shared memory blocks when available (Python >= 3.8),
+each worker keeping its own transforms.
+"""
+
+# System import
+import os
+from concurrent.futures import ProcessPoolExecutor
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+# Package import
+import pysap
+
+# Third party import
+import numpy
+
+
+# Global parameters
+# > the transforms kept by each worker process
+_WORKER_TRANSFORMS = {}
+
+
+def map_transform(transform_name, images, nb_scale=4, workers=None,
+                  threshold=None, threshold_kwargs=None, synthesis=True,
+                  executor=None, **kwargs):
+    """ Decompose, optionally threshold, and reconstruct a stack of images
+    using a pool of processes.
+
+    Parameters
+    ----------
+    transform_name: str
+        the transform name as listed by 'pysap.wavelist'.
+    images: ndarray (N, ...)
+        the real or complex images stacked along the first axis.
+    nb_scale: int, default 4
+        the number of scale of the decomposition.
+    workers: int, default None
+        the number of processes, by default the number of CPUs.
+    threshold: float, default None
+        if set, threshold the decomposition coefficients.
+    threshold_kwargs: dict, default None
+        the extra parameters passed to the transform 'threshold' method.
+    synthesis: bool, default True
+        if set, return the reconstructed images, otherwise the flat
+        decomposition coefficients.
+    executor: ProcessPoolExecutor, default None
+        a pool to reuse, so that the workers keep their transforms warm
+        between calls. If not set a pool is created for this call.
+    kwargs: dict (optional)
+        the extra parameters passed to the transform constructor.
+
+    Returns
+    -------
+    outputs: ndarray (N, ...) or (N, size)
+        the reconstructed images or the flat decomposition coefficients
+        of each image.
+    """
+    # Checks
+    images = numpy.asarray(images)
+    if images.ndim < 2:
+        raise ValueError("Expect a stack of images.")
+    nb_images = len(images)
+    workers = workers or os.cpu_count() or 1
+    spec = (transform_name, nb_scale, tuple(sorted(kwargs.items())))
+    threshold_kwargs = dict(threshold_kwargs or {})
+
+    # Define the outputs
+    dtype = numpy.result_type(images.dtype, numpy.float64)
+    if synthesis:
+        output_shape = images.shape
+    else:
+        transform = pysap.load_transform(transform_name)(
+            nb_scale=nb_scale, **kwargs)
+        operator = transform.operator(images.shape[1:])
+        output_shape = (nb_images, operator.size)
+
+    # Split the images in chunks: a few chunks per worker to balance the
+    # load
+    nb_chunks = min(nb_images, 4 * workers)
+    chunks = [
+        (int(chunk[0]), int(chunk[-1]) + 1)
+        for chunk in numpy.array_split(numpy.arange(nb_images), nb_chunks)]
+
+    # Process
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    blocks = []
+    try:
+        if shared_memory is not None:
+            in_block = _create_block(images.shape, images.dtype)
+            blocks.append(in_block)
+            _block_array(in_block, images.shape, images.dtype)[...] = images
+            out_block = _create_block(output_shape, dtype)
+            blocks.append(out_block)
+            tasks = [
+                (spec, start, stop, (in_block.name, images.shape,
+                                     images.dtype.str),
+                 (out_block.name, output_shape, dtype.str), threshold,
+                 threshold_kwargs, synthesis)
+                for start, stop in chunks]
+            for future in [executor.submit(_process_chunk, task)
+                           for task in tasks]:
+                future.result()
+            outputs = numpy.array(
+                _block_array(out_block, output_shape, dtype), copy=True)
+        else:
+            outputs = numpy.empty(output_shape, dtype=dtype)
+            tasks = [
+                (spec, start, stop, images[start: stop], None, threshold,
+                 threshold_kwargs, synthesis)
+                for start, stop in chunks]
+            futures = [executor.submit(_process_chunk, task)
+                       for task in tasks]
+            for (start, stop), future in zip(chunks, futures):
+                outputs[start: stop] = future.result()
+    finally:
+        if own_executor:
+            executor.shutdown()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return outputs
+
+
+def _create_block(shape, dtype):
+    """ Create a shared memory block able to store an array.
+    """
+    nbytes = int(numpy.prod(shape)) * numpy.dtype(dtype).itemsize
+    return shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+
+
+def _block_array(block, shape, dtype):
+    """ Get the array stored in a shared memory block.
+    """
+    return numpy.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _get_worker_transform(spec):
+    """ Get the transform kept by the current worker process.
+    """
+    transform = _WORKER_TRANSFORMS.get(spec)
+    if transform is None:
+        transform_name, nb_scale, kwargs = spec
+        transform = pysap.load_transform(transform_name)(
+            nb_scale=nb_scale, **dict(kwargs))
+        _WORKER_TRANSFORMS[spec] = transform
+    return transform
+
+
+def _process_chunk(task):
+    """ Process a chunk of images in a worker process.
+
+    Parameters
+    ----------
+    task: tuple
+        the transform specification, the chunk bounds, the input images
+        (shared memory block description or array), the output shared
+        memory block description (or None), the threshold and its extra
+        parameters, and the synthesis flag.
+
+    Returns
+    -------
+    outputs: ndarray or None
+        the chunk outputs if no shared memory block is used.
+    """
+    (spec, start, stop, images, output, threshold, threshold_kwargs,
+     synthesis) = task
+    transform = _get_worker_transform(spec)
+    blocks = []
+    try:
+        # Attach the shared memory blocks
+        if output is not None:
+            arrays = []
+            for name, shape, dtype in (images, output):
+                block = shared_memory.SharedMemory(name=name)
+                blocks.append(block)
+                arrays.append(_block_array(block, shape, dtype)[start: stop])
+            images, outputs = arrays
+        else:
+            outputs = None
+
+        # Process the images
+        results = []
+        for index, image in enumerate(images):
+            transform.data = image
+            out = None if outputs is None else outputs[index]
+            if synthesis:
+                transform.analysis()
+            else:
+                transform.analysis(coeffs_out=out)
+            if threshold is not None:
+                transform.threshold(threshold, **threshold_kwargs)
+            if synthesis:
+                result = transform.synthesis(out=out).data
+            else:
+                result = transform.analysis_buffer
+            if outputs is None:
+                results.append(numpy.array(result, copy=True))
+    finally:
+        # Release the views on the shared memory blocks before closing them
+        images = outputs = out = arrays = image = result = None
+        transform._data = None
+        transform._analysis_data = None
+        transform._analysis_buffer = None
+        transform._reset_synthesis_reference()
+        for block in blocks:
+            block.close()
+    if output is None:
+        return numpy.asarray(results)
+    return None
@@ -156,6 +156,22 @@ class TestWarpAndBinding(unittest.TestCase):
             band_array[:, :] = 10
             self.assertTrue(numpy.allclose(transform[0, 0], band_array))
 
+    def test_allocate(self):
+        """ Test the synthesis without a prior analysis.
+        """
+        image = self.images[0].data.astype(numpy.single)
+        trf = sp.pysparse.MRTransform(
+            type_of_multiresolution_transform=2, number_of_scales=4)
+        analysis_data, _ = trf.transform(image)
+        recim = trf.reconstruct(analysis_data)
+        trf = sp.pysparse.MRTransform(
+            type_of_multiresolution_transform=2, number_of_scales=4)
+        assert_raises(ValueError, trf.reconstruct, analysis_data)
+        trf.allocate(image.shape)
+        self.assertTrue(numpy.allclose(
+            trf.reconstruct(analysis_data), recim))
+        assert_raises(ValueError, trf.allocate, (256, 256))
+
     def test_filter_init(self):
         flt = sp.Filter()
         data = numpy.copy(self.images[0])
@@ -477,6 +493,19 @@ class TestWarpAndBinding(unittest.TestCase):
             im_wrap = numpy.copy(pysap.io.load(out_file))
         assert(numpy.isclose(mr.cube, im_wrap, atol=0.00001).all())
 
+    def test_mr2d1d_bands(self):
+        data = self.mr_image.data
+        mr = sp.MR2D1D()
+        mr.transform(data)
+        for s2d, s1d, nx, ny, nz, offset in mr.band_table:
+            band = mr.bands[s2d][s1d]
+            self.assertEqual(band.shape, (nz, ny, nx))
+            self.assertTrue(numpy.shares_memory(band, mr.coeffs))
+        mr.reconstruct(mr.bands)
+        recons = mr.recons
+        mr.reconstruct(mr.cube)
+        assert(numpy.allclose(mr.recons, recons))
+
     def test_mr2d1d_recons(self):
         data = self.mr_image.data
         mr = sp.MR2D1D()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+# System import
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+
+# Global parameters
+# > the maximum 'import pysap' duration in seconds: the default budget is
+#   generous (about ten times the import time with the heavy dependencies
+#   deferred) and can be overridden with the 'PYSAP_IMPORT_TIME_BUDGET'
+#   environment variable
+IMPORT_TIME_BUDGET = float(os.environ.get("PYSAP_IMPORT_TIME_BUDGET", 3))
+# > the number of timed imports, the fastest one being compared to the
+#   budget
+IMPORT_TIME_REPEATS = 3
+# > the dependencies that must only be imported on first use
+DEFERRED_MODULES = ["matplotlib", "pyqtgraph", "skimage", "astropy",
+                    "nibabel", "scipy.io", "scipy.fft", "distutils"]
+# > the benchmark run in a fresh interpreter
+BENCHMARK = """
+import json
+import sys
+import time
+start = time.perf_counter()
+import pysap
+duration = time.perf_counter() - start
+print(json.dumps({{
+    "duration": duration,
+    "modules": [name for name in {0} if name in sys.modules]}}))
+"""
+
+
+class TestImport(unittest.TestCase):
+    """ Test the package import cost.
+    """
+    def _run_benchmark(self, **environ):
+        """ Import the package in a fresh interpreter.
+        """
+        env = dict(os.environ)
+        env.pop("PYSAP_BANNER", None)
+        env.update(environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.abspath(__file__))))] +
+            env.get("PYTHONPATH", "").split(os.pathsep))
+        output = subprocess.check_output(
+            [sys.executable, "-W", "ignore", "-c",
+             BENCHMARK.format(DEFERRED_MODULES)], env=env)
+        return output.decode()
+
+    def test_import(self):
+        """ Test the heavy dependencies are deferred and no banner is
+        displayed.
+        """
+        output = self._run_benchmark()
+        lines = output.strip().splitlines()
+        self.assertEqual(len(lines), 1)
+        result = json.loads(lines[0])
+        self.assertEqual(result["modules"], [])
+
+    def test_import_time(self):
+        """ Benchmark the import time against the budget.
+        """
+        duration = min(
+            json.loads(self._run_benchmark().strip())["duration"]
+            for _ in range(IMPORT_TIME_REPEATS))
+        self.assertLess(duration, IMPORT_TIME_BUDGET)
+
+    def test_banner(self):
+        """ Test the opt-in banner.
+        """
+        output = self._run_benchmark(PYSAP_BANNER="1")
+        self.assertIn("Package version", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
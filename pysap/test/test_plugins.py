@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+# System import
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import importlib
+
+# Package import
+import pysap.plugins
+from pysap.base.plugins import PluginsFinder
+from pysap.base.plugins import PLUGINS_FINDER
+
+
+class TestPlugins(unittest.TestCase):
+    """ Test the plugins import hook.
+    """
+    def setUp(self):
+        """ Create a plugin package.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        pkgdir = os.path.join(self.tmpdir, "pysap_dummy_plugin")
+        os.mkdir(pkgdir)
+        with open(os.path.join(pkgdir, "__init__.py"), "wt") as open_file:
+            open_file.write("VALUE = 1\n")
+        with open(os.path.join(pkgdir, "utils.py"), "wt") as open_file:
+            open_file.write("from . import VALUE\nDOUBLE = 2 * VALUE\n")
+        sys.path.insert(0, self.tmpdir)
+        self.lazy = PLUGINS_FINDER.lazy
+
+    def tearDown(self):
+        """ Remove the plugin package.
+        """
+        sys.path.remove(self.tmpdir)
+        for name in list(sys.modules):
+            if "pysap_dummy_plugin" in name:
+                del sys.modules[name]
+        PLUGINS_FINDER.lazy = self.lazy
+        importlib.invalidate_caches()
+        shutil.rmtree(self.tmpdir)
+
+    def test_import(self):
+        """ Test the plugins and their sub modules are mounted on the
+        plugins module, and their locations cached.
+        """
+        self.assertIs(
+            [finder for finder in sys.meta_path
+             if isinstance(finder, PluginsFinder)][0], PLUGINS_FINDER)
+        self.assertIsNone(PLUGINS_FINDER.find_spec("os"))
+        self.assertIsNone(PLUGINS_FINDER.find_spec(
+            "pysap.plugins.pysap_unknown_plugin"))
+        from pysap.plugins.pysap_dummy_plugin import utils
+        self.assertEqual(
+            utils.__name__, "pysap.plugins.pysap_dummy_plugin.utils")
+        self.assertEqual(utils.DOUBLE, 2)
+        self.assertNotIn("pysap_dummy_plugin", sys.modules)
+        self.assertIn("pysap.plugins.pysap_dummy_plugin",
+                      PLUGINS_FINDER._locations)
+        importlib.invalidate_caches()
+        self.assertEqual(len(PLUGINS_FINDER._locations), 0)
+
+    def test_lazy(self):
+        """ Test the plugins lazy loading.
+        """
+        PLUGINS_FINDER.lazy = True
+        module = importlib.import_module("pysap.plugins.pysap_dummy_plugin")
+        self.assertNotIn("VALUE", object.__getattribute__(module, "__dict__"))
+        self.assertEqual(module.VALUE, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,799 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+# System import
+import os
+import shutil
+import time
+import pickle
+import tempfile
+import unittest
+import threading
+from unittest import mock
+import numpy
+import scipy.ndimage
+
+# Package import
+import pysap
+import pysap.base.utils
+from pysap.base import thresholding
+from pysap.parallel import map_transform
+from pysap.extensions.starlet import StarletTransform
+from pysap.extensions.fourier import FourierTransform
+from pysap.extensions.mrfile import MRFile
+from pysap.extensions.transform import get_batch_executor
+from pysap.base.plans import PlanCache
+from pysap.base.plans import TransformPlan
+
+
+# Global parameters
+# > True if the ISAP transforms can be computed, with the bindings or with
+#   the command lines
+HAS_ISAP = (pysap.extensions.transform.pysparse is not None or
+            shutil.which("mr_transform") is not None)
+
+
+class TestTransformStructure(unittest.TestCase):
+    """ Test the decomposition structure using the pywt transforms that do
+    not require any external data.
+    """
+    def setUp(self):
+        """ Generate some random data.
+        """
+        self.rng = numpy.random.RandomState(0)
+        self.stack = self.rng.rand(4, 32, 32)
+        self.transforms = []
+        for name in ("db4", "haar"):
+            for is_decimated in (True, False):
+                self.transforms.append(pysap.load_transform(name)(
+                    nb_scale=2, is_decimated=is_decimated))
+
+    def test_batch(self):
+        """ Test the batch analysis/synthesis against the single signal
+        analysis/synthesis.
+        """
+        for transform in self.transforms:
+            for stack in (self.stack, self.stack + 1.j * self.stack[::-1]):
+                analysis_data = transform.analysis_batch(stack)
+                transform.data = stack[1]
+                transform.analysis()
+                self.assertEqual(
+                    len(analysis_data), len(transform.analysis_data))
+                for batch_band, band in zip(
+                        analysis_data, transform.analysis_data):
+                    self.assertEqual(len(batch_band), len(stack))
+                    numpy.testing.assert_allclose(batch_band[1], band)
+                recim = transform.synthesis_batch(analysis_data)
+                self.assertEqual(recim.shape, stack.shape)
+                numpy.testing.assert_allclose(recim.data, stack, atol=1e-8)
+
+    def test_batch_shape(self):
+        """ Test the batch input shape checks.
+        """
+        transform = self.transforms[0]
+        with self.assertRaises(ValueError):
+            transform.analysis_batch(self.stack[0])
+
+    def test_contiguous(self):
+        """ Test the single buffer coefficients storage.
+        """
+        for transform in self.transforms:
+            contiguous_transform = transform.__class__(
+                nb_scale=2, is_decimated=transform.is_decimated,
+                contiguous=True)
+            for trf in (transform, contiguous_transform):
+                trf.data = self.stack[0]
+                trf.analysis()
+            buffer = contiguous_transform.analysis_buffer
+            self.assertEqual(buffer.ndim, 1)
+            flat, _ = pysap.base.utils.flatten(
+                contiguous_transform.analysis_data, copy=False)
+            self.assertTrue(flat is buffer)
+            flat, _ = pysap.base.utils.flatten(
+                contiguous_transform.analysis_data)
+            self.assertFalse(numpy.shares_memory(flat, buffer))
+            numpy.testing.assert_allclose(buffer, transform.analysis_buffer)
+            for scale in range(len(transform.nb_band_per_scale)):
+                for band in range(transform.nb_band_per_scale[scale]):
+                    band_data = contiguous_transform.band_at(scale, band)
+                    self.assertTrue(numpy.shares_memory(band_data, buffer))
+                    numpy.testing.assert_allclose(
+                        band_data, transform[scale, band])
+            buffer *= 2
+            numpy.testing.assert_allclose(
+                contiguous_transform.synthesis().data, 2 * self.stack[0],
+                atol=1e-8)
+            contiguous_transform.analysis_buffer = (
+                transform.analysis_buffer)
+            numpy.testing.assert_allclose(
+                contiguous_transform.synthesis().data, self.stack[0],
+                atol=1e-8)
+
+    def test_complex(self):
+        """ Test the complex decomposition is stored in a single complex
+        buffer.
+        """
+        data = self.stack[0] + 1.j * self.stack[1]
+        for transform in self.transforms:
+            for dtype in (numpy.complex64, numpy.complex128):
+                transform.data = data.astype(dtype)
+                transform.analysis()
+                bands = transform.analysis_data
+                base = bands[0].base
+                for band in bands:
+                    self.assertEqual(band.dtype, dtype)
+                    self.assertTrue(numpy.shares_memory(band, base))
+                transform.data = data.real
+                transform.analysis()
+                for band, real_band in zip(bands, transform.analysis_data):
+                    numpy.testing.assert_allclose(
+                        band.real, real_band, rtol=1e-5, atol=1e-5)
+                transform.analysis_data = bands
+                recim = transform.synthesis()
+                self.assertEqual(recim.data.dtype, dtype)
+                numpy.testing.assert_allclose(
+                    recim.data, data, rtol=1e-5, atol=1e-5)
+
+    def test_out(self):
+        """ Test the analysis/synthesis output arrays and the workspace.
+        """
+        for transform in self.transforms:
+            for data in (self.stack[0], self.stack[0] + 1.j * self.stack[1]):
+                transform.data = data
+                transform.analysis()
+                expected = transform.analysis_buffer
+                coeffs_out = numpy.zeros_like(expected)
+                transform.analysis(coeffs_out=coeffs_out)
+                numpy.testing.assert_allclose(coeffs_out, expected)
+                self.assertTrue(numpy.shares_memory(
+                    transform.analysis_data[0], coeffs_out))
+                out = numpy.zeros_like(data)
+                recim = transform.synthesis(out=out)
+                self.assertTrue(recim.data is out)
+                numpy.testing.assert_allclose(out, data, atol=1e-8)
+                with self.assertRaises(ValueError):
+                    transform.analysis(coeffs_out=coeffs_out[1:])
+
+            workspace_transform = transform.__class__(
+                nb_scale=2, is_decimated=transform.is_decimated,
+                workspace=True)
+            workspace_transform.data = self.stack[0]
+            outputs = []
+            for _ in range(2):
+                workspace_transform.analysis()
+                outputs.append((workspace_transform.analysis_buffer,
+                                workspace_transform.synthesis()))
+            self.assertTrue(outputs[0][0] is outputs[1][0])
+            self.assertTrue(outputs[0][1] is outputs[1][1])
+            numpy.testing.assert_allclose(
+                outputs[1][1].data, self.stack[0], atol=1e-8)
+
+    def test_operator(self):
+        """ Test the flat vectors linear operator.
+        """
+        for transform in self.transforms:
+            transform.data = self.stack[1]
+            transform.analysis()
+            analysis_data = [band.copy() for band in transform.analysis_data]
+            operator = transform.operator(self.stack[0].shape)
+            numpy.testing.assert_array_equal(transform.data, self.stack[1])
+            for band, ref_band in zip(transform.analysis_data, analysis_data):
+                numpy.testing.assert_array_equal(band, ref_band)
+            coeffs = operator.op(self.stack[0]).copy()
+            operator.adj_op(coeffs)
+            coeffs[...] = 0
+            self.assertFalse(numpy.shares_memory(
+                coeffs, operator.transform.analysis_buffer))
+            for data in (self.stack[0], self.stack[0] + 1.j * self.stack[1]):
+                coeffs = operator.op(data)
+                self.assertEqual(coeffs.shape, (operator.size, ))
+                self.assertTrue(operator.op(data) is coeffs)
+                transform.data = data
+                transform.analysis()
+                numpy.testing.assert_allclose(
+                    coeffs, transform.analysis_buffer)
+                numpy.testing.assert_allclose(
+                    operator.adj_op(coeffs), data, atol=1e-8)
+
+    def test_threshold(self):
+        """ Test the in place thresholding of the decomposition.
+        """
+        for transform in self.transforms:
+            transform.data = self.stack[0] - 0.5
+            transform.analysis()
+            bands = [band.copy() for band in transform.analysis_data]
+            approximation = transform._approximation_bands()
+            self.assertTrue(len(approximation) > 0)
+            weights = [index + 1 for index in range(len(
+                transform.nb_band_per_scale))]
+            transform.threshold(0.1, weights=weights, nb_threads=2)
+            index = 0
+            for scale, nb_bands in enumerate(transform.nb_band_per_scale):
+                for _ in range(nb_bands):
+                    expected = bands[index]
+                    if index not in approximation:
+                        threshold = 0.1 * weights[scale]
+                        expected = numpy.sign(expected) * numpy.maximum(
+                            numpy.abs(expected) - threshold, 0)
+                    numpy.testing.assert_allclose(
+                        transform.analysis_data[index], expected)
+                    index += 1
+
+    def test_thresholding(self):
+        """ Test the thresholding operators.
+        """
+        data = self.rng.randn(8, 8) + 1.j * self.rng.randn(8, 8)
+        magnitude = numpy.abs(data)
+        soft = thresholding.soft_threshold(data.copy(), 1.)
+        numpy.testing.assert_allclose(
+            soft, data * numpy.maximum(1 - 1. / magnitude, 0))
+        hard = thresholding.hard_threshold(data.copy(), 1.)
+        numpy.testing.assert_allclose(hard, data * (magnitude > 1))
+        firm = thresholding.firm_threshold(data.copy(), 1., 2.)
+        numpy.testing.assert_allclose(firm[magnitude <= 1], 0)
+        numpy.testing.assert_allclose(
+            firm[magnitude > 2], data[magnitude > 2])
+        middle = (magnitude > 1) & (magnitude <= 2)
+        numpy.testing.assert_allclose(
+            numpy.abs(firm[middle]), 2 * (magnitude[middle] - 1))
+        bands = [data.real.copy(), data.imag.copy()]
+        thresholding.group_threshold(bands, 1.)
+        numpy.testing.assert_allclose(bands[0] + 1.j * bands[1], soft)
+        with self.assertRaises(ValueError):
+            thresholding.threshold_bands([data], [1.], mode="unknown")
+
+    def test_threshold_executor(self):
+        """ Test the threaded thresholding reuses the shared executor, and
+        the small decompositions are thresholded serially.
+        """
+        size = thresholding.MIN_THREADED_SIZE
+        for shape, threaded in (((8, 8), False), ((size, ), True)):
+            bands = [self.rng.randn(*shape) for _ in range(4)]
+            expected = [thresholding.soft_threshold(band.copy(), 0.5)
+                        for band in bands]
+            executor = thresholding.get_threshold_executor()
+            with mock.patch.object(
+                    executor, "submit", wraps=executor.submit) as submit:
+                thresholding.threshold_bands(
+                    bands, [0.5] * 4, nb_threads=2)
+            self.assertEqual(submit.call_count, 2 if threaded else 0)
+            self.assertTrue(thresholding.get_threshold_executor() is executor)
+            for band, expected_band in zip(bands, expected):
+                numpy.testing.assert_allclose(band, expected_band)
+
+    def test_incremental_synthesis(self):
+        """ Test the modified bands tracking and the incremental synthesis.
+        """
+        for transform in self.transforms:
+            for data in (self.stack[0], self.stack[0] + 1.j * self.stack[1]):
+                transform.data = data
+                transform.analysis()
+                numpy.testing.assert_allclose(
+                    transform.synthesis(incremental=True).data, data,
+                    atol=1e-8)
+                transform[1, 0] = 2 * transform[1, 0]
+                band = transform[0, 0]
+                self.assertIs(type(band), numpy.ndarray)
+                transform.mark_dirty(0, 0)
+                band *= 0.5
+                band[0] = 1
+                self.assertEqual(
+                    sorted(transform._dirty_bands),
+                    [0, transform._band_index(1, 0)])
+                incremental = transform.synthesis(incremental=True).data
+                self.assertEqual(len(transform._dirty_bands), 0)
+                numpy.testing.assert_allclose(
+                    incremental, transform.synthesis().data, atol=1e-8)
+                transform.synthesis(incremental=True, verify=True)
+                numpy.copyto(transform[0, 0], 0)
+                self.assertEqual(len(transform._dirty_bands), 0)
+                numpy.testing.assert_allclose(
+                    transform.synthesis(incremental=True, verify=True).data,
+                    transform.synthesis().data, atol=1e-8)
+                transform.threshold(0.1)
+                numpy.testing.assert_allclose(
+                    transform.synthesis(incremental=True).data,
+                    transform.synthesis().data, atol=1e-8)
+                with self.assertRaises(ValueError):
+                    transform[0, 0] = numpy.zeros((1, 1))
+
+    def test_incremental_speed(self):
+        """ Test the incremental synthesis reconstructs only the modified
+        band and is faster than a full synthesis.
+        """
+        data = self.rng.rand(256, 256)
+        for is_decimated in (True, False):
+            transform = pysap.load_transform("db4")(
+                nb_scale=4, is_decimated=is_decimated)
+            transform.data = data
+            transform.analysis()
+            transform.synthesis(incremental=True)
+            scale = len(transform.nb_band_per_scale) - 1
+            durations = {"full": [], "incremental": []}
+            for _ in range(5):
+                transform[scale, 0] = 0.9 * transform[scale, 0]
+                start = time.perf_counter()
+                incremental = transform.synthesis(incremental=True).data
+                durations["incremental"].append(time.perf_counter() - start)
+                start = time.perf_counter()
+                full = transform.synthesis().data
+                durations["full"].append(time.perf_counter() - start)
+                numpy.testing.assert_allclose(incremental, full, atol=1e-8)
+            self.assertLess(min(durations["incremental"]),
+                            min(durations["full"]))
+
+    def test_lean(self):
+        """ Test the lean undecimated transform.
+        """
+        transform = pysap.load_transform("db4")(
+            nb_scale=3, is_decimated=False)
+        lean_transform = pysap.load_transform("db4")(
+            nb_scale=3, is_decimated=False, lean=True)
+        for data in (self.stack[0], self.stack[0] + 1.j * self.stack[1]):
+            transform.data = data
+            transform.analysis()
+            lean_transform.data = data
+            lean_transform.analysis()
+            self.assertEqual(
+                lean_transform.analysis_header, transform.analysis_header)
+            for lean_band, band in zip(
+                    lean_transform.analysis_data, transform.analysis_data):
+                self.assertEqual(lean_band.real.dtype, numpy.float32)
+                numpy.testing.assert_allclose(lean_band, band, atol=1e-5)
+            numpy.testing.assert_allclose(
+                lean_transform.synthesis().data, data, atol=1e-5)
+        analysis_data = lean_transform.analysis_batch(self.stack)
+        self.assertEqual(analysis_data[0].shape, self.stack.shape)
+        transform.data = self.stack[0]
+        transform.analysis()
+        lean_transform.data = self.stack[0]
+        levels = list(lean_transform.analysis_scales())
+        self.assertEqual(len(levels), 3)
+        finest_bands = transform.analysis_data[-len(levels[0]):]
+        for band, finest_band in zip(levels[0].values(), finest_bands):
+            numpy.testing.assert_allclose(band, finest_band, atol=1e-5)
+        with self.assertRaises(ValueError):
+            pysap.load_transform("db4")(nb_scale=3, lean=True)
+
+    def test_lazy_registry(self):
+        """ Test the pywt transforms are created on first use.
+        """
+        registry = pysap.base.transform.WaveletTransformBase.REGISTRY
+        self.assertIn("rbio35", pysap.wavelist("pywt")["pywt"])
+        transform_class = pysap.load_transform("rbio35")
+        self.assertTrue(registry["rbio35"] is transform_class)
+        self.assertTrue(
+            pysap.extensions.transform.rbio35 is transform_class)
+        self.assertTrue(issubclass(
+            transform_class,
+            pysap.extensions.transform.PyWaveletTransformBase))
+        with self.assertRaises(AttributeError):
+            pysap.extensions.transform.unknown_wavelet
+
+    def test_pickle(self):
+        """ Test the transform serialization.
+        """
+        for transform in self.transforms:
+            transform = transform.__class__(
+                nb_scale=2, is_decimated=transform.is_decimated,
+                padding_mode="symmetric")
+            transform.data = self.stack[0]
+            transform.analysis()
+            loaded = pickle.loads(pickle.dumps(transform))
+            self.assertEqual(loaded.padding_mode, "symmetric")
+            self.assertEqual(loaded.is_decimated, transform.is_decimated)
+            numpy.testing.assert_allclose(
+                loaded.analysis_buffer, transform.analysis_buffer)
+            numpy.testing.assert_allclose(
+                loaded.synthesis().data, self.stack[0], atol=1e-8)
+
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, "requires pickle 5")
+    def test_pickle_out_of_band(self):
+        """ Test the transform serialization with out-of-band buffers.
+        """
+        for transform in self.transforms:
+            for contiguous in (False, True):
+                transform = transform.__class__(
+                    nb_scale=2, is_decimated=transform.is_decimated,
+                    contiguous=contiguous)
+                transform.data = self.stack[0]
+                transform.analysis()
+                buffers = []
+                dump = pickle.dumps(
+                    transform, protocol=5, buffer_callback=buffers.append)
+                self.assertTrue(len(buffers) > 0)
+                loaded = pickle.loads(dump, buffers=buffers)
+                self.assertTrue(numpy.shares_memory(
+                    loaded.data, transform.data))
+                for band, loaded_band in zip(
+                        transform.analysis_data, loaded.analysis_data):
+                    self.assertTrue(numpy.shares_memory(band, loaded_band))
+
+    def test_flatten(self):
+        """ Test the flatten/unflatten functions.
+        """
+        x = [self.rng.rand(4, 4), self.rng.rand(2, 3), self.rng.rand(5)]
+        y, shape = pysap.base.utils.flatten(x)
+        self.assertEqual(y.shape, (16 + 6 + 5, ))
+        for arr, unflat in zip(x, pysap.base.utils.unflatten(y, shape)):
+            numpy.testing.assert_array_equal(arr, unflat)
+
+
+class TestPlanCache(unittest.TestCase):
+    """ Test the transformation plans cache.
+    """
+    def test_lru(self):
+        """ Test the cache limits and the least recently used eviction.
+        """
+        cache = PlanCache(max_entries=2, max_bytes=100)
+        plans = {}
+        for key in ("a", "b"):
+            plans[key] = cache.get(key, lambda: TransformPlan(nbytes=40))
+        self.assertTrue(cache.get("a", TransformPlan) is plans["a"])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.get("c", lambda: TransformPlan(nbytes=40))
+        self.assertEqual(len(cache), 2)
+        self.assertFalse("b" in cache)
+        self.assertEqual(cache.nbytes, 80)
+        cache.get("d", lambda: TransformPlan(nbytes=200))
+        self.assertFalse("d" in cache)
+        cache.set_limits(max_bytes=50)
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_shared_parameters(self):
+        """ Test the bands tables are shared but not modified between
+        transformations.
+        """
+        transform_class = pysap.load_transform(
+            "LinearWaveletTransformATrousAlgorithm")
+        data = numpy.zeros((64, 64))
+        transforms = [transform_class(nb_scale=3) for _ in range(2)]
+        for transform in transforms:
+            transform.data = data
+        self.assertFalse(
+            transforms[0].bands_lengths is transforms[1].bands_lengths)
+        numpy.testing.assert_array_equal(
+            transforms[0].bands_lengths, transforms[1].bands_lengths)
+
+    def test_batch_executor(self):
+        """ Test the batch decompositions share a long-lived executor.
+        """
+        executor = get_batch_executor()
+        self.assertTrue(get_batch_executor() is executor)
+        idents = set(executor.map(
+            lambda _: threading.get_ident(), range(64)))
+        self.assertLessEqual(len(idents), os.cpu_count() or 1)
+
+
+class TestStarlet(unittest.TestCase):
+    """ Test the NumPy 'a trous' engine.
+    """
+    def setUp(self):
+        """ Generate some random data.
+        """
+        self.rng = numpy.random.RandomState(0)
+
+    def test_bands(self):
+        """ Test the bands against a scipy implementation.
+        """
+        data = self.rng.rand(32, 32)
+        engine = StarletTransform(3, padding_mode="symmetric")
+        bands, nb_band_per_scale = engine.transform(data)
+        self.assertEqual(nb_band_per_scale, [1, 1, 1])
+        approximation = data
+        for scale, band in enumerate(bands[:-1]):
+            kernel = numpy.zeros(4 * 2 ** scale + 1)
+            kernel[::2 ** scale] = numpy.array([1, 4, 6, 4, 1]) / 16.
+            smooth = approximation
+            for axis in range(2):
+                smooth = scipy.ndimage.correlate1d(
+                    smooth, kernel, axis=axis, mode="mirror")
+            numpy.testing.assert_allclose(band, approximation - smooth)
+            approximation = smooth
+        numpy.testing.assert_allclose(bands[-1], approximation)
+        numpy.testing.assert_allclose(engine.reconstruct(bands), data)
+
+    def test_transforms(self):
+        """ Test the 'a trous' transforms batches and 3D.
+        """
+        stack = self.rng.rand(3, 16, 16)
+        for name in ("LinearWaveletTransformATrousAlgorithm",
+                     "BsplineWaveletTransformATrousAlgorithm"):
+            transform = pysap.load_transform(name)(
+                nb_scale=3, engine="numpy")
+            analysis_data = transform.analysis_batch(stack)
+            transform.data = stack[1]
+            transform.analysis()
+            for batch_band, band in zip(
+                    analysis_data, transform.analysis_data):
+                numpy.testing.assert_allclose(batch_band[1], band)
+            numpy.testing.assert_allclose(
+                transform.synthesis_batch(analysis_data).data, stack)
+        transform = pysap.load_transform("ATrou3D")(
+            nb_scale=3, engine="numpy")
+        transform.data = self.rng.rand(8, 8, 8)
+        transform.analysis()
+        self.assertEqual(len(transform.analysis_data), 3)
+        numpy.testing.assert_allclose(
+            transform.synthesis().data, transform.data)
+
+    def test_out(self):
+        """ Test the NumPy engine writes its bands and its reconstruction
+        directly in the output arrays and in the workspace.
+        """
+        data = self.rng.rand(16, 16)
+        transform = pysap.load_transform(
+            "BsplineWaveletTransformATrousAlgorithm")(
+                nb_scale=3, engine="numpy", workspace=True)
+        transform.data = data
+        transform.analysis()
+        expected = [band.copy() for band in transform.analysis_data]
+        coeffs_out = numpy.zeros(3 * 16 * 16)
+        with mock.patch.object(transform, "_analysis",
+                               side_effect=AssertionError):
+            transform.analysis(coeffs_out=coeffs_out)
+            for band, expected_band in zip(
+                    transform.analysis_data, expected):
+                self.assertTrue(numpy.shares_memory(band, coeffs_out))
+                numpy.testing.assert_allclose(band, expected_band)
+        with mock.patch.object(transform, "_synthesis",
+                               side_effect=AssertionError):
+            out = numpy.zeros_like(data)
+            self.assertTrue(transform.synthesis(out=out).data is out)
+            numpy.testing.assert_allclose(out, data)
+            recim = transform.synthesis().data
+            self.assertTrue(transform.synthesis().data is recim)
+            numpy.testing.assert_allclose(recim, data)
+
+    def test_engine_selection(self):
+        """ Test the NumPy engine is only used on request.
+        """
+        transform_class = pysap.load_transform(
+            "BsplineWaveletTransformATrousAlgorithm")
+        transform = transform_class(nb_scale=3, engine="numpy")
+        transform.data = self.rng.rand(16, 16)
+        self.assertTrue(isinstance(transform.trf, StarletTransform))
+        transform = transform_class(nb_scale=3)
+        self.assertFalse(isinstance(transform.trf, StarletTransform))
+        self.assertRaises(ValueError, transform_class, 3, engine="unknown")
+        self.assertRaises(ValueError, pysap.load_transform(
+            "MallatWaveletTransform79Filters"), 3, engine="numpy")
+
+    def test_isap_layout(self):
+        """ Test the NumPy engine bands against the ISAP bands tables and
+        the ISAP decomposition file layout.
+        """
+        data = self.rng.rand(32, 32)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for name in ("LinearWaveletTransformATrousAlgorithm",
+                         "BsplineWaveletTransformATrousAlgorithm"):
+                for nb_scale in (3, 4):
+                    transform = pysap.load_transform(name)(
+                        nb_scale=nb_scale, engine="numpy")
+                    transform.data = data
+                    transform.analysis()
+                    self.assertEqual(
+                        [band.shape for band in transform.analysis_data],
+                        [shape for shapes in transform.bands_shapes
+                         for shape in shapes])
+                    path = os.path.join(tmpdir, "{0}.mr".format(name))
+                    with MRFile.create(
+                            path, {}, (nb_scale, 32, 32)) as mrfile:
+                        for isap_band, band in zip(
+                                mrfile.bands(transform),
+                                transform.analysis_data):
+                            isap_band[...] = band
+                    with MRFile(path) as mrfile:
+                        for isap_band, band in zip(
+                                mrfile.bands(transform),
+                                transform.analysis_data):
+                            numpy.testing.assert_allclose(
+                                isap_band, band, rtol=1e-6)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    @unittest.skipIf(not HAS_ISAP, "ISAP is not available")
+    def test_isap_parity(self):
+        """ Test the NumPy engine against the ISAP 'a trous' transforms.
+        """
+        data = self.rng.rand(32, 32).astype(numpy.single)
+        for name in ("LinearWaveletTransformATrousAlgorithm",
+                     "BsplineWaveletTransformATrousAlgorithm"):
+            transforms = [
+                pysap.load_transform(name)(
+                    nb_scale=3, padding_mode="constant", engine=engine)
+                for engine in ("isap", "numpy")]
+            for transform in transforms:
+                transform.data = data
+                transform.analysis()
+            for isap_band, band in zip(transforms[0].analysis_data,
+                                       transforms[1].analysis_data):
+                numpy.testing.assert_allclose(
+                    band, isap_band, rtol=1e-4, atol=1e-5)
+
+    def test_incremental_synthesis(self):
+        """ Test the incremental synthesis of the transforms whose
+        reconstruction is the sum of the bands.
+        """
+        data = self.rng.rand(32, 32)
+        for name in ("LinearWaveletTransformATrousAlgorithm",
+                     "WaveletTransformInFourierSpace"):
+            transform = pysap.load_transform(name)(
+                nb_scale=3, engine="numpy")
+            transform.data = data
+            transform.analysis()
+            transform.synthesis(incremental=True)
+            transform[0, 0] = 2 * transform[0, 0]
+            transform[2, 0] = 0.5 * transform[2, 0]
+            numpy.testing.assert_allclose(
+                transform.synthesis(incremental=True).data,
+                transform.synthesis().data, atol=1e-8)
+
+
+class TestFourier(unittest.TestCase):
+    """ Test the NumPy/SciPy Fourier space engine.
+    """
+    def setUp(self):
+        """ Generate some random data.
+        """
+        self.rng = numpy.random.RandomState(0)
+
+    def test_engine(self):
+        """ Test the bands shapes, the reconstruction, the tight frames and
+        the filters spectra cache.
+        """
+        data = self.rng.rand(32, 32)
+        engine = FourierTransform(4, filter_name="undecimated")
+        bands, nb_band_per_scale = engine.transform(data)
+        self.assertEqual(nb_band_per_scale, [1, 1, 1, 1])
+        numpy.testing.assert_allclose(sum(bands), data)
+        for filter_name in ("algo1", "algo2", "meyer", "isotropic"):
+            engine = FourierTransform(4, filter_name=filter_name)
+            bands = engine.transform(data)[0]
+            self.assertEqual([band.shape for band in bands],
+                             [(32, 32), (16, 16), (8, 8), (8, 8)])
+            numpy.testing.assert_allclose(engine.reconstruct(bands), data)
+            spectra = engine._get_spectra(data.shape)
+            engine.transform(data)
+            self.assertTrue(engine._get_spectra(data.shape) is spectra)
+        stack = self.rng.rand(2, 32, 32)
+        bands = engine.transform_batch(stack)
+        energy = sum(
+            numpy.sum(band ** 2) * 4 ** min(scale, len(bands) - 2)
+            for scale, band in enumerate(bands))
+        numpy.testing.assert_allclose(energy, numpy.sum(stack ** 2))
+        self.assertRaises(ValueError, FourierTransform, 3, "unknown")
+
+    def test_transforms(self):
+        """ Test the Fourier space transforms batches.
+        """
+        stack = self.rng.rand(3, 32, 32)
+        for name in ("WaveletTransformInFourierSpace",
+                     "PyramidalWaveletTransformInFourierSpaceAlgo1",
+                     "MeyerWaveletsCompactInFourierSpace",
+                     "IsotropicAndCompactSupportWaveletInFourierSpace",
+                     "PyramidalWaveletTransformInFourierSpaceAlgo2"):
+            transform = pysap.load_transform(name)(
+                nb_scale=3, engine="numpy")
+            analysis_data = transform.analysis_batch(stack)
+            transform.data = stack[1]
+            transform.analysis()
+            for batch_band, band in zip(
+                    analysis_data, transform.analysis_data):
+                numpy.testing.assert_allclose(batch_band[1], band)
+            numpy.testing.assert_allclose(
+                transform.synthesis().data, stack[1], atol=1e-8)
+            numpy.testing.assert_allclose(
+                transform.synthesis_batch(analysis_data).data, stack,
+                atol=1e-8)
+
+    def test_workers(self):
+        """ Test the FFTs use a single thread by default, and the number
+        of threads is passed from the transforms to the engine.
+        """
+        engine = FourierTransform(3)
+        self.assertEqual(engine.fft_kwargs.get("workers", 1), 1)
+        engine = FourierTransform(3, workers=2)
+        self.assertEqual(engine.fft_kwargs.get("workers", 2), 2)
+        for workers in (1, 4):
+            transform = pysap.load_transform(
+                "WaveletTransformInFourierSpace")(
+                    nb_scale=3, engine="numpy", workers=workers)
+            self.assertEqual(transform.trf.workers, workers)
+            self.assertEqual(
+                transform.trf.fft_kwargs.get("workers", workers), workers)
+
+    def test_isap_layout(self):
+        """ Test the NumPy engine bands against the ISAP bands tables and
+        the ISAP decomposition file layout.
+        """
+        data = self.rng.rand(32, 32)
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for name in ("WaveletTransformInFourierSpace",
+                         "PyramidalWaveletTransformInFourierSpaceAlgo1",
+                         "MeyerWaveletsCompactInFourierSpace",
+                         "IsotropicAndCompactSupportWaveletInFourierSpace",
+                         "PyramidalWaveletTransformInFourierSpaceAlgo2"):
+                for nb_scale in (3, 4):
+                    transform = pysap.load_transform(name)(
+                        nb_scale=nb_scale, engine="numpy")
+                    transform.data = data
+                    transform.analysis()
+                    shapes = [band.shape for band in transform.analysis_data]
+                    self.assertEqual(
+                        shapes, [shape for shapes in transform.bands_shapes
+                                 for shape in shapes])
+                    if transform.is_decimated:
+                        self.assertEqual(shapes[-1], shapes[-2])
+                        cube_shape = (64, 64)
+                    else:
+                        cube_shape = (nb_scale, 32, 32)
+                    path = os.path.join(tmpdir, "{0}.mr".format(name))
+                    with MRFile.create(path, {}, cube_shape) as mrfile:
+                        for isap_band, band in zip(
+                                mrfile.bands(transform),
+                                transform.analysis_data):
+                            isap_band[...] = band
+                    with MRFile(path) as mrfile:
+                        for isap_band, band in zip(
+                                mrfile.bands(transform),
+                                transform.analysis_data):
+                            numpy.testing.assert_allclose(
+                                isap_band, band, rtol=1e-6)
+            self.assertEqual(shapes, [(32, 32), (16, 16), (8, 8), (8, 8)])
+        finally:
+            shutil.rmtree(tmpdir)
+
+    @unittest.skipIf(not HAS_ISAP, "ISAP is not available")
+    def test_isap_parity(self):
+        """ Test the NumPy engine against the ISAP Fourier space
+        transforms.
+        """
+        data = self.rng.rand(32, 32).astype(numpy.single)
+        for name in ("WaveletTransformInFourierSpace",
+                     "PyramidalWaveletTransformInFourierSpaceAlgo1",
+                     "MeyerWaveletsCompactInFourierSpace",
+                     "IsotropicAndCompactSupportWaveletInFourierSpace",
+                     "PyramidalWaveletTransformInFourierSpaceAlgo2"):
+            transforms = [
+                pysap.load_transform(name)(nb_scale=3, engine=engine)
+                for engine in ("isap", "numpy")]
+            for transform in transforms:
+                transform.data = data
+                transform.analysis()
+            for isap_band, band in zip(transforms[0].analysis_data,
+                                       transforms[1].analysis_data):
+                numpy.testing.assert_allclose(
+                    band, isap_band, rtol=1e-4, atol=1e-5)
+
+
+class TestParallel(unittest.TestCase):
+    """ Test the transforms process pool.
+    """
+    def test_map_transform(self):
+        """ Test the process pool outputs against a single transform.
+        """
+        stack = numpy.random.RandomState(0).rand(6, 32, 32)
+        recim = map_transform("db4", stack, nb_scale=2, workers=2)
+        numpy.testing.assert_allclose(recim, stack, atol=1e-8)
+        coeffs = map_transform("db4", stack, nb_scale=2, workers=2,
+                               threshold=0.1, synthesis=False)
+        transform = pysap.load_transform("db4")(nb_scale=2)
+        transform.data = stack[3]
+        transform.analysis()
+        transform.threshold(0.1)
+        numpy.testing.assert_allclose(coeffs[3], transform.analysis_buffer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+##########################################################################
+# pySAP - Copyright (C) CEA, 2017 - 2019
+# Distributed under the terms of the CeCILL-B license, as published by
+# the CEA-CNRS-INRIA. Refer to the LICENSE file or to
+# http://www.cecill.info/licences/Licence_CeCILL-B_V1-en.html
+# for details.
+##########################################################################
+
+# System import
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import CancelledError
+
+# Package import
+import pysap
+from pysap.extensions import tools
+from pysap.extensions import wrapper
+from pysap.extensions import sparse2d
+from pysap.extensions import async_tools
+from pysap.extensions.wrapper import Sparse2dWrapper
+from pysap.extensions.wrapper import Sparse2dExecutor
+from pysap.extensions.mrfile import MRFile
+from pysap.extensions.transform import HaarWaveletTransform
+from pysap.base.scratch import ScratchSpace
+from pysap.base.scratch import mkdtemp_isap
+from pysap.base.scratch import get_scratch_root
+from pysap.base.scratch import get_scratch_space
+from pysap.base.scratch import is_isap_compliant
+from pysap.base.results import ResultCache
+from pysap.base.results import set_result_cache
+from pysap.base.exceptions import Sparse2dKilledError
+from pysap.base.exceptions import Sparse2dTimeoutError
+from pysap.base.exceptions import Sparse2dRuntimeError
+from pysap.base.exceptions import Sparse2dConfigurationError
+
+# Third party import
+import numpy
+
+
+# Global parameters
+# > a fake Sparse2d command sleeping the requested duration in place of
+#   the shell, so that killing it stops the command
+COMMAND = """#!/bin/sh
+if [ "$1" = "0" ]; then echo "done"; else exec sleep $1; fi
+"""
+# > a fake Sparse2d filtering copying its input after a short delay
+FILTER = """#!/bin/sh
+eval in_image=\\${$(($# - 1))}
+eval out_image=\\${$#}
+sleep 0.3
+cp "$in_image" "$out_image"
+"""
+# > a fake Sparse2d decomposition or reconstruction copying its input
+COPY = """#!/bin/sh
+eval in_image=\\${$(($# - 1))}
+eval out_image=\\${$#}
+cp "$in_image" "$out_image"
+"""
+# > a fake Sparse2d decomposition failing after a partial write
+FAILURE = """#!/bin/sh
+eval out_image=\\${$#}
+echo "partial" > "$out_image"
+exit 1
+"""
+# > a fake Sparse2d decomposition writing an invalid file
+INVALID = """#!/bin/sh
+eval out_image=\\${$#}
+echo "partial" > "$out_image"
+"""
+
+
+class TestWrapper(unittest.TestCase):
+    """ Test the Sparse2d commands execution engine.
+    """
+    def setUp(self):
+        """ Create a fake Sparse2d command.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "mr_fake")
+        with open(path, "wt") as open_file:
+            open_file.write(COMMAND)
+        os.chmod(path, 0o755)
+        path = os.path.join(self.tmpdir, "mr_filter")
+        with open(path, "wt") as open_file:
+            open_file.write(FILTER)
+        os.chmod(path, 0o755)
+        self.env = dict(os.environ)
+        self.env["PATH"] = os.pathsep.join(
+            [self.tmpdir, self.env.get("PATH", "")])
+        wrapper.clear_executables_cache()
+
+    def tearDown(self):
+        """ Remove the fake Sparse2d command.
+        """
+        wrapper.clear_executables_cache()
+        shutil.rmtree(self.tmpdir)
+
+    def run_command(self, duration):
+        """ Run the fake Sparse2d command.
+        """
+        return Sparse2dWrapper(env=self.env)(["mr_fake", duration])
+
+    def test_executables_cache(self):
+        """ Test the commands paths are resolved once.
+        """
+        self.assertEqual(self.run_command(0), "done\n")
+        self.assertEqual(
+            list(wrapper._EXECUTABLES.values()),
+            [os.path.join(self.tmpdir, "mr_fake")])
+        self.assertRaises(Sparse2dConfigurationError,
+                          Sparse2dWrapper(env=self.env), ["mr_unknown"])
+
+    def test_executor(self):
+        """ Test the concurrent execution, the timeouts, the cancellation
+        and the kill.
+        """
+        with Sparse2dExecutor(max_workers=4) as executor:
+            start = time.time()
+            futures = executor.map(self.run_command, [0.5] * 4)
+            self.assertEqual(
+                [future.result() for future in futures], [""] * 4)
+            self.assertLess(time.time() - start, 1.5)
+            future = executor.submit(self.run_command, 10, timeout=0.2)
+            self.assertRaises(Sparse2dTimeoutError, future.result)
+            future = executor.submit(self.run_command, 10)
+            time.sleep(0.2)
+            self.assertFalse(future.cancel())
+            self.assertTrue(future.kill())
+            self.assertRaises(Sparse2dKilledError, future.result, 2)
+            self.assertFalse(future.cancelled())
+            self.assertFalse(future.kill())
+        with Sparse2dExecutor(max_workers=1) as executor:
+            futures = executor.map(self.run_command, [10, 10])
+            time.sleep(0.2)
+            self.assertTrue(futures[1].cancel())
+            self.assertTrue(futures[1].cancelled())
+            self.assertRaises(CancelledError, futures[1].result)
+            futures[0].kill()
+
+    def test_async_tools(self):
+        """ Test the asynchronous commands and their concurrency limiter.
+        """
+        async def run(images):
+            async_tools.set_max_concurrency(2)
+            start = time.time()
+            results = await asyncio.gather(*[
+                async_tools.mr_filter(image) for image in images])
+            duration = time.time() - start
+            with self.assertRaises(Sparse2dTimeoutError):
+                await async_tools.run_command(["mr_fake", 10], timeout=0.2)
+            return results, duration
+
+        images = [numpy.full((8, 8), idx, dtype=numpy.single)
+                  for idx in range(4)]
+        limit = async_tools.MAX_CONCURRENCY
+        try:
+            with mock.patch.dict(os.environ, {"PATH": self.env["PATH"]}):
+                results, duration = asyncio.run(run(images))
+        finally:
+            async_tools.set_max_concurrency(limit)
+        for image, result in zip(images, results):
+            self.assertTrue(numpy.allclose(image, result))
+        self.assertGreater(duration, 0.55)
+
+    def test_scratch_space(self):
+        """ Test the reusable ISAP scratch directory.
+        """
+        with mock.patch.dict(os.environ, {"PYSAP_SCRATCH_DIR": self.tmpdir}):
+            self.assertEqual(get_scratch_root(), self.tmpdir)
+            scratch = ScratchSpace(max_files=2)
+        self.assertEqual(os.path.dirname(scratch.path), self.tmpdir)
+        with scratch.temporary(".fits") as path:
+            open(path, "wt").close()
+        self.assertFalse(os.path.exists(path))
+        paths = [scratch.new_path(".mr") for idx in range(3)]
+        for path in paths:
+            open(path, "wt").close()
+            scratch.keep(path)
+        self.assertEqual([os.path.exists(path) for path in paths],
+                         [False, True, True])
+        scratch.cleanup()
+        self.assertFalse(os.path.exists(scratch.path))
+        with mock.patch.dict(os.environ, {"PYSAP_SCRATCH_MAX_FILES": "0"}):
+            scratch = ScratchSpace(root=self.tmpdir)
+        self.assertEqual(scratch.max_files, 0)
+        scratch.cleanup()
+        self.assertRaises(ValueError, ScratchSpace, max_files=-1)
+
+    def test_mkdtemp_isap(self):
+        """ Test the ISAP compliant directories creation.
+        """
+        root = os.path.join(self.tmpdir, "pgm")
+        os.mkdir(root)
+        tmpdir = mkdtemp_isap(root)
+        self.assertTrue(is_isap_compliant(tmpdir))
+        self.assertEqual(os.path.dirname(tmpdir), tempfile.gettempdir())
+        os.rmdir(tmpdir)
+        with mock.patch.object(tempfile, "gettempdir", return_value=root):
+            self.assertRaises(ValueError, mkdtemp_isap, root)
+
+    def test_result_cache(self):
+        """ Test the commands outputs are taken from the result cache.
+        """
+        image = numpy.arange(64, dtype=numpy.single).reshape(8, 8)
+        in_image = os.path.join(self.tmpdir, "in.fits")
+        pysap.io.save(image, in_image)
+        cache = set_result_cache(os.path.join(self.tmpdir, "cache"))
+        try:
+            with mock.patch.dict(os.environ, {"PATH": self.env["PATH"]}):
+                for name, verbose in (("out1.fits", False),
+                                      ("out2.fits", True)):
+                    tools.mr_filter(
+                        in_image, os.path.join(self.tmpdir, name),
+                        verbose=verbose)
+                self.assertEqual((cache.hits, cache.misses), (1, 1))
+                self.assertTrue(numpy.allclose(pysap.io.load(
+                    os.path.join(self.tmpdir, "out2.fits")).data, image))
+                tools.mr_filter(in_image, os.path.join(
+                    self.tmpdir, "out3.fits"), type_of_filtering=2)
+                self.assertEqual(cache.misses, 2)
+                result = asyncio.run(async_tools.mr_filter(image))
+                self.assertEqual((cache.hits, cache.misses), (2, 2))
+                self.assertTrue(numpy.allclose(result, image))
+            cache.max_bytes = 0
+            cache.evict()
+            self.assertEqual(os.listdir(cache.directory), [])
+        finally:
+            set_result_cache(None)
+
+    def test_result_cache_size(self):
+        """ Test the result cache size is tracked without scanning the
+        cache at each store.
+        """
+        cache = ResultCache(os.path.join(self.tmpdir, "cache"),
+                            max_bytes=2500)
+        path = os.path.join(self.tmpdir, "result")
+        with open(path, "wb") as open_file:
+            open_file.write(b"0" * 1000)
+        with mock.patch.object(cache, "evict", wraps=cache.evict) as evict:
+            for index in range(3):
+                key = ResultCache.key(index)
+                cache.store(key, [path])
+                os.utime(os.path.join(cache.directory, key), (index, index))
+                self.assertEqual(evict.call_count, 1 if index < 2 else 2)
+        self.assertEqual(len(os.listdir(cache.directory)), 2)
+        self.assertEqual(cache._nbytes, 2000)
+        self.assertTrue(cache.fetch(ResultCache.key(2), [path]))
+        self.assertFalse(cache.fetch(ResultCache.key(0), [path]))
+        cache.clear()
+        self.assertEqual(cache._nbytes, 0)
+
+    def test_bindings_cache(self):
+        """ Test the bindings results cache keys.
+        """
+        calls = []
+
+        def function(data):
+            calls.append(data)
+            return data + 1
+
+        image = numpy.zeros((4, 4), dtype=numpy.single)
+        rms_map = os.path.join(self.tmpdir, "rms.fits")
+        pysap.io.save(image, rms_map)
+        library = os.path.join(self.tmpdir, "pysparse.so")
+        open(library, "wb").close()
+        cache = set_result_cache(os.path.join(self.tmpdir, "cache"))
+        try:
+            with mock.patch.object(sparse2d, "pysparse",
+                                   mock.Mock(__file__=library)):
+                for verbose in (False, True):
+                    sparse2d.cached_call(
+                        "filter", {"rms_map": rms_map, "verbose": verbose},
+                        function, image)
+                self.assertEqual(len(calls), 1)
+                pysap.io.save(image + 1, rms_map)
+                sparse2d.cached_call(
+                    "filter", {"rms_map": rms_map}, function, image)
+                self.assertEqual(len(calls), 2)
+                for _ in range(2):
+                    sparse2d.cached_call(
+                        "filter", {"support_file_name": "support.fits"},
+                        function, image)
+                self.assertEqual(len(calls), 4)
+        finally:
+            set_result_cache(None)
+
+    def test_mr_file(self):
+        """ Test the memory-mapped decomposition files.
+        """
+        transform = HaarWaveletTransform(nb_scale=3)
+        transform.data = numpy.zeros((8, 8))
+        transform.nb_band_per_scale = [3, 3, 1]
+        path = os.path.join(self.tmpdir, "test.mr")
+        bands = [numpy.full(shape, idx, dtype=numpy.single)
+                 for idx, shape in enumerate([(4, 4)] * 3 + [(2, 2)] * 4)]
+        with MRFile.create(path, {"NAXIS": 2, "NAXIS1": 8, "NAXIS2": 8,
+                                  "TYPE_TRA": 18}) as mrfile:
+            for view, band in zip(mrfile.bands(transform), bands):
+                view[...] = band
+        image = pysap.io.load(path)
+        self.assertEqual(image.metadata["TYPE_TRA"], 18)
+        self.assertTrue(numpy.allclose(image.data[:4, 4:], 0))
+        self.assertTrue(numpy.allclose(image.data[:2, :2], 6))
+        with MRFile(path) as mrfile:
+            self.assertEqual(mrfile.metadata["TYPE_TRA"], 18)
+            views = mrfile.bands(transform)
+            for view, band in zip(views, bands):
+                self.assertTrue(numpy.shares_memory(view, mrfile.data))
+                numpy.testing.assert_array_equal(view, band)
+
+    def test_wrapping(self):
+        """ Test the wrapping decomposition bands are read and written in
+        place in the decomposition files.
+        """
+        for name in ("mr_transform", "mr_recons"):
+            path = os.path.join(self.tmpdir, name)
+            with open(path, "wt") as open_file:
+                open_file.write(COPY)
+            os.chmod(path, 0o755)
+        image = numpy.arange(64, dtype=numpy.single).reshape(8, 8)
+        transform = HaarWaveletTransform(nb_scale=3)
+        self.assertTrue(transform.use_wrapping)
+        transform.data = image
+        with mock.patch.dict(os.environ, {"PATH": self.env["PATH"]}):
+            transform.analysis()
+            self.assertEqual(len(transform.analysis_data), 7)
+            base = transform.analysis_data[0].base
+            for band in transform.analysis_data:
+                self.assertEqual(band.dtype, numpy.single)
+                self.assertTrue(band.base is base)
+            numpy.testing.assert_array_equal(
+                transform.analysis_data[0], image[:4, 4:])
+            numpy.testing.assert_array_equal(
+                transform.analysis_data[-1], image[:2, :2])
+            numpy.testing.assert_array_equal(
+                transform.synthesis().data, image)
+            transform.analysis_data[0][...] = 0
+            expected = image.copy()
+            expected[:4, 4:] = 0
+            numpy.testing.assert_array_equal(
+                transform.synthesis().data, expected)
+
+    def test_wrapping_failure(self):
+        """ Test the decomposition file is removed when the decomposition
+        command or the file reading fails.
+        """
+        path = os.path.join(self.tmpdir, "mr_transform")
+        scratch = get_scratch_space()
+        transform = HaarWaveletTransform(nb_scale=3)
+        transform.data = numpy.zeros((8, 8), dtype=numpy.single)
+        for script, error in ((FAILURE, Sparse2dRuntimeError),
+                              (INVALID, ValueError)):
+            with open(path, "wt") as open_file:
+                open_file.write(script)
+            os.chmod(path, 0o755)
+            files = set(os.listdir(scratch.path))
+            with mock.patch.dict(os.environ, {"PATH": self.env["PATH"]}):
+                self.assertRaises(error, transform.analysis)
+            self.assertEqual(set(os.listdir(scratch.path)), files)
+
+
+if __name__ == "__main__":
+    unittest.main()
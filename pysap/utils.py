@@ -19,6 +19,8 @@ import tempfile
 # Package import
 import pysap.extensions.transform
 from pysap.base.transform import WaveletTransformBase
+from pysap.base.transform import LazyRegistryEntry
+from pysap.base.scratch import mkdtemp_isap
 
 
 AVAILABLE_TRANSFORMS = sorted(WaveletTransformBase.REGISTRY.keys())
@@ -84,7 +86,7 @@ def load_transform(name):
     """ Load a transformation using his name.
 
     All the available transfroms are stored in the 'pysap.AVAILABLE_TRANSFORMS'
-    parameter.
+    parameter. The pywt transformations are created on first load.
 
     Parameters
     ----------
@@ -99,7 +101,10 @@ def load_transform(name):
     if name not in WaveletTransformBase.REGISTRY:
         raise ValueError("Unknown transform '{0}'. Allowed transforms are: "
                          "{1}.".format(name, AVAILABLE_TRANSFORMS))
-    return WaveletTransformBase.REGISTRY[name]
+    transform = WaveletTransformBase.REGISTRY[name]
+    if isinstance(transform, LazyRegistryEntry):
+        transform = transform.resolve()
+    return transform
 
 
 class TempDir(object):
@@ -111,7 +116,8 @@ class TempDir(object):
         Parameters
         ----------
         isap: bool, default False
-            if set, generates a temporary folder compatible with ISAP.
+            if set, generates a temporary folder compatible with ISAP, in
+            the scratch root (RAM-backed when available).
         """
         self.path = None
         self.isap = isap
@@ -140,13 +146,7 @@ class TempDir(object):
         tmpdir: str
             the generated ISAP compliant temporary folder.
         """
-        tmpdir = None
-        while (tmpdir is None or "pgm" in tmpdir.lower()
-                or "jpg" in tmpdir.lower()):
-            if tmpdir is not None and os.path.exists(tmpdir):
-                os.rmdir(tmpdir)
-            tmpdir = tempfile.mkdtemp()
-        return tmpdir
+        return mkdtemp_isap()
 
 
 def logo():
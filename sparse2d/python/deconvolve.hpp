@@ -2,6 +2,8 @@
 #define DECONVOLVE_H_
 
 #include <iostream>
+#include <memory>
+#include <mutex>
 
 #include "sparse2d/IM_Obj.h"
 #include "sparse2d/IM_IO.h"
@@ -15,6 +17,9 @@
 #define NBR_OK_METHOD 5
 
 
+// The GIL is released during the deconvolution, the calls on an instance
+// being serialized by a per-instance mutex: use one instance per thread to
+// deconvolve images concurrently.
 class MRDeconvolve
 {
     public:
@@ -51,6 +56,7 @@ class MRDeconvolve
                 void NoiseModelInit();
 
     private:
+        std::mutex mutex;
         float convergence_param;
         float regul_param;
         int number_of_undecimated_scales;
@@ -283,14 +289,21 @@ py::array_t<float> MRDeconvolve::Deconvolve(py::array_t<float>& arr, py::array_t
     Ifloat Guess, Ima_ICF;
     Ifloat *Pt_G = NULL;
     Ifloat *Pt_ICF = NULL;
+    Ifloat Imag = array2image_2d(arr);
+    Ifloat Psf = array2image_2d(psf);
+
+    // Run the deconvolution without the GIL: the returned array owns the
+    // result
+    py::gil_scoped_release release;
+    std::lock_guard<std::mutex> lock(this->mutex);
 
     //outputs information
     if (this->verbose)
         Info();
 
     //read input image 
-    this->CDec.Imag = array2image_2d(arr);
-    this->CDec.Psf = array2image_2d(psf);
+    this->CDec.Imag = Imag;
+    this->CDec.Psf = Psf;
 
     //read additional files
     if (this->first_guess != "") {
@@ -324,8 +337,10 @@ py::array_t<float> MRDeconvolve::Deconvolve(py::array_t<float>& arr, py::array_t
 
     //deconvolution
     this->CDec.im_deconv(Pt_G, Pt_ICF);
+    std::unique_ptr<Ifloat> Result(copy_image_2d(this->CDec.Obj));
 
-    return image2array_2d(this->CDec.Obj);
+    py::gil_scoped_acquire acquire;
+    return image2array_2d(Result.release());
 }
 
 
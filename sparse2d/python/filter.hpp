@@ -14,10 +14,16 @@
 #include <iomanip>
 #include <vector>
 #include <iostream>
+#include <memory>
+#include <mutex>
 
 #include "numpydata.hpp"
 
 std::vector<float> v = {DEFAULT_N_SIGMA};
+
+// The GIL is released during the filtering, the calls on an instance being
+// serialized by a per-instance mutex: use one instance per thread to filter
+// images concurrently.
 class MRFilters
 {
     public:
@@ -70,6 +76,7 @@ class MRFilters
         py::array_t<float> Filter(py::array_t<float>& arr);
         
     private:
+        std::mutex mutex;
         int type_of_filters;
         int number_of_scales;
         float regul_param;
@@ -568,11 +575,17 @@ void MRFilters::write_on_prob_map(MRFiltering CFilter, Ifloat data)
 
 py::array_t<float> MRFilters::Filter(py::array_t<float>& arr)
 {
+    Ifloat data = array2image_2d(arr);
+
+    // Run the filtering without the GIL: the returned array owns the result
+    py::gil_scoped_release release;
+    std::lock_guard<std::mutex> lock(this->mutex);
+
     if (this->verbose == True)
         Info();
 
-    Ifloat data = array2image_2d(arr);
-    Ifloat Result(data.nl(), data.nc(), (char *) "Result Filtering");
+    std::unique_ptr<Ifloat> Result(
+        new Ifloat(data.nl(), data.nc(), (char *) "Result Filtering"));
     check_scale(data.nl(), data.nc(), this->number_of_scales);
 
 
@@ -585,7 +598,7 @@ py::array_t<float> MRFilters::Filter(py::array_t<float>& arr)
     CFilter = filtering_init(CFilter, data);
 
     //perform the filter operation
-    CFilter.filter(data, Result);
+    CFilter.filter(data, *Result);
        
     // support image creation
     if ((this->support_file_name != "") && (this->number_of_scales > 1))
@@ -597,7 +610,9 @@ py::array_t<float> MRFilters::Filter(py::array_t<float>& arr)
     //write info used for computing the probability map
     if ((this->stat_noise == NOISE_EVENT_POISSON) && (this->prob_mr_file != ""))
         write_on_prob_map(CFilter, data);
-    return image2array_2d(Result);
+
+    py::gil_scoped_acquire acquire;
+    return image2array_2d(Result.release());
 }
 void MRFilters::Info(){
     cout << endl << endl << "PARAMETERS: " << endl << endl;
@@ -6,37 +6,49 @@
 #include "sparse2d/MR3D_Obj.h"
 #include "sparse2d/DefFunc.h"
 
+#include <memory>
+#include <mutex>
+#include <vector>
+
 #include "numpydata.hpp"
 
+// The GIL is released during the computations, the calls on an instance
+// being serialized by a per-instance mutex: use one instance per thread to
+// run transformations concurrently.
 class MR2D1D {
 
     public:
         MR2D1D (int type_of_transform=(int)TO_MALLAT,bool normalize=false,bool verbose=false, int nb_scale_2d=5, int nb_scale_1d=4);
+        ~MR2D1D();
 
         void alloc();
         void Info();
         void perform_transform (fltarray &Data);
-        fltarray write_result(int Nelem);
 
         float & operator() (int s2, int s1, int i, int j, int k) const;
         fltarray get_band(int s2, int s1);
 
         py::array_t<float> Reconstruct(py::array_t<float> data);
-        py::array_t<float> Transform(py::array_t<float> Name_Cube_In);
+        py::tuple Transform(py::array_t<float> Name_Cube_In);
+        py::array_t<int> band_table();
     
     private:
-        int Nx, Ny, Nz;
+        std::vector<int> band_rows();
+        py::array_t<int> rows2table(const std::vector<int> &rows);
+
+        std::mutex mutex;
+        int Nx = 0, Ny = 0, Nz = 0;
         int nb_scale_2d;
         int nb_scale_1d;
-        int nbr_band_2d;
-        int nbr_band_1d;
+        int nbr_band_2d = 0;
+        int nbr_band_1d = 0;
         type_transform  transform;
         Bool verbose;
         bool normalize=False;
 
         MultiResol WT2D;
         MR_1D WT1D;
-        fltarray *TabBand;
+        fltarray *TabBand = NULL;
         intarray tab_first_pos_band_nz;
         intarray size_band_nx;
         intarray size_band_ny;
@@ -66,6 +78,11 @@ MR2D1D::MR2D1D (int type_of_transform,bool normalize,bool verbose, int nb_scale_
 } 
 
 
+MR2D1D::~MR2D1D()
+{
+    delete [] TabBand;
+}
+
 float & MR2D1D::operator() (int s2, int s1, int i, int j, int k) const
 {
     if ( (i < 0) || (i >= size_band_nx(s2,s1)) ||
@@ -116,6 +133,7 @@ void MR2D1D::alloc()
     WT1D.alloc (Nz, TO1_MALLAT, nb_scale_1d, ptrfas, NORM_L2, False);   
     nbr_band_1d = WT1D.nbr_band();
 
+    delete [] TabBand;
     TabBand = new fltarray [nbr_band_2d];
     size_band_nx.resize(nbr_band_2d, nbr_band_1d);
     size_band_ny.resize(nbr_band_2d, nbr_band_1d);
@@ -182,120 +200,167 @@ void MR2D1D::perform_transform (fltarray &Data)
 
 py::array_t<float> MR2D1D::Reconstruct(py::array_t<float> data)
 {
-    fltarray Tab = array2image_3d(data);
-
-    int ind=2;
-    for (int s=0; s <nbr_band_2d; s++) 
-    for (int s1=0; s1 < nbr_band_1d; s1++)
+    // The flat coefficients, the bands being stored one after the other as
+    // described by the bands table
+    float_array coeffs = as_float_array(data);
+    const float *pointer = coeffs.data();
+    std::unique_ptr<fltarray> Result;
     {
-       int Nxb = (int) Tab(ind++);
-       int Nyb = (int) Tab(ind++);
-       int Nzb = (int) Tab(ind++);
-       for (int k=0;  k < Nzb; k++) 
-       for (int j=0;  j < Nyb; j++)
-       for (int i=0;  i < Nxb; i++)
-            (*this)(s,s1,i,j,k) = Tab(ind++);
-    }
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
+        std::vector<int> rows = band_rows();
+        if (rows.empty())
+            throw std::invalid_argument("Error: no transform performed");
+        int last = rows.size() - 6;
+        int nb_coeffs = rows[last + 5] + rows[last + 2] * rows[last + 3] * rows[last + 4];
+        if (coeffs.size() != nb_coeffs)
+            throw std::invalid_argument("Error: invalid number of coefficients");
+
+        // Each band is a contiguous block of its 2D band cube
+        for (int b=0; b < (int)rows.size(); b+=6)
+        {
+            int s = rows[b];
+            int s1 = rows[b + 1];
+            int size = rows[b + 2] * rows[b + 3] * rows[b + 4];
+            float *band = TabBand[s].buffer() +
+                size_band_nx(s,s1) * size_band_ny(s,s1) * tab_first_pos_band_nz(s1);
+            std::memcpy(band, pointer + rows[b + 5], sizeof(float) * size);
+        }
 
-    fltarray Data(Nx, Ny, Nz);
-    Ifloat Frame(Ny, Nx);
-    fltarray Vect(Nz);
+        Result.reset(new fltarray(Nx, Ny, Nz));
+        fltarray &Data = *Result;
+        Ifloat Frame(Ny, Nx);
+        fltarray Vect(Nz);
 
-    // 1D wt 
-    if (nbr_band_1d >= 2)
-    {
-        int z = 0;
-        for (int b = 0; b < nbr_band_2d; b++)
-        for (int i = 0; i < WT2D.size_band_nl(b); i++)
-        for (int j = 0; j < WT2D.size_band_nc(b); j++) 
+        // 1D wt 
+        if (nbr_band_1d >= 2)
         {
-            z = 0;
-            for (int b1=0; b1 < nbr_band_1d; b1++)
-            for (int p=0; p < WT1D.size_scale_np (b1); p++)
-                WT1D(b1,p) = TabBand[b](j,i,z++); 
-            Vect.init();
-            WT1D.recons(Vect);
-            for (int z=0; z < Nz; z++)
-                TabBand[b](j,i,z) = Vect(z);
+            int z = 0;
+            for (int b = 0; b < nbr_band_2d; b++)
+            for (int i = 0; i < WT2D.size_band_nl(b); i++)
+            for (int j = 0; j < WT2D.size_band_nc(b); j++) 
+            {
+                z = 0;
+                for (int b1=0; b1 < nbr_band_1d; b1++)
+                for (int p=0; p < WT1D.size_scale_np (b1); p++)
+                    WT1D(b1,p) = TabBand[b](j,i,z++); 
+                Vect.init();
+                WT1D.recons(Vect);
+                for (int z=0; z < Nz; z++)
+                    TabBand[b](j,i,z) = Vect(z);
+            }
         }
-    }
-    // 2D wt 
-    for (int z=0; z < Nz; z++)
-    {
-        for (int b=0; b < nbr_band_2d; b++)
+        // 2D wt 
+        for (int z=0; z < Nz; z++)
         {
-            for (int i=0; i < WT2D.size_band_nl(b); i++)
-            for (int j=0; j < WT2D.size_band_nc(b); j++)
-                WT2D(b,i,j) = TabBand[b](j,i,z);
-        }   
-        WT2D.recons(Frame);
-        for (int i=0; i < Ny; i++)
-        for (int j=0; j < Nx; j++)
-            Data(j,i,z) = Frame(i,j);
+            for (int b=0; b < nbr_band_2d; b++)
+            {
+                for (int i=0; i < WT2D.size_band_nl(b); i++)
+                for (int j=0; j < WT2D.size_band_nc(b); j++)
+                    WT2D(b,i,j) = TabBand[b](j,i,z);
+            }   
+            WT2D.recons(Frame);
+            for (int i=0; i < Ny; i++)
+            for (int j=0; j < Nx; j++)
+                Data(j,i,z) = Frame(i,j);
+        }
     }
-    return image2array_3d(Data);
+    return image2array_3d(Result.release());
 }
  
-py::array_t<float> MR2D1D::Transform(py::array_t<float> Name_Cube_In)
+py::tuple MR2D1D::Transform(py::array_t<float> Name_Cube_In)
 {
     fltarray Dat = array2image_3d(Name_Cube_In);
-
-    Nx = Dat.nx();
-    Ny = Dat.ny();
-    Nz = Dat.nz();
-        
-    if (normalize)
+    std::vector<int> rows;
+    std::unique_ptr<float[]> buffer;
+    int nb_coeffs;
     {
-        double Mean = Dat.mean();
-        double Sigma = Dat.sigma();
-        for (int i = 0;i<Nx;i++)
-        for (int j = 0;j<Ny;j++)
-        for (int k = 0;k<Nz;k++)
-            Dat(i,j,k) = (Dat(i,j,k) - Mean) / Sigma;
-    }    
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
 
-    alloc();
-
-    perform_transform(Dat);
+        Nx = Dat.nx();
+        Ny = Dat.ny();
+        Nz = Dat.nz();
             
-    if (verbose)
-        Info();
+        if (normalize)
+        {
+            double Mean = Dat.mean();
+            double Sigma = Dat.sigma();
+            for (int i = 0;i<Nx;i++)
+            for (int j = 0;j<Ny;j++)
+            for (int k = 0;k<Nz;k++)
+                Dat(i,j,k) = (Dat(i,j,k) - Mean) / Sigma;
+        }    
+
+        alloc();
+
+        perform_transform(Dat);
+                
+        if (verbose)
+            Info();
+
+        // Copy each band, a contiguous block of its 2D band cube, in the
+        // flat coefficients buffer
+        rows = band_rows();
+        int last = rows.size() - 6;
+        nb_coeffs = rows[last + 5] + rows[last + 2] * rows[last + 3] * rows[last + 4];
+        buffer.reset(new float[nb_coeffs]);
+        for (int b=0; b < (int)rows.size(); b+=6)
+        {
+            int s = rows[b];
+            int s1 = rows[b + 1];
+            int size = rows[b + 2] * rows[b + 3] * rows[b + 4];
+            const float *band = TabBand[s].buffer() +
+                size_band_nx(s,s1) * size_band_ny(s,s1) * tab_first_pos_band_nz(s1);
+            std::memcpy(buffer.get() + rows[b + 5], band, sizeof(float) * size);
+        }
+    }
 
-    int Nelem=2;
+    // The coefficients array owns the buffer
+    float *pointer = buffer.release();
+    py::capsule owner(pointer, [](void *p) { delete[] static_cast<float *>(p); });
+    py::array_t<float> coeffs({nb_coeffs}, {sizeof(float)}, pointer, owner);
+
+    return py::make_tuple(coeffs, rows2table(rows));
+}
+
+std::vector<int> MR2D1D::band_rows()
+{
+    // One row per band: the 2D and 1D band indices, the band nx, ny and nz,
+    // and the band offset in the flat coefficients
+    std::vector<int> rows;
+    rows.reserve(nbr_band_2d * nbr_band_1d * 6);
+    int offset = 0;
     for (int s=0; s < nbr_band_2d; s++)
-    for (int s1=0; s1 < nbr_band_1d; s1++) 
-        Nelem += 3 +  size_band_nx(s,s1)*size_band_ny(s,s1)*size_band_nz(s,s1);
-    fltarray Data = write_result(Nelem);
-
-    py::list result;
-    float *buff = Data.buffer();
-    for (int i=0; i<Nelem; i++) {
-        result.append(buff[i]);
+    for (int s1=0; s1 < nbr_band_1d; s1++)
+    {
+        rows.push_back(s);
+        rows.push_back(s1);
+        rows.push_back(size_band_nx(s,s1));
+        rows.push_back(size_band_ny(s,s1));
+        rows.push_back(size_band_nz(s,s1));
+        rows.push_back(offset);
+        offset += size_band_nx(s,s1) * size_band_ny(s,s1) * size_band_nz(s,s1);
     }
-    return result;
+    return rows;
 }
 
-fltarray MR2D1D::write_result(int Nelem)
+py::array_t<int> MR2D1D::rows2table(const std::vector<int> &rows)
 {
-    fltarray Data(Nelem);
-    int ind=2;
-    Data(0) = nbr_band_2d;
-    Data(1) = nbr_band_1d;
-    
-    // Ifloat Band;
-    for (int s=0; s < nbr_band_2d; s++)
-    for (int s1=0; s1 < nbr_band_1d; s1++) 
+    py::array_t<int> table({(int)rows.size() / 6, 6});
+    std::memcpy(table.mutable_data(), rows.data(), sizeof(int) * rows.size());
+    return table;
+}
+
+py::array_t<int> MR2D1D::band_table()
+{
+    std::vector<int> rows;
     {
-        Data(ind++) = size_band_nx(s,s1);
-        Data(ind++) = size_band_ny(s,s1);
-        Data(ind++) = size_band_nz(s,s1);
-        
-        for (int k=0;  k < size_band_nz(s,s1); k++) 
-        for (int j=0;  j < size_band_ny(s,s1); j++) 
-        for (int i=0;  i < size_band_nx(s,s1); i++)
-            Data(ind++) = (*this)(s,s1,i,j,k);
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
+        rows = band_rows();
     }
-    return Data;
+    return rows2table(rows);
 }
 
 void MR2D1D::Info()
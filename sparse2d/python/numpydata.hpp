@@ -13,99 +13,119 @@ for details.
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
 #include <vector>
+#include <cstring>
+#include <memory>
 #include <sparse2d/IM_Obj.h>
 #include <sparse2d/IM_IO.h>
 #include <iostream>
 
 namespace py = pybind11;
 
-// Helper function for fast image to array conversion
-py::array_t<float> image2array_2d(const Ifloat &image){
+// C-contiguous float arrays: the pybind11 conversion copies the inputs
+// only if they are not already C-contiguous float32 arrays
+typedef py::array_t<float, py::array::c_style | py::array::forcecast> float_array;
 
-  auto array = py::array_t<float>(image.n_elem());
-  auto buffer = array.request();
-  float *pointer = (float *) buffer.ptr;
+// Helper function to get a C-contiguous float view of an array, without copy
+// when possible
+float_array as_float_array(const py::array &array){
 
-  for (int i=0; i<image.nl(); i++) {
-    for (int j=0; j<image.nc(); j++) {
-      pointer[j + i * image.nc()] = image(i, j);
-    }
-  }
+  float_array carray = float_array::ensure(array);
+  if (!carray)
+    throw std::runtime_error("Input should be a NumPy array of floats");
 
-  array.resize({image.nl(), image.nc()});
+  return carray;
+}
+
+// Helper function for fast image to array conversion: the image is copied
+// with a single memcpy
+py::array_t<float> image2array_2d(const Ifloat &image){
+
+  auto array = py::array_t<float>({image.nl(), image.nc()});
+  std::memcpy(array.mutable_data(), const_cast<Ifloat &>(image).buffer(),
+              sizeof(float) * image.n_elem());
 
   return array;
 }
 
-// Helper function for fast arrat to image conversion
+// Helper function for zero-copy image to array conversion: the array takes
+// the ownership of the image allocated on the heap
+py::array_t<float> image2array_2d(Ifloat *image){
+
+  py::capsule owner(image, [](void *ptr) {
+    delete reinterpret_cast<Ifloat *>(ptr);
+  });
+
+  return py::array_t<float>({image->nl(), image->nc()}, image->buffer(),
+                            owner);
+}
+
+// Helper function to copy an image on the heap with a single memcpy, so that
+// it can be handed to an array once the GIL is acquired again
+Ifloat *copy_image_2d(const Ifloat &image){
+
+  Ifloat *copy = new Ifloat(image.nl(), image.nc());
+  std::memcpy(copy->buffer(), const_cast<Ifloat &>(image).buffer(),
+              sizeof(float) * image.n_elem());
+
+  return copy;
+}
+
+// Helper function for fast arrat to image conversion: the C-contiguous data
+// are copied with a single memcpy
 Ifloat array2image_2d(py::array_t<float> &array){
 
   if (array.ndim() != 2)
     throw std::runtime_error("Input should be 2-D NumPy array");
 
-  auto buffer = array.request();
-  float *pointer = (float *) buffer.ptr;
-
-  Ifloat image(array.shape(0), array.shape(1));
-
-  for (int i=0; i<array.shape(0); i++) {
-    for (int j=0; j<array.shape(1); j++) {
-      image(i, j) = pointer[j + i * array.shape(1)];
-    }
-  }
+  float_array carray = as_float_array(array);
+  Ifloat image((int) carray.shape(0), (int) carray.shape(1));
+  std::memcpy(image.buffer(), carray.data(), sizeof(float) * carray.size());
 
   return image;
 }
 
-// Helper function for fast image to 3D array conversion
+// Helper function for fast image to 3D array conversion: the sparse2d cube
+// (x varying the fastest) has the memory layout of a C-contiguous
+// (nz, ny, nx) array, so the cube is copied with a single memcpy
 py::array_t<float> image2array_3d(const fltarray &image){
 
-  auto array = py::array_t<float>(image.n_elem());
-  auto buffer = array.request();
-  float *pointer = (float *) buffer.ptr;
+  auto array = py::array_t<float>({image.nz(), image.ny(), image.nx()});
+  std::memcpy(array.mutable_data(), const_cast<fltarray &>(image).buffer(),
+              sizeof(float) * image.n_elem());
 
-  for (int i=0; i<image.nx(); i++) {
-    for (int j=0; j<image.ny(); j++) {
-      for(int k=0; k<image.nz(); k++){
-        pointer[i + image.nx() * (j + k * image.ny())] = image(i, j, k);
-      }
-    }
-  }
+  return array;
+}
 
-  array.resize({image.nz(), image.ny(), image.nx()});
+// Helper function for zero-copy cube to 3D array conversion: the array
+// takes the ownership of the cube allocated on the heap
+py::array_t<float> image2array_3d(fltarray *image){
 
-  return array;
+  py::capsule owner(image, [](void *ptr) {
+    delete reinterpret_cast<fltarray *>(ptr);
+  });
+
+  return py::array_t<float>({image->nz(), image->ny(), image->nx()},
+                            image->buffer(), owner);
 }
 
-// Helper function for fast 3D arrat to image conversion
+// Helper function for fast 3D arrat to image conversion: the C-contiguous
+// data are copied with a single memcpy
 fltarray array2image_3d(py::array_t<float> &array) {
 
   if (array.ndim() == 3)
   {
-    auto buffer = array.request();
-    float *pointer = (float *) buffer.ptr;
-
-    fltarray image(array.shape(2), array.shape(1), array.shape(0));
-
-    for (int i=0; i<array.shape(2); i++) {
-      for (int j=0; j<array.shape(1); j++) {
-        for (int k=0; k<array.shape(0); k++){
-          image(i, j, k) = pointer[i + array.shape(2) * (j + k * array.shape(1))];
-        }
-      }
-    }
+    float_array carray = as_float_array(array);
+    fltarray image((int) carray.shape(2), (int) carray.shape(1),
+                   (int) carray.shape(0));
+    std::memcpy(image.buffer(), carray.data(), sizeof(float) * carray.size());
     return image;
   }
   else if (array.ndim() == 1)
   {
-      fltarray image(len(array));
-
-      auto buffer = array.request();
-      float *pointer = (float *) buffer.ptr;
-
-      for (int i = 0; i < len(array); ++i)
-          image(i) = pointer[i];
-      return image;
+    float_array carray = as_float_array(array);
+    fltarray image((int) carray.size());
+    std::memcpy(image.buffer(), carray.data(), sizeof(float) * carray.size());
+    return image;
   }
   else
     throw std::runtime_error("Input should be 3-D NumPy array");
@@ -38,6 +38,7 @@ PYBIND11_MODULE(pysparse, module)
         py::arg("verbose")=(int)(0)
       )
     .def("info", &MRTransform::Info)
+    .def("allocate", &MRTransform::Allocate, py::arg("shape"))
     .def("transform", &MRTransform::Transform, py::arg("arr"), py::arg("save")=(bool)(0))
     .def("reconstruct", &MRTransform::Reconstruct, py::arg("mr_data"))
     .def_property("opath", &MRTransform::get_opath, &MRTransform::set_opath);
@@ -54,6 +55,7 @@ PYBIND11_MODULE(pysparse, module)
         py::arg("verbose")=(int)(0)
       )
     .def("info", &MRTransform3D::Info)
+    .def("allocate", &MRTransform3D::Allocate, py::arg("shape"))
     .def("transform", &MRTransform3D::Transform, py::arg("arr"), py::arg("save")=(bool)(0))
     .def("reconstruct", &MRTransform3D::Reconstruct, py::arg("mr_data"))
     .def_property("opath", &MRTransform3D::get_opath, &MRTransform3D::set_opath);
@@ -149,5 +151,6 @@ PYBIND11_MODULE(pysparse, module)
         py::arg("Nbr_Plan")=(int)(4)
       )
     .def("transform", &MR2D1D::Transform, py::arg("Name_Cube_in"))
-    .def("reconstruct", &MR2D1D::Reconstruct, py::arg("data"));
+    .def("reconstruct", &MR2D1D::Reconstruct, py::arg("data"))
+    .def("band_table", &MR2D1D::band_table);
 }
\ No newline at end of file
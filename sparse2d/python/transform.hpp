@@ -13,6 +13,9 @@ for details.
 #include <iostream>
 #include <string>
 #include <sstream>
+#include <memory>
+#include <mutex>
+#include <vector>
 #include <sparse2d/IM_Obj.h>
 #include <sparse2d/IM_IO.h>
 #include <sparse2d/MR_Obj.h>
@@ -20,6 +23,9 @@ for details.
 #include "numpydata.hpp"
 
 
+// The GIL is released during the computations, the calls on an instance
+// being serialized by a per-instance mutex: use one instance per thread to
+// run transformations concurrently.
 class MRTransform {
 
 public:
@@ -48,6 +54,10 @@ public:
     // Information method
     void Info();
 
+    // Allocation method: the transformation of an image of the given shape
+    // can then be reconstructed without a prior transform call
+    void Allocate(std::vector<int> shape);
+
     // Transform method
     py::list Transform(py::array_t<float>& arr, bool save=false);
 
@@ -59,6 +69,10 @@ public:
     string get_opath() const {return m_opath;}
 
 private:
+    // Allocate the transformation, the instance mutex being held
+    void Alloc(int nl, int nc);
+
+    std::mutex mutex;
     MultiResol mr;
     FilterAnaSynt fas;
     FilterAnaSynt *ptrfas = NULL;
@@ -224,70 +238,95 @@ void MRTransform::Info(){
     cout << "---------" << endl;
 }
 
+// Allocate the transformation, the instance mutex being held
+void MRTransform::Alloc(int nl, int nc){
+    if (this->mr_initialized) {
+        if ((mr.size_ima_nl() != nl) || (mr.size_ima_nc() != nc))
+            throw std::invalid_argument(
+                "Error: the transformation is allocated for another shape.");
+        return;
+    }
+    if ((this->mr_transform == TO_MALLAT) || (this->mr_transform == TO_UNDECIMATED_MALLAT)) {
+        fas.Verbose = (Bool)this->verbose;
+        fas.alloc(this->filter);
+        ptrfas = &fas;
+    }
+    mr.alloc(nl, nc, this->number_of_scales,
+             this->mr_transform, ptrfas, this->norm,
+             this->nb_of_undecimated_scales, this->no_filter);
+    if (this->mr_transform == TO_LIFTING)
+        mr.LiftingTrans = this->lift_transform;
+    mr.Border = this->bord;
+    mr.Verbose = (Bool)this->verbose;
+    this->mr_initialized = true;
+}
+
+// Allocation method
+void MRTransform::Allocate(std::vector<int> shape){
+    if (shape.size() != 2)
+        throw std::invalid_argument("Error: expect a 2-D shape.");
+    py::gil_scoped_release release;
+    std::lock_guard<std::mutex> lock(this->mutex);
+    Alloc(shape[0], shape[1]);
+}
+
 // Transform method
 py::list MRTransform::Transform(py::array_t<float>& arr, bool save){
     // Load the input image
-    /*if (this->verbose > 0)
-        cout << "Loading input image '" << this->m_ipath << "'..." << endl;
-    Ifloat data;
-    io_read_ima_float((char *)this->m_ipath.c_str(), data);
-    if (this->verbose > 0)
-        cout << "Done." << endl;*/
-
-    // Create the transformation
     Ifloat data = array2image_2d(arr);
-    if (!this->mr_initialized) {
-        //MultiResol mr;
-        //FilterAnaSynt fas;
-        //FilterAnaSynt *ptrfas = NULL;
-        if ((this->mr_transform == TO_MALLAT) || (this->mr_transform == TO_UNDECIMATED_MALLAT)) {
-            fas.Verbose = (Bool)this->verbose;
-            fas.alloc(this->filter);
-            ptrfas = &fas;
-        }
-        mr.alloc(data.nl(), data.nc(), this->number_of_scales,
-                 this->mr_transform, ptrfas, this->norm,
-                 this->nb_of_undecimated_scales, this->no_filter);
-        if (this->mr_transform == TO_LIFTING)
-            mr.LiftingTrans = this->lift_transform;
-        mr.Border = this->bord;
-        mr.Verbose = (Bool)this->verbose;
-        this->mr_initialized = true;
-    }
+    int ndim = arr.ndim();
+    std::vector<std::unique_ptr<Ifloat>> bands;
+    std::vector<int> nb_bands_per_resol;
+    int nbr_band = 0;
 
-    // Perform the transformation
-    if (this->verbose > 0) {
-        cout << "Starting transformation" << endl;
-        cout << "Runtime parameters:" << endl;
-        cout << "  Number of bands: " << mr.nbr_band() << endl;
-        cout << "  Data dimension: " << arr.ndim() << endl;
-        cout << "  Array shape: " << arr.shape(0) << ", " << arr.shape(1) << endl;
-        cout << "  Save transform: " << save << endl;
+    // Run the transformation without the GIL
+    {
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
+
+        // Create the transformation
+        Alloc(data.nl(), data.nc());
+
+        // Perform the transformation
+        if (this->verbose > 0) {
+            cout << "Starting transformation" << endl;
+            cout << "Runtime parameters:" << endl;
+            cout << "  Number of bands: " << mr.nbr_band() << endl;
+            cout << "  Data dimension: " << ndim << endl;
+            cout << "  Array shape: " << data.nl() << ", " << data.nc() << endl;
+            cout << "  Save transform: " << save << endl;
+        }
+        mr.transform(data);
+
+        // Correct the reconstruction error
+        if ((this->iter > 1) && (mr.Set_Transform == TRANSF_PYR))
+            mr_correct_pyr(data, mr, this->iter);
+
+        // Save transform if requested
+        if (save)
+            Save(mr);
+
+        // Copy the generated bands data: the transformation is reused
+        nbr_band = mr.nbr_band();
+        for (int s=0; s<nbr_band; s++)
+            bands.emplace_back(copy_image_2d(mr.band(s)));
+        for (int s=0; s<mr.nbr_scale(); s++)
+            nb_bands_per_resol.push_back(mr.nbr_band_per_resol(s));
     }
-    mr.transform(data);
-
-    // Correct the reconstruction error
-    if ((this->iter > 1) && (mr.Set_Transform == TRANSF_PYR))
-        mr_correct_pyr(data, mr, this->iter);
-
-    // Save transform if requested
-    if (save)
-        Save(mr);
 
     // Return the generated bands data
     py::list mr_data;
-    for (int s=0; s<mr.nbr_band(); s++) {
-        mr_data.append(image2array_2d(mr.band(s)));
-    }
+    for (auto &band: bands)
+        mr_data.append(image2array_2d(band.release()));
 
     // Get the number of bands for each scale
     py::list mr_scale;
     int nb_bands_count = 0;
-    for (int s=0; s<mr.nbr_scale(); s++) {
-        nb_bands_count += mr.nbr_band_per_resol(s);
-        mr_scale.append(mr.nbr_band_per_resol(s));
+    for (int nb_bands: nb_bands_per_resol) {
+        nb_bands_count += nb_bands;
+        mr_scale.append(nb_bands);
     }
-    if (nb_bands_count != mr.nbr_band()) {
+    if (nb_bands_count != nbr_band) {
         mr_scale[py::len(mr_scale) - 1] = 1;
     }
 
@@ -308,22 +347,36 @@ py::array_t<float> MRTransform::Reconstruct(py::list mr_data){
         cout << "  Number of bands: " << py::len(mr_data) << endl;
     }
 
-    // Update transformation
+    // Load the bands
+    std::vector<Ifloat> bands;
+    bands.reserve(py::len(mr_data));
     for (int s=0; s<py::len(mr_data); s++) {
         py::array_t<float> band_array = py::array(mr_data[s]);
-        Ifloat band_data = array2image_2d(band_array);
-        // cout << "Size of inserted band ";
-        // cout << "nb_e:"<< band_data.n_elem() << "/ndim:" << band_data.naxis()\
-        // << "/nx:" << band_data.nx() << "/ny:"  << band_data.ny() <<  endl;
-
-        mr.insert_band(band_data, s);
+        bands.push_back(array2image_2d(band_array));
     }
 
-    // Start the reconstruction
-    Ifloat data(mr.size_ima_nl(), mr.size_ima_nc(), "Reconstruct");
-    mr.recons(data);
+    // Run the reconstruction without the GIL: the returned array owns the
+    // image
+    std::unique_ptr<Ifloat> data;
+    {
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
+        if (!this->mr_initialized)
+            throw std::invalid_argument(
+                "Error: call 'transform' or 'allocate' before reconstructing.");
+        if ((int)bands.size() != mr.nbr_band())
+            throw std::invalid_argument("Error: invalid number of bands.");
+
+        // Update transformation
+        for (int s=0; s<(int)bands.size(); s++)
+            mr.insert_band(bands[s], s);
+
+        // Start the reconstruction
+        data.reset(new Ifloat(mr.size_ima_nl(), mr.size_ima_nc(), "Reconstruct"));
+        mr.recons(*data);
+    }
 
-    return image2array_2d(data);
+    return image2array_2d(data.release());
 }
 
 #endif
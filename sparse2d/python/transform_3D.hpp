@@ -19,6 +19,9 @@ for details.
 #include <string>
 #include <sstream>
 #include <typeinfo>
+#include <memory>
+#include <mutex>
+#include <vector>
 #include <sparse2d/IM_Obj.h>
 #include <sparse2d/IM_IO.h>
 #include <sparse2d/IM3D_IO.h>
@@ -31,6 +34,9 @@ for details.
 
 #define ASSERT_THROW(a,msg) if (!(a)) throw std::runtime_error(msg);
 
+// The GIL is released during the computations, the calls on an instance
+// being serialized by a per-instance mutex: use one instance per thread to
+// run transformations concurrently.
 class MRTransform3D {
 
 public:
@@ -54,6 +60,10 @@ public:
     // Information method
     void Info();
 
+    // Allocation method: the transformation of a cube of the given shape
+    // can then be reconstructed without a prior transform call
+    void Allocate(std::vector<int> shape);
+
     // Transform method
     py::list Transform(py::array_t<float>& arr, bool save=false);
 
@@ -65,6 +75,10 @@ public:
     string get_opath() const {return m_opath;}
 
 private:
+    // Allocate the transformation, the instance mutex being held
+    void Alloc(int nx, int ny, int nz);
+
+    std::mutex mutex;
     MR_3D mr;
     FilterAnaSynt fas;
     FilterAnaSynt *ptrfas = NULL;
@@ -203,55 +217,90 @@ void MRTransform3D::Info(){
     }
 
 
+// Allocate the transformation, the instance mutex being held
+void MRTransform3D::Alloc(int nx, int ny, int nz){
+    if (this->mr_initialized) {
+        if ((mr.size_cube_nx() != nx) || (mr.size_cube_ny() != ny) ||
+                (mr.size_cube_nz() != nz))
+            throw std::invalid_argument(
+                "Error: the transformation is allocated for another shape.");
+        return;
+    }
+    ASSERT_THROW(
+        ((int)pow(2, this->number_of_scales) <= (int)min(nx, min(ny, nz))),
+        "Number of scales is too damn high (for the size of the data)");
+    if ((this->mr_transform == TO3_MALLAT)) {
+        fas.Verbose = (Bool)this->verbose;
+        fas.alloc(this->filter);
+        ptrfas = &fas;
+    }
+
+    mr.alloc(nx, ny, nz, this->mr_transform,
+             this->number_of_scales, ptrfas, this->norm);
+
+    if (this->mr_transform == TO3_LIFTING)
+        mr.LiftingTrans = this->lift_transform;
+
+    mr.Verbose = (Bool)this->verbose;
+    this->mr_initialized = true;
+}
+
+// Allocation method: the shape is the NumPy (nz, ny, nx) cube shape
+void MRTransform3D::Allocate(std::vector<int> shape){
+    if (shape.size() != 3)
+        throw std::invalid_argument("Error: expect a 3-D shape.");
+    py::gil_scoped_release release;
+    std::lock_guard<std::mutex> lock(this->mutex);
+    Alloc(shape[2], shape[1], shape[0]);
+}
+
 // Transform method
 py::list MRTransform3D::Transform(py::array_t<float>& arr, bool save){
 
-    // Create the transformation
+    // Load the input cube
     fltarray data = array2image_3d(arr);
-    if (!this->mr_initialized) {
-        if ((this->mr_transform == TO3_MALLAT)) {
-            fas.Verbose = (Bool)this->verbose;
-            fas.alloc(this->filter);
-            ptrfas = &fas;
+    std::vector<std::unique_ptr<fltarray>> bands;
+    int nbr_band = 0;
+    int nbr_scale = 0;
+
+    // Run the transformation without the GIL
+    {
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
+
+        // Create the transformation
+        Alloc(data.nx(), data.ny(), data.nz());
+
+        // Perform the transformation
+        if (this->verbose > 0) {
+            cout << "Starting transformation" << endl;
+            cout << "Runtime parameters:" << endl;
+            cout << "  Number of bands: " << mr.nbr_band() << endl;
+            cout << "  Data dimension: " << 3 << endl;
+            cout << "  Array shape: " << data.nz() << ", " << data.ny() << ", " << data.nx() << endl;
+            cout << "  Save transform: " << save << endl;
         }
 
-        mr.alloc(data.nx(), data.ny(), data.nz(), this->mr_transform,
-                 this->number_of_scales, ptrfas, this->norm);
+        mr.transform(data);
 
-        if (this->mr_transform == TO3_LIFTING)
-            mr.LiftingTrans = this->lift_transform;
+        // Save transform if requested
+        if (save)
+            Save(mr);
 
-        mr.Verbose = (Bool)this->verbose;
-        this->mr_initialized = true;
-    }
-
-    // Perform the transformation
-    if (this->verbose > 0) {
-        cout << "Starting transformation" << endl;
-        cout << "Runtime parameters:" << endl;
-        cout << "  Number of bands: " << mr.nbr_band() << endl;
-        cout << "  Data dimension: " << arr.ndim() << endl;
-        cout << "  Array shape: " << arr.shape(0) << ", " << arr.shape(1) << ", " << arr.shape(2) << endl;
-        cout << "  Save transform: " << save << endl;
+        // Extract the generated bands: the returned arrays own them
+        nbr_band = mr.nbr_band();
+        nbr_scale = mr.nbr_scale();
+        for (int s=0; s<nbr_band; s++) {
+            std::unique_ptr<fltarray> tmpband(new fltarray);
+            mr.get_band(s, *tmpband);
+            bands.push_back(std::move(tmpband));
+        }
     }
 
-    ASSERT_THROW(
-        ((int)pow(2, this->number_of_scales) <= (int)min(arr.shape(0), min(arr.shape(1), arr.shape(2)))),
-        "Number of scales is too damn high (for the size of the data)");
-
-    mr.transform(data);
-
-    // Save transform if requested
-    if (save)
-        Save(mr);
-
     // Return the generated bands data
     py::list mr_data;
-    for (int s=0; s<mr.nbr_band(); s++) {
-        fltarray tmpband;
-        mr.get_band(s, tmpband);
-        mr_data.append(image2array_3d(tmpband));
-    }
+    for (auto &band: bands)
+        mr_data.append(image2array_3d(band.release()));
 
     // Get the number of bands for each scale
     py::list mr_scale;
@@ -265,11 +314,11 @@ py::list MRTransform3D::Transform(py::array_t<float>& arr, bool save){
     if(this->mr_transform == TO3_ATROUS ){nbr_band_per_resol_cst = 1;}
 
     int nb_bands_count = 0;
-    for (int s=0; s<mr.nbr_scale(); s++) {
+    for (int s=0; s<nbr_scale; s++) {
         nb_bands_count += nbr_band_per_resol_cst;
         mr_scale.append(nbr_band_per_resol_cst);
     }
-    if (nb_bands_count != mr.nbr_band()) {
+    if (nb_bands_count != nbr_band) {
         mr_scale[py::len(mr_scale) - 1] = 1;
     }
 
@@ -278,8 +327,6 @@ py::list MRTransform3D::Transform(py::array_t<float>& arr, bool save){
     mr_result.append(mr_data);
     mr_result.append(mr_scale);
 
-    // cout << "mr_result[1]: " << py::extract<std::string>(py::object(mr_result[1]).attr("__str__")())() << endl;
-
     return mr_result;
 }
 
@@ -292,26 +339,40 @@ py::array_t<float> MRTransform3D::Reconstruct(py::list mr_data){
         cout << "  Number of bands: " << py::len(mr_data) << endl;
     }
 
-    // Update transformation
+    // Load the bands
+    std::vector<fltarray> bands;
+    bands.reserve(py::len(mr_data));
     for (int s=0; s<py::len(mr_data); s++) {
         py::array_t<float> band_array = py::array(mr_data[s]);
-        fltarray band_data = array2image_3d(band_array);
-        // cout << "Size of inserted band ";
-        // cout << "nb_e:"<< band_data.n_elem() << "/ndim:" << band_data.naxis()\
-        // << "/nx:" << band_data.nx() << "/ny:"  << band_data.ny() << "nz:"  << band_data.nz() <<  endl;
-
-        mr.insert_band(s, band_data);
+        bands.push_back(array2image_3d(band_array));
     }
 
-    int Nx = mr.size_cube_nx();
-    int Ny = mr.size_cube_ny();
-    int Nz = mr.size_cube_nz();
-
-    // Start the reconstruction
-    fltarray data(Nx, Ny, Nz, "Reconstruct");
-    mr.recons(data);
+    // Run the reconstruction without the GIL: the returned array owns the
+    // cube
+    std::unique_ptr<fltarray> data;
+    {
+        py::gil_scoped_release release;
+        std::lock_guard<std::mutex> lock(this->mutex);
+        if (!this->mr_initialized)
+            throw std::invalid_argument(
+                "Error: call 'transform' or 'allocate' before reconstructing.");
+        if ((int)bands.size() != mr.nbr_band())
+            throw std::invalid_argument("Error: invalid number of bands.");
+
+        // Update transformation
+        for (int s=0; s<(int)bands.size(); s++)
+            mr.insert_band(s, bands[s]);
+
+        int Nx = mr.size_cube_nx();
+        int Ny = mr.size_cube_ny();
+        int Nz = mr.size_cube_nz();
+
+        // Start the reconstruction
+        data.reset(new fltarray(Nx, Ny, Nz, "Reconstruct"));
+        mr.recons(*data);
+    }
 
-    return image2array_3d(data);
+    return image2array_3d(data.release());
 }
 
 #endif